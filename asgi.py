@@ -0,0 +1,21 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+# ASGI 入口: uvicorn asgi:app (命令行工具仍由 main.py 提供)
+
+import os
+from dotenv import load_dotenv
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
+if os.path.exists(dotenv_path):
+    load_dotenv(dotenv_path)
+
+
+from server import create_app
+from server.controller.healthz import liveness_async, readness_async
+from server.utils.asgi import AsgiApp
+
+application = create_app(os.getenv("FLASK_CONFIG") or "default")
+app = AsgiApp(application)
+# 探针在事件循环中直接应答
+app.route("/api/healthz/liveness", liveness_async, "api.liveness")
+app.route("/api/healthz/readness", readness_async, "api.readness")
@@ -0,0 +1,5 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 11:30:00
+# description: Benchmarks
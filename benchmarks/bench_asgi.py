@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 00:20:00
+# description: WSGI(gunicorn gthread) 与 ASGI(uvicorn) 在数据库延迟下的对比 (python -m benchmarks.bench_asgi)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from benchmarks.loadgen import HealthScenario, SignedScenario, run_load
+from benchmarks.server import ROOT, seed, free_port, wait_until_up, start_gunicorn
+
+# 模式及说明
+MODES = {
+    "wsgi": "gunicorn gthread, 默认线程数",
+    "wsgi-threads": "gunicorn gthread, 线程数与 ASGI 线程池相同",
+    "asgi": "uvicorn + AsgiApp",
+}
+
+
+def start_server(mode, port, env, workers, threads):
+    if mode == "asgi":
+        env = dict(env, OFFLOAD_THREADS=str(threads))
+        command = ["-m", "uvicorn", "benchmarks.latency_app:asgi_app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--no-access-log", "--log-level", "warning"]
+        return subprocess.Popen([sys.executable] + command, cwd=ROOT, env=env)
+    threads = threads if mode == "wsgi-threads" else None
+    return start_gunicorn(port, env, app="benchmarks.latency_app:app", workers=workers, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default=",".join(MODES), help="模式, 逗号分隔")
+    parser.add_argument("--latency-ms", type=float, default=20, help="每条SQL模拟的数据库延迟(毫秒)")
+    parser.add_argument("--duration", type=float, default=10, help="压测时长(秒)")
+    parser.add_argument("--processes", type=int, default=4, help="压测进程数")
+    parser.add_argument("--connections", type=int, default=64, help="每个压测进程的并发连接数")
+    parser.add_argument("--workers", type=int, default=2, help="服务进程数")
+    parser.add_argument("--threads", type=int, default=30, help="ASGI 线程池大小(wsgi-threads 模式的线程数)")
+    parser.add_argument("--output", default=None, help="结果保存为JSON文件")
+    args = parser.parse_args()
+
+    results = list()
+    with tempfile.TemporaryDirectory() as workdir:
+        database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        access_key, secret_key = seed(database_uri)["Administrator"]
+        env = dict(os.environ, FLASK_CONFIG="production", DATABASE_URI=database_uri, RATELIMIT_ENABLED="false",
+                   SQL_PROFILE="off", BENCH_DB_LATENCY_MS=str(args.latency_ms),
+                   METRICS_DIR=os.path.join(workdir, "metrics"))
+        load = SignedScenario("/api/bench/db", access_key, secret_key, name="signed+db")
+        probe = HealthScenario("/api/healthz/liveness")
+        for mode in args.modes.split(","):
+            port = free_port()
+            process = start_server(mode, port, env, args.workers, args.threads)
+            try:
+                wait_until_up(port)
+                # 高并发业务请求的同时, 以少量连接持续探活, 观察探针延迟
+                probed = dict()
+                prober = threading.Thread(target=lambda: probed.update(
+                    run_load("127.0.0.1", port, probe, args.duration, 1, 2)))
+                prober.start()
+                loaded = run_load("127.0.0.1", port, load, args.duration, args.processes, args.connections)
+                prober.join()
+                for result in (loaded, probed):
+                    result["mode"] = mode
+                    results.append(result)
+                    print(f"{mode:<13} {result['scenario']:<10} c={result['concurrency']:<4} rps={result['rps']:<8} "
+                          f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                          f"errors={result['errors']} statuses={result['statuses']}", flush=True)
+            finally:
+                process.terminate()
+                process.wait(30)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
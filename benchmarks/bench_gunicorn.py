@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 23:20:00
+# description: gunicorn 工作模式吞吐对比 (python -m benchmarks.bench_gunicorn)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.loadgen import HealthScenario, SignedScenario, run_load
+from benchmarks.server import ROOT, seed, free_port, wait_until_up, start_gunicorn
+
+
+def start_server(mode, port, env, workers=None, threads=None):
+    """ mode=default 时不加载配置文件(单个 sync 进程, 即原启动方式) """
+    if mode == "default":
+        return subprocess.Popen([sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "main:app"],
+                                cwd=ROOT, env=env)
+    return start_gunicorn(port, env, worker_class=mode, workers=workers, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default="default,sync,gthread,gevent",
+                        help="工作模式, 逗号分隔(default 为不加载配置文件的单进程 sync)")
+    parser.add_argument("--duration", type=float, default=5, help="每个场景的压测时长(秒)")
+    parser.add_argument("--processes", type=int, default=2, help="压测进程数")
+    parser.add_argument("--connections", type=int, default=8, help="每个压测进程的并发连接数")
+    parser.add_argument("--workers", type=int, default=None, help="gunicorn 进程数(默认按配置文件自动计算)")
+    parser.add_argument("--threads", type=int, default=None, help="gthread 线程数")
+    parser.add_argument("--output", default=None, help="结果保存为JSON文件")
+    args = parser.parse_args()
+
+    results = list()
+    with tempfile.TemporaryDirectory() as workdir:
+        database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        access_key, secret_key = seed(database_uri)["Administrator"]
+        env = dict(os.environ, FLASK_CONFIG="production", DATABASE_URI=database_uri, RATELIMIT_ENABLED="false",
+                   SQL_PROFILE="off", DB_POOL_WARMUP="0", METRICS_DIR=os.path.join(workdir, "metrics"))
+        scenarios = [
+            HealthScenario("/api/healthz/liveness"),
+            HealthScenario("/api/healthz/readness"),
+            SignedScenario("/api/machine-users/bulk", access_key, secret_key),
+            SignedScenario("/api/machine-users/bulk", access_key, secret_key, valid=False),
+        ]
+        for mode in args.modes.split(","):
+            port = free_port()
+            process = start_server(mode, port, env, args.workers, args.threads)
+            try:
+                wait_until_up(port)
+                for scenario in scenarios:
+                    result = run_load("127.0.0.1", port, scenario, args.duration, args.processes, args.connections)
+                    result["mode"] = mode
+                    results.append(result)
+                    print(f"{mode:<8} {result['scenario']:<14} rps={result['rps']:<9} p50={result['p50_ms']}ms "
+                          f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']} "
+                          f"statuses={result['statuses']}", flush=True)
+            finally:
+                process.terminate()
+                process.wait(30)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 16:50:00
+# description: 机器用户批量导入基准 (python -m benchmarks.bench_provision)
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from server import configs, create_app, db
+from server.model.rbca import Role
+from server.service.provision import read_rows, import_machine_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000, help="导入行数")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每批插入行数")
+    parser.add_argument("--database-uri", default=None, help="数据库地址(默认使用临时 SQLite 文件)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        class BenchmarkConfig(configs.TestingConfig):
+            SQLALCHEMY_DATABASE_URI = args.database_uri or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+            SQL_PROFILE = "off"
+
+        configs.config["benchmark"] = BenchmarkConfig
+        app = create_app("benchmark")
+        with app.app_context():
+            db.create_all()
+            Role.insert_roles()
+            prefix = os.urandom(4).hex()
+            roles = ("Follower", "Executor", "")
+            source = io.StringIO("".join(
+                json.dumps({"name": f"bench-{prefix}-{i}", "desc": "benchmark", "owner": "bench", "role": roles[i % 3]})
+                + "\n" for i in range(args.rows)))
+            started = time.perf_counter()
+            created = sum(result["status"] == "created"
+                          for result in import_machine_users(read_rows(source, "ndjson"), chunk_size=args.chunk_size))
+            elapsed = time.perf_counter() - started
+            print(f"rows={args.rows} created={created} chunk={args.chunk_size} "
+                  f"elapsed={elapsed:.2f}s rate={created / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
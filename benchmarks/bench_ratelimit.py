@@ -0,0 +1,61 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 21:30:00
+# description: 限流存储多进程竞争基准 (python -m benchmarks.bench_ratelimit)
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from server.utils import ratelimit_storage  # noqa: F401
+
+
+def worker(uri, keys, hits, limit, barrier, index):
+    """ 每个进程各自打开存储, 同时开始后轮流命中 keys 个键 """
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse(limit)
+    names = [f"key-{i}" for i in range(keys)]
+    barrier.wait()
+    started = time.perf_counter()
+    allowed = 0
+    for i in range(hits):
+        allowed += limiter.hit(item, names[(i + index) % keys])
+    return time.perf_counter() - started, allowed
+
+
+def run(uri, processes, keys, hits, limit):
+    context = multiprocessing.get_context("fork")
+    barrier = context.Manager().Barrier(processes)
+    with context.Pool(processes) as pool:
+        results = pool.starmap(worker, [(uri, keys, hits, limit, barrier, i) for i in range(processes)])
+    elapsed = max(seconds for seconds, _ in results)
+    return {
+        "hits_per_sec": round(processes * hits / elapsed),
+        "us_per_hit": round(elapsed / hits * 1e6, 2),
+        "allowed": sum(allowed for _, allowed in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=8, help="并发进程数")
+    parser.add_argument("--hits", type=int, default=20000, help="每个进程的命中次数")
+    parser.add_argument("--limit", default="10000/hour", help="限流规则")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for keys in (1, 1000):
+            # memory:// 各进程独立计数, 仅作为速度参考; allowed 超出限额即为多进程下的放大效应
+            for uri in ("memory://", f"mmap://{workdir}/ratelimit-{keys}.mmap"):
+                result = run(uri, args.processes, keys, args.hits, args.limit)
+                print(f"{uri.split(':')[0]:<6} processes={args.processes} keys={keys:<5} {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 17:30:00
+# description: 响应序列化基准 (python -m benchmarks.bench_response)
+
+import argparse
+import time
+import tracemalloc
+
+from flask import Flask, jsonify
+from server.bean.response import ApiResponse, Success, stream_payload, JSON_BACKEND
+
+
+class LegacyApiResponse:
+    """ 旧实现: 名称改写的私有字段 + 属性访问 + setdefault 构造字典 """
+
+    __code = None
+    __message = None
+    __payload = None
+    __time_elapsed_ms = None
+
+    def __init__(self, code, message, payload=None, time_elapsed_ms=None):
+        self.__code = code
+        self.__message = message
+        self.__payload = payload
+        self.__time_elapsed_ms = time_elapsed_ms
+
+    def data(self):
+        resp_obj = dict()
+        resp_obj.setdefault("code", self.__code)
+        resp_obj.setdefault("message", self.__message)
+        if self.__payload:
+            resp_obj.setdefault("payload", self.__payload)
+        if self.__time_elapsed_ms:
+            resp_obj.setdefault("timeElapsedMs", self.__time_elapsed_ms)
+        return resp_obj
+
+
+def payload_of(size):
+    return [{"id": i, "name": f"machine-user-{i}", "owner": "team", "isEnabled": True, "roleId": 1}
+            for i in range(size)]
+
+
+def measure(label, build, seconds):
+    """ 测量 每秒响应数 与 单次构造的峰值分配字节数 """
+    app = Flask(__name__)
+    with app.test_request_context():
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        # 逐块消费响应体(与 WSGI 服务器写出方式一致)
+        size = sum(len(chunk) for chunk in build().response)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        count, deadline = 0, time.perf_counter() + seconds
+        started = time.perf_counter()
+        while time.perf_counter() < deadline:
+            for _ in range(50):
+                for _ in build().response:
+                    pass
+            count += 50
+        rate = count / (time.perf_counter() - started)
+    print(f"{label:<34} {rate:>12.0f} resp/s {peak:>12} B peak {size:>10} B body")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0, help="每项测量时长(秒)")
+    args = parser.parse_args()
+    print(f"json backend: {JSON_BACKEND}")
+
+    constant = Success().freeze()
+    measure("empty: legacy jsonify", lambda: jsonify(LegacyApiResponse(200, "success").data()), args.seconds)
+    measure("empty: to_response", lambda: Success().to_response(), args.seconds)
+    measure("empty: constant", lambda: constant.to_response(), args.seconds)
+    for size in (10, 1000, 10000):
+        payload = payload_of(size)
+        measure(f"list[{size}]: legacy jsonify",
+                lambda: jsonify(LegacyApiResponse(200, "success", payload).data()), args.seconds)
+        measure(f"list[{size}]: to_response", lambda: ApiResponse(200, "success", payload).to_response(), args.seconds)
+        measure(f"list[{size}]: stream_payload", lambda: stream_payload(iter(payload)), args.seconds)
+
+
+if __name__ == "__main__":
+    main()
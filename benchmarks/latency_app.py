@@ -0,0 +1,35 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 00:10:00
+# description: 模拟数据库延迟的压测应用 (WSGI: benchmarks.latency_app:app / ASGI: benchmarks.latency_app:asgi_app)
+
+import os
+import time
+
+from sqlalchemy import event, text
+from server import create_app, db
+from server.controller.healthz import SUCCESS, liveness_async, readness_async
+from server.utils.asgi import AsgiApp
+from server.utils.authentication import signature_required
+
+# 每条语句额外等待的时长(单位: 毫秒), 模拟数据库往返
+LATENCY = float(os.environ.get("BENCH_DB_LATENCY_MS") or 20) / 1000
+
+app = create_app(os.getenv("FLASK_CONFIG") or "production")
+
+
+@app.route("/api/bench/db", methods=["POST"])
+@signature_required
+def bench_db():
+    """ 签名校验 + 一次数据库查询 """
+    db.session.execute(text("SELECT 1"))
+    return SUCCESS.to_response()
+
+
+with app.app_context():
+    event.listen(db.engine, "before_cursor_execute", lambda *args: time.sleep(LATENCY))
+
+asgi_app = AsgiApp(app)
+asgi_app.route("/api/healthz/liveness", liveness_async, "api.liveness")
+asgi_app.route("/api/healthz/readness", readness_async, "api.readness")
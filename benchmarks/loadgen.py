@@ -0,0 +1,167 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 22:40:00
+# description: 多进程 HTTP 压测客户端
+
+__all__ = ["Scenario", "HealthScenario", "SignedScenario", "run_load", "percentile"]
+
+import http.client
+import multiprocessing
+import threading
+import time
+import uuid
+
+from typing import Dict, List, Optional, Text, Tuple
+from server.utils.authentication import Authentication
+
+
+class Scenario:
+    """ 压测场景: 生成第 i 个请求 (method, path, headers, body) """
+
+    name = "scenario"
+    # 视为成功的状态码
+    expected = (200,)
+
+    def request(self, i: int) -> Tuple[Text, Text, Dict, bytes]:
+        raise NotImplementedError
+
+    def check(self, status: int, body: bytes) -> bool:
+        """ 响应是否符合预期 """
+        return status in self.expected
+
+
+class HealthScenario(Scenario):
+    """ 探针 """
+
+    def __init__(self, path: Text = "/api/healthz/liveness"):
+        self.name = path.rsplit("/", 1)[-1]
+        self.path = path
+
+    def request(self, i):
+        return "GET", self.path, {}, b""
+
+
+class SignedScenario(Scenario):
+    """
+    签名请求(每个请求使用新的随机数与时间戳); valid=False 时提交错误签名
+    expected_code 为预期的业务错误码(默认: 签名正确时不应返回错误, 签名错误时应返回签名不一致)
+    """
+
+    def __init__(self, path: Text, access_key: Text, secret_key: Text, body: bytes = b"", method: Text = "POST",
+                 valid: bool = True, name: Optional[Text] = None, content_type: Text = "application/x-ndjson",
+                 expected_code: Optional[int] = None):
+        self.name = name or ("signed" if valid else "bad-signature")
+        self.expected_code = expected_code if valid or expected_code is not None else -2002
+        self.path = path
+        self.method = method
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.body = body
+        self.valid = valid
+        self.content_type = content_type
+
+    def request(self, i):
+        headers = {
+            "Content-Type": self.content_type,
+            "X-Access-Key": self.access_key,
+            "X-Timestamp": str(int(time.time() * 1000)),
+            "X-Nonce": uuid.uuid4().hex,
+            "X-Keys": "X-Access-Key,X-Timestamp,X-Nonce",
+        }
+        signature = Authentication.calculate_signature(self.access_key, self.secret_key, {}, headers, self.body)
+        headers["X-Signature"] = signature if self.valid else signature[::-1]
+        return self.method, self.path, headers, self.body
+
+    def check(self, status, body):
+        if status not in self.expected:
+            return False
+        if self.expected_code is not None:
+            return body.startswith(b'{"code":%d,' % self.expected_code)
+        # 业务错误码均为负数
+        return not body.startswith(b'{"code":-')
+
+
+def percentile(values: List[float], q: float) -> float:
+    """ 已排序序列的分位数(最近秩) """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+def _client(host, port, scenario, duration, connections, offset, queue):
+    """ 单个压测进程: connections 个线程各持有一个长连接 """
+    deadline = time.perf_counter() + duration
+    latencies, statuses, errors, unexpected = list(), dict(), [0], [0]
+    lock = threading.Lock()
+
+    def loop(index):
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local, local_status, local_unexpected, i = list(), dict(), 0, offset + index * 1_000_000
+        while time.perf_counter() < deadline:
+            method, path, headers, body = scenario.request(i)
+            i += 1
+            # 生产配置强制 HTTPS, 压测时声明已由前端代理终止 TLS
+            headers = dict(headers, **{"X-Forwarded-Proto": "https"})
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body or None, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            local.append(time.perf_counter() - started)
+            local_status[response.status] = local_status.get(response.status, 0) + 1
+            local_unexpected += not scenario.check(response.status, content)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            unexpected[0] += local_unexpected
+            for status, count in local_status.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put((latencies, statuses, errors[0], unexpected[0]))
+
+
+def run_load(host: Text, port: int, scenario: Scenario, duration: float = 5.0, processes: int = 4,
+             connections: int = 4) -> Dict:
+    """ 以 processes × connections 个并发长连接压测 duration 秒, 返回 RPS 与延迟分位数(毫秒) """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=_client, args=(host, port, scenario, duration, connections,
+                                                     n * 100_000_000, queue))
+               for n in range(processes)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = dict()
+    for _, status_counts, _, _ in results:
+        for status, count in status_counts.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        "scenario": scenario.name,
+        "concurrency": processes * connections,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": sum(result[2] for result in results),
+        # 状态码或业务码不符合预期的响应数
+        "unexpected": sum(result[3] for result in results),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
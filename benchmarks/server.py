@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 00:40:00
+# description: 压测服务 (初始化 SQLite 数据库 & 启动 gunicorn)
+
+__all__ = ["ROOT", "seed", "free_port", "wait_until_up", "start_gunicorn"]
+
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from typing import Dict, Text, Tuple
+
+# 项目根目录
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(database_uri: Text, disabled: bool = False) -> Dict[Text, Tuple[Text, Text]]:
+    """
+    建表并写入角色, 每个角色创建一个机器用户; disabled=True 时额外创建一个已停用的用户(键为 Disabled)
+    返回 {角色名: (access_key, secret_key)}
+    """
+    from flask_migrate import Migrate, stamp
+    from server import configs, create_app, db
+    from server.model.rbca import Role, MachineUser
+
+    class SeedConfig(configs.ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        RATELIMIT_ENABLED = False
+        SQL_PROFILE = "off"
+
+    configs.config["benchmark-seed"] = SeedConfig
+    app = create_app("benchmark-seed")
+    Migrate(app, db, directory=os.path.join(ROOT, "migrations"))
+    with app.app_context():
+        db.create_all()
+        stamp(directory=os.path.join(ROOT, "migrations"))
+        Role.insert_roles()
+        roles = {role.name: role for role in Role.query.all()}
+        users = {name: MachineUser(name=f"bench-{name.lower()}", owner="bench", role=role)
+                 for name, role in roles.items()}
+        if disabled:
+            users["Disabled"] = MachineUser(name="bench-disabled", owner="bench", is_enabled=False,
+                                            role=roles["Administrator"])
+        db.session.add_all(users.values())
+        db.session.commit()
+        credentials = {name: (user.access_key, user.secret_key) for name, user in users.items()}
+        db.session.remove()
+    return credentials
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port: int, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request = urllib.request.Request(f"http://127.0.0.1:{port}/api/healthz/liveness",
+                                             headers={"X-Forwarded-Proto": "https"})
+            with urllib.request.urlopen(request, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("服务未能在限定时间内启动")
+
+
+def start_gunicorn(port: int, env: Dict, app: Text = "wsgi:app", worker_class: Text = "gthread",
+                   workers: int = None, threads: int = None) -> subprocess.Popen:
+    """ 以 gunicorn.conf.py 启动服务(访问日志关闭) """
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_ACCESSLOG=os.devnull, GUNICORN_LOGLEVEL="warning")
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    if threads:
+        env["GUNICORN_THREADS"] = str(threads)
+    return subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                             "--bind", f"127.0.0.1:{port}", app], cwd=ROOT, env=env)
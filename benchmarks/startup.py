@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 01:30:00
+# description: 启动耗时 (python -m benchmarks.startup): 导入耗时 & 启动到首个响应的耗时
+
+__all__ = ["measure"]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from typing import Dict, Text
+from benchmarks.server import ROOT, free_port, start_gunicorn
+
+# 新解释器中导入入口模块(含创建应用)的耗时
+IMPORT_SCRIPT = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_seconds(module: Text, env: Dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT.format(module=module)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def first_response_seconds(module: Text, env: Dict, timeout: float = 30) -> float:
+    """ 启动单进程 gunicorn, 返回从启动到存活探针首次返回 200 的耗时 """
+    port = free_port()
+    started = time.perf_counter()
+    process = start_gunicorn(port, env, app=f"{module}:app", workers=1)
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/api/healthz/liveness",
+                                         headers={"X-Forwarded-Proto": "https"})
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(request, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("服务未能在限定时间内启动")
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def measure(module: Text, env: Dict, repeat: int = 5) -> Dict:
+    """ 重复测量取中位数(单位: 毫秒) """
+    imports = [import_seconds(module, env) for _ in range(repeat)]
+    responses = [first_response_seconds(module, env) for _ in range(repeat)]
+    return {
+        "scenario": "startup",
+        "module": module,
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "first_response_ms": round(statistics.median(responses) * 1000, 1),
+    }
+
+
+def environment(workdir: Text) -> Dict:
+    return dict(os.environ, FLASK_CONFIG=os.environ.get("FLASK_CONFIG") or "production",
+                DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'startup.db')}", SQL_PROFILE="off",
+                METRICS_DIR=os.path.join(workdir, "metrics"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", default="main,wsgi", help="入口模块, 逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数(取中位数)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = environment(workdir)
+        for module in args.modules.split(","):
+            result = measure(module, env, args.repeat)
+            print(f"{module:<6} import={result['import_ms']}ms first_response={result['first_response_ms']}ms",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 01:00:00
+# description: HTTP 基准测试套件 (python -m benchmarks.suite), 与基线对比检测性能回退
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from typing import Dict, List, Text
+from benchmarks.loadgen import HealthScenario, SignedScenario, run_load
+from benchmarks.server import ROOT, seed, free_port, wait_until_up, start_gunicorn
+from benchmarks.startup import measure
+
+# 基线文件
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+# 对比的指标及方向(1 表示越大越好, -1 表示越小越好)
+METRICS = {"rps": 1, "p50_ms": -1, "p95_ms": -1, "p99_ms": -1, "import_ms": -1, "first_response_ms": -1}
+
+
+def scenarios(credentials: Dict) -> List:
+    """ 探针 / 签名正确 / 签名错误 / 权限不足 / 密钥已停用 """
+    bulk = "/api/machine-users/bulk"
+    admin, follower, disabled = credentials["Administrator"], credentials["Follower"], credentials["Disabled"]
+    return [
+        HealthScenario("/api/healthz/liveness"),
+        HealthScenario("/api/healthz/readness"),
+        SignedScenario(bulk, *admin, name="signed"),
+        SignedScenario(bulk, *admin, valid=False, name="bad-signature"),
+        SignedScenario(bulk, *follower, name="permission-denied", expected_code=-2001),
+        SignedScenario(bulk, *disabled, name="disabled-key", expected_code=-2001),
+    ]
+
+
+def environment() -> Dict:
+    """ 运行环境(基线只在相近的环境之间可比) """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": cpus,
+        "commit": commit,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run(args) -> Dict:
+    results = dict()
+    with tempfile.TemporaryDirectory() as workdir:
+        database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        credentials = seed(database_uri, disabled=True)
+        env = dict(os.environ, FLASK_CONFIG="production", DATABASE_URI=database_uri, RATELIMIT_ENABLED="false",
+                   SQL_PROFILE="off", DB_POOL_WARMUP="0", METRICS_DIR=os.path.join(workdir, "metrics"))
+        port = free_port()
+        process = start_gunicorn(port, env, workers=args.workers, threads=args.threads)
+        try:
+            wait_until_up(port)
+            for scenario in scenarios(credentials):
+                if args.scenarios and scenario.name not in args.scenarios:
+                    continue
+                result = run_load("127.0.0.1", port, scenario, args.duration, args.processes, args.connections)
+                results[scenario.name] = result
+                print(f"{scenario.name:<18} rps={result['rps']:<9} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                      f"p99={result['p99_ms']}ms errors={result['errors']} unexpected={result['unexpected']}",
+                      flush=True)
+        finally:
+            process.terminate()
+            process.wait(30)
+        if args.startup_repeat:
+            result = results["startup"] = measure("wsgi", env, args.startup_repeat)
+            print(f"{'startup':<18} import={result['import_ms']}ms first_response={result['first_response_ms']}ms",
+                  flush=True)
+    return {
+        "environment": environment(),
+        "settings": {"duration": args.duration, "processes": args.processes, "connections": args.connections,
+                     "workers": args.workers, "threads": args.threads, "startup_repeat": args.startup_repeat},
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, metrics: List[Text]) -> List[Text]:
+    """ 与基线对比, 返回回退项说明(变差超过 threshold 比例即视为回退) """
+    regressions = list()
+    print(f"\n{'scenario':<18} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            continue
+        for metric in metrics:
+            if metric not in base or metric not in result:
+                continue
+            before, after = base[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            worse = -change * METRICS[metric]
+            flag = "  REGRESSION" if worse > threshold else ""
+            print(f"{name:<18} {metric:<18} {before:>10} {after:>10} {change:>+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{name} {metric}: {before} -> {after} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=None, help="只运行指定场景, 逗号分隔")
+    parser.add_argument("--duration", type=float, default=5, help="每个场景的压测时长(秒)")
+    parser.add_argument("--processes", type=int, default=2, help="压测进程数")
+    parser.add_argument("--connections", type=int, default=8, help="每个压测进程的并发连接数")
+    parser.add_argument("--workers", type=int, default=None, help="gunicorn 进程数(默认按配置文件自动计算)")
+    parser.add_argument("--threads", type=int, default=None, help="gunicorn 线程数(默认按配置文件)")
+    parser.add_argument("--startup-repeat", type=int, default=5, help="启动耗时的测量次数(0 表示不测量)")
+    parser.add_argument("--output", default=None, help="结果保存为JSON文件")
+    parser.add_argument("--baseline", default=BASELINE, help="基线文件")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("BENCH_THRESHOLD") or 0.2),
+                        help="允许的变差比例(默认 0.2, 即 20%%), 超过即视为回退")
+    parser.add_argument("--metrics", type=lambda v: v.split(","),
+                        default=["rps", "p95_ms", "import_ms", "first_response_ms"], help=f"参与对比的指标, 逗号分隔(可选: {', '.join(METRICS)})")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次结果覆盖基线")
+    args = parser.parse_args()
+
+    current = run(args)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(current, fp, indent=2)
+
+    failed = [f"{name}: errors={result['errors']} unexpected={result['unexpected']}"
+              for name, result in current["results"].items() if result.get("errors") or result.get("unexpected")]
+    if args.update_baseline:
+        if failed:
+            sys.exit("存在错误响应, 未更新基线:\n" + "\n".join(failed))
+        with open(args.baseline, "w") as fp:
+            json.dump(current, fp, indent=2)
+            fp.write("\n")
+        print(f"基线已更新: {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        failed.extend(compare(current, baseline, args.threshold, args.metrics))
+    else:
+        print(f"基线文件不存在, 跳过对比: {args.baseline}")
+    if failed:
+        sys.exit("性能回退或错误响应:\n" + "\n".join(failed))
+
+
+if __name__ == "__main__":
+    main()
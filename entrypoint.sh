@@ -11,4 +11,5 @@ while true; do
     sleep 5
 done
 
-exec gunicorn -b :5000 --access-logfile - --error-logfile - main:app
+# 工作模式/进程数等参数见 gunicorn.conf.py (可由 GUNICORN_* 环境变量覆盖)
+exec gunicorn -c gunicorn.conf.py wsgi:app
@@ -0,0 +1,91 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 23:00:00
+# description: gunicorn 配置 (gunicorn -c gunicorn.conf.py wsgi:app), 全部参数可由环境变量覆盖
+
+import glob
+import os
+import tempfile
+
+
+def _cpu_count():
+    """ 当前进程可用的CPU数(容器内以CPU亲和性为准) """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+cpus = _cpu_count()
+
+# 监听地址
+bind = os.environ.get("GUNICORN_BIND") or ":5000"
+
+# 工作模式: sync(每个进程一次处理一个请求) / gthread(进程内线程池) / gevent(协程, 需安装 gevent)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS") or "gthread"
+# 进程数: sync 按 2*CPU+1; gthread/gevent 每个CPU一个进程, 并发由线程/协程提供
+workers = _int("GUNICORN_WORKERS", 2 * cpus + 1 if worker_class == "sync" else cpus + 1)
+# 每个进程的线程数(仅 gthread)
+threads = _int("GUNICORN_THREADS", 8 if worker_class == "gthread" else 1)
+# 每个进程的最大并发连接数(仅 gevent)
+worker_connections = _int("GUNICORN_WORKER_CONNECTIONS", 1000)
+
+# 预加载: 主进程创建应用后再 fork, 减少启动时间与内存; 子进程中数据库连接池在 fork 后自动重置.
+# gevent 需要在导入应用之前完成 monkey patch, 默认不预加载
+preload_app = (os.environ.get("GUNICORN_PRELOAD") or ("false" if worker_class == "gevent" else "true")) \
+    .lower() in ("1", "true", "yes")
+
+# 处理一定数量的请求后重启进程, 限制内存增长; 加入随机抖动避免所有进程同时重启
+max_requests = _int("GUNICORN_MAX_REQUESTS", 10000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+# 长连接保持时间(秒); 位于负载均衡之后时应大于其空闲超时
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+# 请求超时 & 平滑退出超时(秒)
+timeout = _int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# 日志输出到标准输出/标准错误
+accesslog = os.environ.get("GUNICORN_ACCESSLOG") or "-"
+errorlog = os.environ.get("GUNICORN_ERRORLOG") or "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL") or "info"
+
+# 多进程指标目录(未配置时使用临时目录); 需在导入应用之前设置
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "server-metrics"))
+
+
+def on_starting(server):
+    """ 主进程启动: 清理上次运行遗留的指标快照(只删除指标服务写入的文件, 不删除目录) """
+    directory = os.environ["METRICS_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for pattern in ("metrics_*.json", "metrics_*.json.tmp", "archive.json", "archive.json.tmp"):
+        for path in glob.glob(os.path.join(directory, pattern)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def post_worker_init(worker):
+    """ 工作进程已加载应用、尚未接收请求: 预热数据库连接 """
+    from server.service.pool import db_pool
+    if db_pool.app is not None and db_pool.warmup:
+        try:
+            worker.log.info("Warmed up %d database connections", db_pool.warm_up())
+        except Exception as e:
+            worker.log.warning("Database warm-up failed: %s", e)
+
+
+def worker_exit(server, worker):
+    """ 工作进程退出: 写入本进程尚未写入的密钥使用情况与审计记录 """
+    from server.service.audit import audit_trail
+    from server.service.usage import key_usage
+    if key_usage.app is not None and key_usage.enabled:
+        key_usage.flush()
+    if audit_trail.app is not None and audit_trail.enabled:
+        audit_trail.stop()
@@ -10,11 +10,14 @@ if os.path.exists(dotenv_path):
 
 
 import click
-import unittest
+import json
+import time
 
 from flask_migrate import Migrate, upgrade
 from server import create_app, db
 from server.model.rbca import Role
+from server.service.provision import FORMATS, read_rows, import_machine_users
+from server.utils.migration import head_revisions, pending, migration_lock
 
 app = create_app(os.getenv("FLASK_CONFIG") or "default")
 migrate = Migrate(app, db)
@@ -33,17 +36,54 @@ migrate = Migrate(app, db)
 @app.cli.command()
 def deploy():
     """发布命令"""
-    # 迁移数据库
-    upgrade()
-    # 创建角色
-    Role.insert_roles()
+    started = time.perf_counter()
+    directory = app.config["MIGRATIONS_DIRECTORY"]
+    heads = head_revisions(directory)
+    # 迁移数据库(已是最新版本时跳过; 需要迁移时只有持有迁移锁的副本执行)
+    with db.engine.connect() as connection:
+        if pending(connection, heads):
+            with migration_lock(connection, app.config["MIGRATION_LOCK_TIMEOUT"]):
+                # 等待锁期间其他副本可能已完成迁移
+                if pending(connection, heads):
+                    upgrade(directory=directory)
+    # 创建角色(与默认角色一致时不写入)
+    changed = Role.insert_roles()
+    click.echo(f"发布完成: 角色{'已更新' if changed else '无变更'}, 耗时 {time.perf_counter() - started:.3f}秒", err=True)
 
 
 @app.cli.command()
 @click.argument('test_names', nargs=-1)
-def test(test_names):
+@click.option("-j", "--processes", type=int, default=None, help="并行进程数(按测试模块分配)")
+def test(test_names, processes):
+    if processes:
+        from tests.runner import run
+        raise SystemExit(0 if run(test_names, processes) else 1)
+    import unittest
     if test_names:
         tests = unittest.TestLoader().loadTestsFromNames(test_names)
     else:
         tests = unittest.TestLoader().discover('tests')
     unittest.TextTestRunner(verbosity=2).run(tests)
+
+
+@app.cli.group()
+def users():
+    """机器用户管理"""
+
+
+@users.command("import")
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="文件格式(默认按扩展名判断)")
+@click.option("--chunk-size", type=int, default=None, help="每批插入行数")
+def import_users(file, fmt, chunk_size):
+    """批量导入机器用户, 逐行输出导入结果(NDJSON)"""
+    fmt = fmt or ("csv" if file.name.endswith(".csv") else "ndjson")
+    chunk_size = chunk_size or app.config["PROVISION_CHUNK_SIZE"]
+    created = failed = 0
+    for result in import_machine_users(read_rows(file, fmt), chunk_size=chunk_size):
+        if result["status"] == "created":
+            created += 1
+        else:
+            failed += 1
+        click.echo(json.dumps(result, ensure_ascii=False))
+    click.echo(f"导入完成: 成功 {created} 行, 失败 {failed} 行", err=True)
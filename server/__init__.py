@@ -7,16 +7,15 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_login import LoginManager
-from flask_talisman import Talisman
-from flask_cors import CORS
 from server.configs import config
+# 注册 mmap:// 限流存储
+from server.utils import ratelimit_storage  # noqa: F401
+from server.utils.quota import rate_limit_key, rate_limit_quota, unverified
 
 db = SQLAlchemy()
-limiter = Limiter(key_func=get_remote_address)
-login_manager = LoginManager()
-talisman = Talisman()
+# 签名未校验通过的请求按来源IP计数(匿名额度); 校验通过的请求在鉴权时按访问密钥计数, 见 signature_required
+limiter = Limiter(key_func=rate_limit_key, application_limits=[rate_limit_quota],
+                  application_limits_deduct_when=unverified)
 
 
 def create_app(config_name):
@@ -24,13 +23,46 @@ def create_app(config_name):
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
+    # 指标需先于限流初始化(计时钩子排在最前 & 注册限流拒绝回调)
+    from .service.metrics import metrics
+    metrics.init_app(app)
+    # 连接池需先于数据库初始化(设置连接池类型)
+    from .service.pool import db_pool
+    db_pool.init_app(app)
     db.init_app(app)
     limiter.init_app(app)
-    login_manager.init_app(app)
-    talisman.init_app(app)
-    CORS(app)
+    # 可选组件按配置启用, 未启用时不导入
+    if app.config["LOGIN_ENABLED"]:
+        from flask_login import LoginManager
+        LoginManager(app)
+    if app.config["TALISMAN_ENABLED"]:
+        from flask_talisman import Talisman
+        Talisman(app)
+    if app.config["CORS_ENABLED"]:
+        from flask_cors import CORS
+        CORS(app)
+
+    from .service.credential import credential_cache
+    credential_cache.init_app(app)
+    from .service.nonce import nonce_store
+    nonce_store.init_app(app)
+    from .service.profiler import sql_profiler
+    sql_profiler.init_app(app)
+    from .service.audit import audit_trail
+    audit_trail.init_app(app)
+    from .service.usage import key_usage
+    key_usage.init_app(app)
+    from .service.offload import blocking_pool
+    blocking_pool.init_app(app)
+    from .service.readiness import readiness
+    readiness.init_app(app)
 
     from .controller import api as api_blueprint
     app.register_blueprint(api_blueprint, url_prefix='/api')
 
+    # 最外层的 WSGI 中间件, 压缩最终的响应体(每个应用各自包装, 不共享)
+    if app.config["COMPRESS_ENABLED"]:
+        from .utils.compression import Compression
+        app.wsgi_app = app.extensions["compression"] = Compression(app.wsgi_app, app.config)
+
     return app
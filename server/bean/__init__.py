@@ -15,5 +15,7 @@ Bytes = TypeVar("Bytes", bytes, None)
 class BaseBean(object):
     """ Bean抽象类 """
 
+    __slots__ = ()
+
     def __init__(self):
         pass
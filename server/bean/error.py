@@ -9,6 +9,7 @@ __all__ = [
     "InvalidParamException",
     "NoPermissionException",
     "DiffSignatureException",
+    "ReplayRequestException",
 ]
 
 from typing import Text, List, Any
@@ -16,8 +17,13 @@ from server.bean import Integer, Float
 from server.bean.response import ApiResponse
 
 
-class UnknownException(ApiResponse, Exception):
-    """ 未定义异常 """
+class UnknownException(Exception):
+    """
+    未定义异常
+    ApiResponse 使用 __slots__, 无法与 Exception 多重继承, 故以组合方式持有响应内容(self.response):
+    全部响应字段(code / message / payload / time_elapsed_ms)及 data / encode / to_response / freeze 均转发给它;
+    isinstance(e, ApiResponse) 不再成立, 需要响应对象时使用 e.response
+    """
 
     # 不建议直接返回一个未定义的异常消息
     def __init__(self, code: Integer, message: Text, time_elapsed_ms: Float = None,
@@ -30,8 +36,36 @@ class UnknownException(ApiResponse, Exception):
             payload.update({"value": value})
         if suggestions:
             payload.update({"suggestions": suggestions})
-        # 调用父类封装
-        super().__init__(code=code, message=message, payload=payload, time_elapsed_ms=time_elapsed_ms)
+        self.response = ApiResponse(code=code, message=message, payload=payload, time_elapsed_ms=time_elapsed_ms)
+        super().__init__(code, message)
+
+    def data(self):
+        return self.response.data()
+
+    def encode(self) -> bytes:
+        return self.response.encode()
+
+    def to_response(self, status: int = 200):
+        return self.response.to_response(status=status)
+
+    def freeze(self):
+        return self.response.freeze()
+
+    def __repr__(self):
+        return repr(self.response)
+
+    def __str__(self):
+        return str(self.response)
+
+
+def _forward(name: Text) -> property:
+    """ 读写转发到响应内容的同名字段 """
+    return property(lambda self: getattr(self.response, name),
+                    lambda self, value: setattr(self.response, name, value))
+
+
+for _field in ApiResponse.__slots__:
+    setattr(UnknownException, _field, _forward(_field))
 
 
 class InvalidParamException(UnknownException):
@@ -53,3 +87,10 @@ class DiffSignatureException(UnknownException):
 
     def __init__(self, error: Text = None, value: Any = None, suggestions: List[Text] = None):
         super().__init__(code=-2002, message="签名不一致", error=error, value=value, suggestions=suggestions)
+
+
+class ReplayRequestException(UnknownException):
+    """ 重复请求 """
+
+    def __init__(self, error: Text = None, value: Any = None, suggestions: List[Text] = None):
+        super().__init__(code=-2003, message="重复请求", error=error, value=value, suggestions=suggestions)
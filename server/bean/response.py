@@ -4,84 +4,111 @@
 # timestamp:   2022-09-10 23:01:00
 # description: Response
 
-__all__ = ["ApiResponse", "Success", "Failed"]
+__all__ = ["ApiResponse", "Success", "Failed", "ConstantResponse", "stream_payload", "elapsed_ms", "dumps", "JSON_BACKEND"]
 
+import datetime
+import decimal
 import json
+import time
 
-from typing import Any, Text
+from typing import Any, Iterable, Text
+from flask import Response, g, has_request_context, stream_with_context
 from server.bean import BaseBean, Integer, Float
 
+# 响应类型
+MIMETYPE = "application/json"
 
-class ApiResponse(BaseBean):
-    """ 通用接口响应类 """
 
-    # 返回码 & 返回消息
-    __code = None
-    __message = None
-    # 返回数据
-    __payload = None
-    # 调用耗时(单位: 毫秒)
-    __time_elapsed_ms = None
+def _default(obj):
+    """ 标准库/orjson 均不支持的类型 """
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-    def __init__(self, code: Integer, message: Text, payload: Any = None, time_elapsed_ms: Float = None):
-        super().__init__()
-        self.__code = code
-        self.__message = message
-        self.__payload = payload
-        self.__time_elapsed_ms = time_elapsed_ms
 
-    @property
-    def code(self) -> Integer:
-        return self.__code
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def _dumps_json(obj: Any) -> bytes:
+    """ 序列化为UTF-8字节串(标准库) """
+    return _encoder.encode(obj).encode("utf-8")
+
 
-    @code.setter
-    def code(self, code: Integer):
-        self.__code = code
+try:
+    # 可选: 安装 orjson 后自动使用
+    import orjson
 
-    @property
-    def message(self) -> Text:
-        return self.__message
+    def _dumps_orjson(obj: Any) -> bytes:
+        """ 序列化为UTF-8字节串(orjson); 与标准库一致, 非字符串的键转为字符串 """
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
 
-    @message.setter
-    def message(self, message: Text):
-        self.__message = message
+    JSON_BACKEND, dumps = "orjson", _dumps_orjson
+except ImportError:
+    _dumps_orjson = None
+    JSON_BACKEND, dumps = "json", _dumps_json
 
-    @property
-    def payload(self) -> Any:
-        return self.__payload
 
-    @payload.setter
-    def payload(self, payload: Any):
-        self.__payload = payload
+def elapsed_ms():
+    """ 当前请求已耗时(单位: 毫秒), 起始时间由指标模块的前置钩子记录 """
+    if not has_request_context():
+        return None
+    started = g.get("request_started")
+    return None if started is None else round((time.perf_counter() - started) * 1000, 3)
 
-    @property
-    def time_elapsed_ms(self) -> Float:
-        return self.__time_elapsed_ms
 
-    @time_elapsed_ms.setter
-    def time_elapsed_ms(self, time_elapsed_ms: Float):
-        self.__time_elapsed_ms = time_elapsed_ms
+class ApiResponse(BaseBean):
+    """ 通用接口响应类 """
+
+    __slots__ = ("code", "message", "payload", "time_elapsed_ms")
+
+    def __init__(self, code: Integer, message: Text, payload: Any = None, time_elapsed_ms: Float = None):
+        super().__init__()
+        # 返回码 & 返回消息
+        self.code = code
+        self.message = message
+        # 返回数据
+        self.payload = payload
+        # 调用耗时(单位: 毫秒)
+        self.time_elapsed_ms = time_elapsed_ms
 
     def data(self):
-        resp_obj = dict()
-        resp_obj.setdefault("code", self.__code)
-        resp_obj.setdefault("message", self.__message)
-        if self.__payload:
-            resp_obj.setdefault("payload", self.__payload)
-        if self.__time_elapsed_ms:
-            resp_obj.setdefault("timeElapsedMs", self.__time_elapsed_ms)
+        resp_obj = {"code": self.code, "message": self.message}
+        if self.payload:
+            resp_obj["payload"] = self.payload
+        if self.time_elapsed_ms:
+            resp_obj["timeElapsedMs"] = self.time_elapsed_ms
         return resp_obj
 
+    def encode(self) -> bytes:
+        return dumps(self.data())
+
+    def to_response(self, status: int = 200) -> Response:
+        """ 直接输出编码后的字节串, 不经过 jsonify; 未指定耗时的自动填充 """
+        if self.time_elapsed_ms is None:
+            self.time_elapsed_ms = elapsed_ms()
+        return Response(self.encode(), status=status, mimetype=MIMETYPE)
+
+    def freeze(self) -> "ConstantResponse":
+        """ 预编码为常量响应 """
+        return ConstantResponse(self.encode())
+
     def __repr__(self):
-        return json.dumps(self.data(), ensure_ascii=False, indent=4, separators=(",", ":"), sort_keys=True)
+        return json.dumps(self.data(), ensure_ascii=False, indent=4, separators=(",", ":"), sort_keys=True,
+                          default=_default)
 
     def __str__(self):
-        return json.dumps(self.data())
+        return json.dumps(self.data(), default=_default)
 
 
 class Success(ApiResponse):
     """ 成功 """
 
+    __slots__ = ()
+
     def __init__(self, payload: Any = None, time_elapsed_ms: Float = None):
         super().__init__(200, "success", payload=payload, time_elapsed_ms=time_elapsed_ms)
 
@@ -89,5 +116,41 @@ class Success(ApiResponse):
 class Failed(ApiResponse):
     """ 失败 """
 
+    __slots__ = ()
+
     def __init__(self, payload: Any = None, time_elapsed_ms: Float = None):
         super().__init__(-1, "failed", payload=payload, time_elapsed_ms=time_elapsed_ms)
+
+
+class ConstantResponse:
+    """ 常量响应(启动时编码一次, 每次请求只构造 Response 对象) """
+
+    __slots__ = ("body",)
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def to_response(self, status: int = 200) -> Response:
+        """ 在结尾的 } 之前拼接耗时字段, 不重新编码 """
+        elapsed = elapsed_ms()
+        body = self.body if elapsed is None else self.body[:-1] + b',"timeElapsedMs":%r}' % elapsed
+        return Response(body, status=status, mimetype=MIMETYPE)
+
+
+def stream_payload(items: Iterable, code: Integer = 200, message: Text = "success", batch: int = 256) -> Response:
+    """ 列表数据以分块JSON流式输出, 每批编码一次, 不在内存中构造完整响应体 """
+    head = dumps({"code": code, "message": message})[:-1] + b',"payload":['
+
+    def generate():
+        yield head
+        buffer, separator = list(), b""
+        for item in items:
+            buffer.append(item)
+            if len(buffer) >= batch:
+                # 整批编码后去掉首尾的方括号
+                yield separator + dumps(buffer)[1:-1]
+                buffer.clear()
+                separator = b","
+        yield (separator + dumps(buffer)[1:-1] if buffer else b"") + b"]}"
+
+    return Response(stream_with_context(generate()), mimetype=MIMETYPE)
@@ -4,10 +4,40 @@
 # timestamp:   2022/9/11 13:39
 # description: Configuration
 
+import json
 import os
+import tempfile
 
 from urllib.parse import quote
 from flask_limiter.util import get_remote_address
+from sqlalchemy.pool import StaticPool
+
+
+def _flag(name, default):
+    """ 布尔型环境变量 """
+    return (os.environ.get(name) or default).lower() in ("1", "true", "yes")
+
+
+def engine_options(pool_size=5, max_overflow=10, pool_recycle=3600, pool_timeout=30, pool_pre_ping="false"):
+    """ 连接池参数(环境变量 DB_POOL_* 优先) """
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE") or pool_size),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW") or max_overflow),
+        # 小于 MySQL wait_timeout, 避免使用已被服务端断开的连接
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE") or pool_recycle),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT") or pool_timeout),
+        "pool_pre_ping": _flag("DB_POOL_PRE_PING", pool_pre_ping),
+    }
+
+
+def compress_levels(**levels):
+    """ 各编码的压缩级别(环境变量 COMPRESS_LEVELS 优先, JSON 如 {"gzip": 6}) """
+    levels.update(json.loads(os.environ.get("COMPRESS_LEVELS") or "{}"))
+    return levels
+
+
+# 项目根目录
+basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 
 
 class Config:
@@ -23,15 +53,100 @@ class Config:
     MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD") or "123456"
     MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE") or "db"
     # SQLAlchemy
-    SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{quote(MYSQL_USERNAME)}:{quote(MYSQL_PASSWORD)}" \
-                              f"@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+    # DATABASE_URI 优先(如 sqlite:////path/to/db, 用于压测等场景)
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI") or \
+        f"mysql+pymysql://{quote(MYSQL_USERNAME)}:{quote(MYSQL_PASSWORD)}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_RECORD_QUERIES = True
+    # 由 SQL 性能分析(SQL_PROFILE)替代, 不再逐条记录调用栈
+    SQLALCHEMY_RECORD_QUERIES = False
+
+    # SQL 性能分析(off / all / sample) & 抽样比例
+    SQL_PROFILE = os.environ.get("SQL_PROFILE") or "all"
+    SQL_PROFILE_SAMPLE_RATE = float(os.environ.get("SQL_PROFILE_SAMPLE_RATE") or 1.0)
+    # 慢查询阈值(单位: 毫秒) & 同一语句重复多少次视为 N+1
+    SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS") or 100)
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD") or 5)
+    # 是否在响应头 Server-Timing 中返回数据库耗时
+    SQL_SERVER_TIMING = _flag("SQL_SERVER_TIMING", "false")
+
+    # 连接池参数 & 每个进程启动后预先建立的连接数
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP") or 0)
+
+    # 凭据缓存(条目上限 & 版本轮询间隔秒数)
+    CREDENTIAL_CACHE_SIZE = int(os.environ.get("CREDENTIAL_CACHE_SIZE") or 4096)
+    CREDENTIAL_CACHE_POLL_INTERVAL = float(os.environ.get("CREDENTIAL_CACHE_POLL_INTERVAL") or 2)
+
+    # 签名有效期(单位: 分钟)
+    SIGNATURE_VALID_PERIOD_MIN = int(os.environ.get("SIGNATURE_VALID_PERIOD_MIN") or 15)
+    # 防重放随机数存储(memory:// 或 sqlite:////path/to/nonce.db)
+    NONCE_STORE_URI = os.environ.get("NONCE_STORE_URI") or "memory://"
+    # 签名校验(请求体缓冲的内存阈值 & 分块大小, 单位: 字节)
+    SIGNATURE_SPOOL_MAX_MEMORY = int(os.environ.get("SIGNATURE_SPOOL_MAX_MEMORY") or 1 << 20)
+    SIGNATURE_STREAM_CHUNK_SIZE = int(os.environ.get("SIGNATURE_STREAM_CHUNK_SIZE") or 1 << 16)
+
+    # 批量导入每批行数
+    PROVISION_CHUNK_SIZE = int(os.environ.get("PROVISION_CHUNK_SIZE") or 1000)
+
+    # 就绪检查间隔(单位: 秒) & 迁移脚本目录
+    READINESS_INTERVAL = float(os.environ.get("READINESS_INTERVAL") or 5)
+    MIGRATIONS_DIRECTORY = os.environ.get("MIGRATIONS_DIRECTORY") or os.path.join(basedir, "migrations")
+    # 发布时等待其他副本完成迁移的最长时间(单位: 秒)
+    MIGRATION_LOCK_TIMEOUT = int(os.environ.get("MIGRATION_LOCK_TIMEOUT") or 120)
+
+    # 指标(多进程部署时设置为各 worker 共享的目录) & 快照落盘间隔(单位: 秒)
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL") or 5)
+
+    # 调用审计(队列容量 / 每批写入条数 / 写入间隔秒数)
+    AUDIT_ENABLED = _flag("AUDIT_ENABLED", "true")
+    AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE") or 10000)
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE") or 500)
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL") or 1)
+    # 积压超过队列容量的该比例后, 成功的调用按 AUDIT_SAMPLE_RATE 抽样记录(失败的调用始终记录)
+    AUDIT_SAMPLE_WATERMARK = float(os.environ.get("AUDIT_SAMPLE_WATERMARK") or 0.5)
+    AUDIT_SAMPLE_RATE = float(os.environ.get("AUDIT_SAMPLE_RATE") or 0.1)
+
+    # 访问密钥使用情况(last_used_at / request_count)的写入间隔秒数
+    KEY_USAGE_ENABLED = _flag("KEY_USAGE_ENABLED", "true")
+    KEY_USAGE_FLUSH_INTERVAL = float(os.environ.get("KEY_USAGE_FLUSH_INTERVAL") or 10)
+
+    # 响应压缩(按 Accept-Encoding 协商, 编码按优先顺序; br / zstd 需安装 brotli / zstandard)
+    COMPRESS_ENABLED = _flag("COMPRESS_ENABLED", "true")
+    COMPRESS_ENCODINGS = (os.environ.get("COMPRESS_ENCODINGS") or "br,zstd,gzip,deflate").split(",")
+    COMPRESS_LEVELS = compress_levels(br=4, zstd=3, gzip=6, deflate=6)
+    # 小于该长度(单位: 字节)的响应不压缩: 压缩后节省的字节不足以抵消压缩的CPU开销
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE") or 500)
+    # 只压缩文本类型; 图片、压缩包等已压缩的类型不在其中
+    COMPRESS_MIMETYPES = ["text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+                          "application/javascript", "application/json", "application/x-ndjson",
+                          "application/xml", "image/svg+xml"]
+
+    # ASGI 模式下执行阻塞调用的线程数(默认等于数据库连接池容量)
+    OFFLOAD_THREADS = int(os.environ.get("OFFLOAD_THREADS") or 0)
+
+    # 可选组件: 登录(当前没有接口使用) / HTTPS 与安全响应头 / 跨域
+    LOGIN_ENABLED = _flag("LOGIN_ENABLED", "false")
+    TALISMAN_ENABLED = _flag("TALISMAN_ENABLED", "true")
+    CORS_ENABLED = _flag("CORS_ENABLED", "true")
 
     # Limiter
-    RATELIMIT_DEFAULT = "10 per day;3 per hour"
-    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_ENABLED = _flag("RATELIMIT_ENABLED", "true")
+    # 各接口的默认限流(可选); 全局额度见 RATELIMIT_*_QUOTA
+    RATELIMIT_DEFAULT = os.environ.get("RATELIMIT_DEFAULT")
+    # memory:// 各进程独立计数; mmap:///path/to/file 同一主机的全部 worker 共享计数
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI") or "memory://"
+    RATELIMIT_STRATEGY = os.environ.get("RATELIMIT_STRATEGY") or "sliding-window-counter"
     RATELIMIT_HEADERS_ENABLED = True
+    # 全局额度: 按角色(JSON, 如 {"Follower": "300 per minute"}) / 未配置角色的密钥 / 匿名(按IP)
+    RATELIMIT_ROLE_QUOTAS = json.loads(os.environ.get("RATELIMIT_ROLE_QUOTAS") or "{}") or {
+        "Follower": "600 per minute",
+        "Executor": "1200 per minute",
+        "Owner": "3000 per minute",
+        "Administrator": "6000 per minute",
+    }
+    RATELIMIT_KEY_QUOTA = os.environ.get("RATELIMIT_KEY_QUOTA") or "600 per minute"
+    RATELIMIT_ANONYMOUS_QUOTA = os.environ.get("RATELIMIT_ANONYMOUS_QUOTA") or "60 per minute"
 
     @staticmethod
     def init_app(app):
@@ -44,16 +159,43 @@ class DevelopmentConfig(Config):
     DEBUG = True
     # 回显SQL语句
     SQLALCHEMY_ECHO = True
+    # 返回数据库耗时
+    SQL_SERVER_TIMING = True
+    # 压缩取最快的级别
+    COMPRESS_LEVELS = compress_levels(br=1, zstd=1, gzip=1, deflate=1)
 
 
 class TestingConfig(Config):
     """ 测试环境 """
     # 测试标识
     TESTING = True
+    # 内存 SQLite, 全部连接共享同一个数据库(StaticPool), 不依赖外部服务
+    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URI") or "sqlite://"
+    SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    # 测试客户端使用 HTTP
+    TALISMAN_ENABLED = _flag("TALISMAN_ENABLED", "false")
+    # 用例按需单独开启
+    RATELIMIT_ENABLED = _flag("RATELIMIT_ENABLED", "false")
+    SQL_PROFILE = os.environ.get("SQL_PROFILE") or "off"
+    # 后台就绪检查不与用例争用同一个数据库连接
+    READINESS_INTERVAL = float(os.environ.get("READINESS_INTERVAL") or 3600)
+    # 审计记录与密钥使用情况由用例手动写入(flush)
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL") or 3600)
+    KEY_USAGE_FLUSH_INTERVAL = float(os.environ.get("KEY_USAGE_FLUSH_INTERVAL") or 3600)
 
 
 class ProductionConfig(Config):
     """ 生产环境 """
+    # SQL 性能分析默认按 1% 抽样
+    SQL_PROFILE = os.environ.get("SQL_PROFILE") or "sample"
+    SQL_PROFILE_SAMPLE_RATE = float(os.environ.get("SQL_PROFILE_SAMPLE_RATE") or 0.01)
+    # 连接池: 检出前探活, 30分钟回收, 每个 worker 预热2个连接
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=10, max_overflow=20, pool_recycle=1800,
+                                               pool_timeout=10, pool_pre_ping="true")
+    DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP") or 2)
+    # 限流计数在 worker 间共享
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI") or \
+        f"mmap://{os.path.join(tempfile.gettempdir(), 'server-ratelimit.mmap')}"
 
 
 class DockerConfig(ProductionConfig):
@@ -71,6 +213,10 @@ class DockerConfig(ProductionConfig):
 
 class UnixConfig(ProductionConfig):
     """ Unix """
+    # 与其他服务共用主机及数据库, 连接池取较小值
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=5, max_overflow=10, pool_recycle=1800,
+                                               pool_timeout=10, pool_pre_ping="true")
+
     @classmethod
     def init_app(cls, app):
         ProductionConfig.init_app(app)
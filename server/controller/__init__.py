@@ -4,15 +4,17 @@
 # timestamp:   2022-09-11 10:53:00
 # description: Controller
 
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from server.bean.error import UnknownException
+from server.service.audit import audit_trail
 
 api = Blueprint("api", __name__)
 
-from server.controller import healthz
+from server.controller import healthz, machine_user, metrics
 
 
 @api.errorhandler(UnknownException)
 def base_custom_exception(e):
     """捕获所有自定义的异常情况"""
-    return jsonify(e.data())
+    audit_trail.record_error(e.code)
+    return e.to_response()
@@ -4,20 +4,35 @@
 # timestamp:   2022/9/11 00:17
 # description: 健康检查
 
-from flask import jsonify
+from server import limiter
 from server.controller import api
 from server.bean.response import Success
+from server.service.readiness import readiness
+
+# 常量响应只编码一次
+SUCCESS = Success().freeze()
 
 
 @api.route("/healthz/readness", methods=["GET", "POST"])
+@limiter.exempt
 def readness():
-    """ 就绪探针 """
-    # (可选) 填充您的就绪逻辑
-    return jsonify(Success().data())
+    """ 就绪探针(返回后台检查的缓存结果, 未就绪时返回 503) """
+    return readiness.status()
 
 
 @api.route("/healthz/liveness", methods=["GET", "POST"])
+@limiter.exempt
 def liveness():
     """ 存活探针 """
     # (可选) 填充您的探活逻辑
-    return jsonify(Success().data())
+    return SUCCESS.to_response()
+
+
+async def readness_async():
+    """ 就绪探针(协程版本, 供 ASGI 模式在事件循环中直接应答) """
+    return await readiness.status_async()
+
+
+async def liveness_async():
+    """ 存活探针(协程版本) """
+    return SUCCESS.to_response()
@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 16:30:00
+# description: 机器用户
+
+import io
+
+from flask import request, current_app, Response, stream_with_context
+from server.controller import api
+from server.bean.error import InvalidParamException
+from server.bean.response import Success, Failed, dumps
+from server.service.machine_user import LIST_LIMIT_MAX, list_machine_users, list_version, get_machine_user, \
+    machine_user_version, create_machine_user, update_machine_user, delete_machine_user, role_id_of, list_roles, \
+    roles_version
+from server.service.provision import read_rows, import_machine_users
+from server.utils.authentication import signature_required, admin_required
+from server.utils.conditional import conditional
+
+
+@api.route("/machine-users/bulk", methods=["POST"])
+@signature_required
+@admin_required
+def bulk_import_machine_users():
+    """ 批量导入机器用户(NDJSON/CSV), 逐行流式返回导入结果 """
+    fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+    chunk_size = request.args.get("chunkSize", type=int) or current_app.config["PROVISION_CHUNK_SIZE"]
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    results = import_machine_users(read_rows(stream, fmt), chunk_size=chunk_size)
+    lines = (dumps(result) + b"\n" for result in results)
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
+@api.route("/machine-users", methods=["GET"])
+@signature_required
+@admin_required
+def list_machine_users_api():
+    """
+    机器用户列表(游标分页, 支持条件请求)
+    参数: cursor(上一页返回的 nextCursor) / limit / owner / role / isEnabled
+    """
+    params = dict(cursor=_int_arg("cursor", 0, None),
+                  limit=_int_arg("limit", 1, LIST_LIMIT_MAX) or 100,
+                  owner=request.args.get("owner"),
+                  role_id=role_id_of(request.args.get("role")),
+                  is_enabled=_bool_arg("isEnabled"))
+    version = list_version(**params)
+
+    def build():
+        items, next_cursor = list_machine_users(**params)
+        return Success(payload={"items": items, "nextCursor": next_cursor}).to_response()
+
+    # 同一页窗口的不同查询参数对应不同的表示; 删除行不改变最后修改时间, 集合只按 ETag 验证
+    return conditional(("machine-users", *params.values(), *version), None, build)
+
+
+@api.route("/machine-users", methods=["POST"])
+@signature_required
+@admin_required
+def create_machine_user_api():
+    """ 新增机器用户(返回结果包含私钥, 仅此一次) """
+    return Success(payload=create_machine_user(_json_body())).to_response()
+
+
+@api.route("/machine-users/<int:machine_user_id>", methods=["GET"])
+@signature_required
+@admin_required
+def get_machine_user_api(machine_user_id):
+    """ 查询机器用户(支持条件请求) """
+    version = machine_user_version(machine_user_id)
+    if version is None:
+        return _not_found(machine_user_id)
+
+    def build():
+        user = get_machine_user(machine_user_id)
+        return _not_found(machine_user_id) if user is None else Success(payload=user).to_response()
+
+    return conditional(("machine-user", *version), _latest(*version[1:]), build)
+
+
+@api.route("/machine-users/<int:machine_user_id>", methods=["PATCH"])
+@signature_required
+@admin_required
+def update_machine_user_api(machine_user_id):
+    """ 修改机器用户(只修改提交的字段) """
+    user = update_machine_user(machine_user_id, _json_body())
+    return _not_found(machine_user_id) if user is None else Success(payload=user).to_response()
+
+
+@api.route("/machine-users/<int:machine_user_id>", methods=["DELETE"])
+@signature_required
+@admin_required
+def delete_machine_user_api(machine_user_id):
+    """ 删除机器用户 """
+    if not delete_machine_user(machine_user_id):
+        return _not_found(machine_user_id)
+    return Success().to_response()
+
+
+@api.route("/roles", methods=["GET"])
+@signature_required
+@admin_required
+def list_roles_api():
+    """ 角色列表(支持条件请求) """
+    version = roles_version()
+    return conditional(("roles", *version), None, lambda: Success(payload=list_roles()).to_response())
+
+
+def _latest(*times):
+    """ 最后修改时间(忽略空值) """
+    return max((t for t in times if t is not None), default=None)
+
+
+def _not_found(machine_user_id):
+    return Failed(payload={"error": "机器用户不存在", "value": machine_user_id}).to_response()
+
+
+def _json_body():
+    obj = request.get_json(silent=True)
+    if not isinstance(obj, dict):
+        raise InvalidParamException(error="请求体应为JSON对象", suggestions=["Content-Type: application/json"])
+    return obj
+
+
+def _int_arg(name, minimum, maximum):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < minimum or (maximum is not None and number > maximum):
+        raise InvalidParamException(error=f"参数 {name} 不合法", value=value,
+                                    suggestions=[f"整数, 取值范围 {minimum}~{maximum or ''}"])
+    return number
+
+
+def _bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() not in ("true", "false", "1", "0"):
+        raise InvalidParamException(error=f"参数 {name} 不合法", value=value, suggestions=["true 或 false"])
+    return value.lower() in ("true", "1")
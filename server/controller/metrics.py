@@ -0,0 +1,17 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 19:50:00
+# description: 运行指标
+
+from flask import Response
+from server import limiter
+from server.controller import api
+from server.service.metrics import metrics, CONTENT_TYPE
+
+
+@api.route("/metrics", methods=["GET"])
+@limiter.exempt
+def prometheus_metrics():
+    """ Prometheus 抓取 """
+    return Response(metrics.render(), mimetype=CONTENT_TYPE)
@@ -3,3 +3,8 @@
 # email:       liukunup@outlook.com
 # timestamp:   2022-09-11 19:43:00
 # description: Model
+
+from sqlalchemy import BigInteger, Integer
+
+# 主键类型(SQLite 仅 INTEGER PRIMARY KEY 支持自增, 其他数据库仍为 BIGINT)
+BigIntegerKey = BigInteger().with_variant(Integer(), "sqlite")
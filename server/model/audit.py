@@ -0,0 +1,36 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 02:00:00
+# description: 调用审计
+
+from datetime import datetime
+from server import db
+from server.model import BigIntegerKey
+
+
+class AuditLog(db.Model):
+    """ 调用审计 (机器用户调用了哪个接口以及结果; 由后台线程批量写入) """
+
+    # 表名称
+    __tablename__ = "audit_log"
+    # 按机器用户查询调用记录
+    __table_args__ = (db.Index("ix_audit_log_machine_user_id_create_time", "machine_user_id", "create_time"),)
+
+    # 记录编号
+    id = db.Column(BigIntegerKey, comment="记录编号", primary_key=True)
+    # 调用方(不设外键: 机器用户删除后审计记录仍保留)
+    machine_user_id = db.Column(db.BigInteger, comment="机器用户编号(密钥不存在时为空)")
+    access_key = db.Column(db.String(32), comment="访问密钥")
+    remote_addr = db.Column(db.String(45), comment="来源IP")
+    # 调用内容及结果
+    endpoint = db.Column(db.String(64), comment="接口")
+    method = db.Column(db.String(8), comment="请求方法")
+    status = db.Column(db.SmallInteger, comment="HTTP状态码")
+    code = db.Column(db.Integer, comment="业务错误码(成功时为空)")
+    latency_ms = db.Column(db.Float, comment="耗时(单位: 毫秒)")
+    # 记录时间
+    create_time = db.Column(db.DateTime(), comment="调用时间", default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return "<AuditLog %r %r %r>" % (self.access_key, self.endpoint, self.status)
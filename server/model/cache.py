@@ -0,0 +1,40 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 10:12:00
+# description: 缓存版本 (用于跨进程缓存失效)
+
+from datetime import datetime
+from sqlalchemy import select, update, insert
+from server import db
+
+
+class CacheVersion(db.Model):
+    """ 缓存版本 """
+
+    # 表名称
+    __tablename__ = "cache_version"
+
+    # 业务字段
+    name = db.Column(db.String(32), comment="缓存名称", primary_key=True)
+    version = db.Column(db.BigInteger, comment="版本号", nullable=False, default=0)
+    # 记录时间
+    update_time = db.Column(db.DateTime(), comment="更新时间", default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def bump(connection, name):
+        """ 版本号加一 (与业务变更处于同一事务) """
+        table = CacheVersion.__table__
+        result = connection.execute(update(table).where(table.c.name == name)
+                                    .values(version=table.c.version + 1, update_time=datetime.utcnow()))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(name=name, version=1, update_time=datetime.utcnow()))
+
+    @staticmethod
+    def current(connection, name):
+        """ 查询当前版本号 (主键查询, 开销极低) """
+        table = CacheVersion.__table__
+        return connection.execute(select(table.c.version).where(table.c.name == name)).scalar() or 0
+
+    def __repr__(self):
+        return "<CacheVersion %r=%r>" % (self.name, self.version)
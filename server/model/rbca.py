@@ -4,12 +4,15 @@
 # timestamp:   2022/9/11 16:44
 # description: Open API (使用RBCA权限控制系统)
 
-import random
-import string
-
 from datetime import datetime
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from server import db
 from server.bean.error import InvalidParamException
+from server.model import BigIntegerKey
+from server.model.cache import CacheVersion
+from server.utils.keygen import generate_keys
+from server.utils.quota import valid_quota
 
 
 class Permission:
@@ -29,7 +32,7 @@ class Role(db.Model):
     __tablename__ = "role"
 
     # 记录编号
-    id = db.Column(db.BigInteger, comment="记录编号", primary_key=True)
+    id = db.Column(BigIntegerKey, comment="记录编号", primary_key=True)
     # 业务字段
     name = db.Column(db.String(16), comment="角色名", unique=True)
     is_default = db.Column(db.Boolean, comment="是否默认角色", default=False)
@@ -44,25 +47,38 @@ class Role(db.Model):
         if self.permissions is None:
             self.permissions = 0
 
+    # 默认角色及其权限
+    ROLES = {
+        "Follower": Permission.READ,
+        "Executor": Permission.READ | Permission.WRITE,
+        "Owner": Permission.READ | Permission.WRITE | Permission.UPDATE | Permission.DELETE,
+        "Administrator": Permission.READ | Permission.WRITE | Permission.UPDATE | Permission.DELETE | Permission.ADMIN,
+    }
+    DEFAULT_ROLE = "Follower"
+
     @staticmethod
-    def insert_roles():
-        roles = {
-            "Follower": [Permission.READ],
-            "Executor": [Permission.READ, Permission.WRITE],
-            "Owner": [Permission.READ, Permission.WRITE, Permission.UPDATE, Permission.DELETE],
-            "Administrator": [Permission.READ, Permission.WRITE, Permission.UPDATE, Permission.DELETE, Permission.ADMIN]
-        }
-        default_role = "Follower"
-        for r in roles:
-            role = Role.query.filter_by(name=r).first()
-            if role is None:
-                role = Role(name=r)
-            role.reset_permissions()
-            for perm in roles[r]:
-                role.add_permission(perm)
-            role.default = (role.name == default_role)
-            db.session.add(role)
-        db.session.commit()
+    def insert_roles() -> bool:
+        """
+        写入默认角色, 返回是否有变更
+        1.先整表查询一次, 与默认角色一致时不写入(多个副本同时启动时只读)
+        2.只写入有差异的角色(只有这些角色的更新时间变化): 一条 upsert 语句, 并在同一事务内递增凭据缓存版本
+        """
+        from server.service.credential import CREDENTIAL_VERSION, credential_cache
+        table = Role.__table__
+        with db.engine.begin() as connection:
+            current = {row.name: (row.permissions, bool(row.is_default))
+                       for row in connection.execute(select(table.c.name, table.c.permissions, table.c.is_default))}
+            now = datetime.utcnow()
+            rows = [{"name": name, "permissions": permissions, "is_default": name == Role.DEFAULT_ROLE,
+                     "create_time": now, "update_time": now}
+                    for name, permissions in Role.ROLES.items()
+                    if current.get(name) != (permissions, name == Role.DEFAULT_ROLE)]
+            if not rows:
+                return False
+            _upsert(connection, table, rows, "name", ("permissions", "is_default", "update_time"))
+            CacheVersion.bump(connection, CREDENTIAL_VERSION)
+        credential_cache.clear()
+        return True
 
     def add_permission(self, perm):
         if not self.has_permission(perm):
@@ -87,9 +103,15 @@ class MachineUser(db.Model):
 
     # 表名称
     __tablename__ = "machine_user"
+    # 管理接口的筛选条件 + 按 id 游标分页
+    __table_args__ = (
+        db.Index("ix_machine_user_owner_id", "owner", "id"),
+        db.Index("ix_machine_user_role_id_id", "role_id", "id"),
+        db.Index("ix_machine_user_is_enabled_id", "is_enabled", "id"),
+    )
 
     # 记录编号
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigIntegerKey, primary_key=True)
     # 业务字段
     name = db.Column(db.String(128), comment="名称", nullable=False, unique=True)
     desc = db.Column(db.String(256), comment="描述")
@@ -98,6 +120,10 @@ class MachineUser(db.Model):
     secret_key = db.Column(db.String(32), comment="私钥", nullable=False)
     is_enabled = db.Column(db.Boolean, comment="是否已启用", nullable=False, default=True)
     role_id = db.Column(db.BigInteger, db.ForeignKey("role.id"))
+    rate_limit = db.Column(db.String(64), comment="限流额度(覆盖角色额度, 如 100 per minute)")
+    # 使用情况(由各进程定期批量累加, 不更新 update_time)
+    last_used_at = db.Column(db.DateTime(), comment="最近一次签名通过的时间")
+    request_count = db.Column(db.BigInteger, comment="签名通过的请求数", nullable=False, default=0, server_default="0")
     # 记录时间
     create_time = db.Column(db.DateTime(), comment="创建时间", default=datetime.utcnow)
     update_time = db.Column(db.DateTime(), comment="更新时间", default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -105,6 +131,19 @@ class MachineUser(db.Model):
     def __init__(self, **kwargs):
         super(MachineUser, self).__init__(**kwargs)
         # 参数检查
+        self.validate()
+        # 默认角色为Follower(查角色权限表, 不逐个查询数据库)
+        if self.role is None and self.role_id is None:
+            from server.service.role import role_table
+            self.role_id = role_table.default_id()
+        # 自动生成32位AK+SK
+        if self.access_key is None:
+            self.access_key, = generate_keys(1)
+        if self.secret_key is None:
+            self.secret_key, = generate_keys(1)
+
+    def validate(self):
+        """ 参数检查(新增与修改共用) """
         if not self.name or len(self.name) > 128:
             raise InvalidParamException(error="提交信息中 name 参数不合法!", value=self.name,
                                         suggestions=["字段要求: 最长128字符的非空字符串"])
@@ -114,17 +153,14 @@ class MachineUser(db.Model):
         if not self.owner or len(self.owner) > 64:
             raise InvalidParamException(error="提交信息中 owner 参数不合法!", value=self.owner,
                                         suggestions=["字段要求: 最长64字符的非空字符串"])
-        # 默认角色为Follower
-        if not self.role:
-            self.role = Role.query.filter_by(is_default=True).first()
-        # 自动生成32位AK+SK
-        if self.access_key is None:
-            self.access_key = "".join(random.sample(string.digits + string.ascii_letters, 32))
-        if self.secret_key is None:
-            self.secret_key = "".join(random.sample(string.digits + string.ascii_letters, 32))
+        if self.rate_limit is not None and not valid_quota(self.rate_limit):
+            raise InvalidParamException(error="提交信息中 rateLimit 参数不合法!", value=self.rate_limit,
+                                        suggestions=["字段要求: 最长64字符的限流规则, 如 100 per minute, 可置空"])
 
     def can(self, perm):
-        return self.role is not None and self.role.has_permission(perm)
+        # 查角色权限表, 不触发 role 关系的延迟加载
+        from server.service.role import role_table
+        return role_table.permissions(self.role_id) & perm == perm
 
     @staticmethod
     def from_json(obj):
@@ -132,3 +168,25 @@ class MachineUser(db.Model):
 
     def __repr__(self):
         return "<MachineUser %r>" % self.name
+
+
+def _upsert(connection, table, rows, key, columns):
+    """
+    批量插入, 唯一键冲突时更新指定列
+    MySQL: ON DUPLICATE KEY UPDATE; SQLite/PostgreSQL: ON CONFLICT; 其他数据库逐行查询后插入或更新(同一事务内)
+    """
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(table).values(rows)
+        connection.execute(statement.on_duplicate_key_update({c: statement.inserted[c] for c in columns}))
+    elif dialect in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(table).values(rows)
+        connection.execute(statement.on_conflict_do_update(index_elements=[key],
+                                                           set_={c: statement.excluded[c] for c in columns}))
+    else:
+        column = table.c[key]
+        for row in rows:
+            if connection.execute(select(column).where(column == row[key])).first() is None:
+                connection.execute(insert(table).values(row))
+            else:
+                connection.execute(update(table).where(column == row[key]).values({c: row[c] for c in columns}))
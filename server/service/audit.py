@@ -0,0 +1,206 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 02:00:00
+# description: 调用审计 (异步批量写入)
+
+__all__ = ["AuditTrail", "audit_trail"]
+
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+
+from collections import deque
+from datetime import datetime
+from flask import g, request
+from sqlalchemy import insert
+from server import db
+from server.model.audit import AuditLog
+from server.service.metrics import metrics, Sample, COUNTER_HELP, UNMATCHED
+
+logger = logging.getLogger(__name__)
+
+COUNTER_HELP.update({
+    "audit_written_total": "Audit events written to the audit_log table",
+    "audit_dropped_total": "Audit events dropped (queue full / sampled out under backlog / write failed)",
+    "audit_batches_total": "Audit log batch inserts",
+    "audit_write_seconds_total": "Time spent writing audit log batches",
+})
+
+
+class AuditTrail:
+    """
+    调用审计
+    1.鉴权装饰器标记需要审计的请求(mark), 错误处理记录业务错误码(record_error),
+      请求结束时生成一条审计事件放入有界队列, 请求线程不访问数据库
+    2.后台线程在积压达到 AUDIT_BATCH_SIZE 或每隔 AUDIT_FLUSH_INTERVAL 秒取出事件, 按批批量插入 audit_log
+    3.数据库跟不上时: 积压超过 AUDIT_SAMPLE_WATERMARK(占队列容量的比例)后成功的调用按 AUDIT_SAMPLE_RATE 抽样,
+      失败的调用始终入队; 队列已满时丢弃; 写入失败的批次不重试; 均计入 audit_dropped_total
+    4.写入线程按进程启动(fork 后在子进程中重新启动), 进程退出前写入剩余事件
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.queue_size = 10000
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.watermark = 5000
+        self.sample_rate = 0.1
+        self._events = deque()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config["AUDIT_ENABLED"]
+        self.queue_size = app.config["AUDIT_QUEUE_SIZE"]
+        self.batch_size = app.config["AUDIT_BATCH_SIZE"]
+        self.flush_interval = app.config["AUDIT_FLUSH_INTERVAL"]
+        self.watermark = int(self.queue_size * app.config["AUDIT_SAMPLE_WATERMARK"])
+        self.sample_rate = app.config["AUDIT_SAMPLE_RATE"]
+        app.extensions["audit_trail"] = self
+        if not self.enabled:
+            return
+        app.after_request(self._after_request)
+        metrics.register(self.collect)
+        atexit.register(self.stop)
+
+    @staticmethod
+    def mark():
+        """ 标记当前请求需要审计(鉴权装饰器调用) """
+        g.audit = True
+
+    @staticmethod
+    def record_error(code):
+        """ 记录当前请求的业务错误码(错误处理调用) """
+        g.audit_code = code
+
+    def record(self, event):
+        """ 事件入队(不阻塞); 返回是否入队 """
+        depth = len(self._events)
+        if depth >= self.queue_size:
+            metrics.inc("audit_dropped_total", (("reason", "full"),))
+            return False
+        if depth >= self.watermark and event["code"] is None and random.random() >= self.sample_rate:
+            metrics.inc("audit_dropped_total", (("reason", "sampled"),))
+            return False
+        self._ensure_started()
+        self._events.append(event)
+        if depth + 1 >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """ 按批写入调用时已在队列中的事件, 返回写入条数(写入期间新入队的事件留待下一批, 不逐条提交) """
+        written = 0
+        with self._flush_lock:
+            pending = len(self._events)
+            while pending > 0:
+                batch = self._take(min(pending, self.batch_size))
+                pending -= len(batch)
+                if not batch:
+                    break
+                started = time.perf_counter()
+                try:
+                    with self.app.app_context(), db.engine.begin() as connection:
+                        connection.execute(insert(AuditLog.__table__), batch)
+                except Exception:
+                    logger.exception("审计记录写入失败, 丢弃 %d 条", len(batch))
+                    metrics.inc("audit_dropped_total", (("reason", "error"),), len(batch))
+                    continue
+                metrics.inc("audit_batches_total")
+                metrics.inc("audit_written_total", (), len(batch))
+                metrics.inc("audit_write_seconds_total", (), time.perf_counter() - started)
+                written += len(batch)
+        return written
+
+    def clear(self):
+        """ 丢弃队列中尚未写入的事件 """
+        self._events.clear()
+
+    def stop(self, timeout: float = 5):
+        """ 停止写入线程并写入剩余事件 """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._pid = None
+        if self._events:
+            self.flush()
+
+    def collect(self):
+        yield Sample("audit_queue_depth", "gauge", "Audit events waiting to be written", (), len(self._events))
+        yield Sample("audit_queue_capacity", "gauge", "Audit event queue capacity", (), self.queue_size)
+
+    def _take(self, count):
+        events, batch = self._events, list()
+        try:
+            while len(batch) < count:
+                batch.append(events.popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="audit", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        stopped, wakeup = self._stopped, self._wakeup
+        while not stopped.is_set():
+            wakeup.wait(self.flush_interval)
+            wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("审计记录写入线程执行失败")
+
+    def _after_request(self, response):
+        if not g.pop("audit", False):
+            return response
+        started = g.get("request_started")
+        access_key = request.headers.get("X-Access-Key")
+        self.record({
+            "machine_user_id": self._machine_user_id(access_key),
+            "access_key": access_key[:32] if access_key else None,
+            "remote_addr": request.remote_addr,
+            "endpoint": (request.endpoint or UNMATCHED)[:64],
+            "method": request.method,
+            "status": response.status_code,
+            "code": g.pop("audit_code", None),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3) if started is not None else None,
+            "create_time": datetime.utcnow(),
+        })
+        return response
+
+    @staticmethod
+    def _machine_user_id(access_key):
+        """ 优先使用鉴权时查询到的凭据; 否则查询凭据缓存(鉴权时已查询过, 密钥不存在时同样缓存) """
+        auth = g.get("auth")
+        if auth is not None and auth.headers is request.headers and auth.machine_user_id is not None:
+            return auth.machine_user_id
+        if not access_key or len(access_key) != 32:
+            return None
+        from server.service.credential import credential_cache
+        credential = credential_cache.get(access_key)
+        return credential.id if credential is not None else None
+
+
+audit_trail = AuditTrail()
@@ -0,0 +1,185 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 10:20:00
+# description: 凭据缓存 (鉴权热路径不访问数据库)
+
+__all__ = ["Credential", "CredentialCache", "credential_cache", "CREDENTIAL_VERSION"]
+
+import threading
+import time
+
+from collections import OrderedDict
+from itertools import chain
+from typing import NamedTuple, Optional, Text
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from server import db
+from server.model.cache import CacheVersion
+from server.model.rbca import Role, MachineUser
+from server.service.role import role_table
+from server.utils.quota import valid_quota
+from server.utils.signature import new_signer
+
+# 凭据缓存对应的版本名称
+CREDENTIAL_VERSION = "credential"
+
+# 未命中数据库时缓存的占位符
+_MISSING = object()
+
+
+class Credential(NamedTuple):
+    """ 凭据记录(不可变) """
+
+    id: int
+    access_key: Text
+    secret_key: Text
+    role_id: Optional[int]
+    # 单独配置的限流额度(未配置时使用角色额度)
+    rate_limit: Optional[Text]
+    # 由角色权限表解析得到的权限值
+    permissions: int
+    is_enabled: bool
+    # 预计算的HMAC状态(签名时 copy() 复用)
+    signer: object
+
+    def can(self, perm):
+        return self.permissions & perm == perm
+
+
+class CredentialCache:
+    """
+    凭据缓存
+    1.进程内LRU缓存, 只保存不可变的凭据记录, 不持有ORM对象
+    2.各进程按固定间隔轮询 cache_version 表, 版本变化时整体失效
+    3.本进程内提交的变更在事务提交后立即失效(本地通知)
+    4.权限值由角色权限表解析, 失效时角色权限表一并重新载入
+    """
+
+    def __init__(self, app=None):
+        self.maxsize = 4096
+        self.poll_interval = 2.0
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_poll = 0.0
+        # 失效代数: 每次失效加一, 查询期间发生失效时不写入查询结果
+        self._generation = 0
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maxsize = app.config["CREDENTIAL_CACHE_SIZE"]
+        self.poll_interval = app.config["CREDENTIAL_CACHE_POLL_INTERVAL"]
+        app.extensions["credential_cache"] = self
+        self.clear()
+
+    def get(self, access_key: Text) -> Optional[Credential]:
+        """ 根据AccessKey查询凭据 """
+        self.poll()
+        with self._lock:
+            record = self._records.get(access_key)
+            if record is not None:
+                self._records.move_to_end(access_key)
+                self.hits += 1
+                return None if record is _MISSING else record
+            self.misses += 1
+            generation = self._generation
+        record = self._load(access_key)
+        with self._lock:
+            if generation != self._generation:
+                # 查询期间缓存已失效, 查询结果可能已过期
+                return record
+            self._records[access_key] = _MISSING if record is None else record
+            self._records.move_to_end(access_key)
+            while len(self._records) > self.maxsize:
+                self._records.popitem(last=False)
+                self.evictions += 1
+        return record
+
+    def poll(self, force=False):
+        """ 轮询版本号, 版本变化时失效全部缓存 """
+        now = time.monotonic()
+        if not force and now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        with db.engine.connect() as connection:
+            version = CacheVersion.current(connection, CREDENTIAL_VERSION)
+        if version != self._version:
+            if self._version is not None:
+                self.clear()
+            self._version = version
+
+    def invalidate(self, access_key: Text = None):
+        """ 失效指定凭据(未指定时失效全部) """
+        if access_key is None:
+            self.clear()
+            return
+        with self._lock:
+            self._generation += 1
+            if self._records.pop(access_key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            if self._records:
+                self.invalidations += 1
+            self._records.clear()
+        role_table.invalidate()
+
+    def stats(self):
+        """ 缓存统计 """
+        return {
+            "size": len(self._records),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    @staticmethod
+    def _load(access_key: Text) -> Optional[Credential]:
+        """ 按列投影查询, 避免构造ORM对象; 权限值查角色权限表, 不关联 role 表 """
+        statement = select(MachineUser.id, MachineUser.access_key, MachineUser.secret_key,
+                           MachineUser.role_id, MachineUser.rate_limit, MachineUser.is_enabled) \
+            .where(MachineUser.access_key == access_key)
+        with db.engine.connect() as connection:
+            row = connection.execute(statement).first()
+        if row is None:
+            return None
+        # 非法的限流规则(如直接修改数据库)忽略, 使用角色额度
+        rate_limit = row.rate_limit if row.rate_limit and valid_quota(row.rate_limit) else None
+        return Credential(row.id, row.access_key, row.secret_key, row.role_id, rate_limit,
+                          role_table.permissions(row.role_id), bool(row.is_enabled), new_signer(row.secret_key))
+
+
+credential_cache = CredentialCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_credential_version(session, flush_context):
+    """ 机器用户或角色发生变更时, 在同一事务内递增版本号 """
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (MachineUser, Role)):
+            CacheVersion.bump(session.connection(), CREDENTIAL_VERSION)
+            session.info["credential_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_credential_changed(session):
+    """ 本进程提交后立即失效, 无需等待轮询 """
+    if session.info.pop("credential_changed", False):
+        credential_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_credential_changed(session):
+    session.info.pop("credential_changed", None)
@@ -0,0 +1,175 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 03:10:00
+# description: 机器用户管理
+
+__all__ = ["LIST_LIMIT_MAX", "list_machine_users", "list_version", "get_machine_user", "machine_user_version",
+           "create_machine_user", "update_machine_user", "delete_machine_user", "role_id_of", "list_roles",
+           "roles_version"]
+
+from typing import Any, Dict, List, Optional, Text, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from server import db
+from server.bean.error import InvalidParamException
+from server.model.rbca import MachineUser, Role
+from server.service.role import role_table
+
+# 每页最多返回的记录数
+LIST_LIMIT_MAX = 1000
+
+# 列表与详情返回的列(不含私钥)
+COLUMNS = (MachineUser.id, MachineUser.name, MachineUser.desc, MachineUser.owner, MachineUser.access_key,
+           MachineUser.is_enabled, MachineUser.role_id, MachineUser.rate_limit, MachineUser.last_used_at,
+           MachineUser.request_count, MachineUser.create_time, MachineUser.update_time)
+
+
+def list_machine_users(cursor: Optional[int] = None, limit: int = 100, owner: Optional[Text] = None,
+                       role_id: Optional[int] = None,
+                       is_enabled: Optional[bool] = None) -> Tuple[List[Dict], Optional[int]]:
+    """
+    按 id 游标分页, 返回 (本页记录, 下一页游标); 没有下一页时游标为空
+    1.WHERE id > cursor ORDER BY id LIMIT n, 每页耗时与页码无关(不使用 OFFSET)
+    2.筛选条件均有 (筛选列, id) 组合索引, 筛选与分页走同一个索引
+    3.按列投影查询, 不构造ORM对象; 多取一行判断是否还有下一页
+    """
+    statement = _page(select(*COLUMNS), cursor, limit, owner, role_id, is_enabled)
+    rows = db.session.execute(statement).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [_to_json(row) for row in rows[:limit]], next_cursor
+
+
+def list_version(cursor: Optional[int] = None, limit: int = 100, owner: Optional[Text] = None,
+                 role_id: Optional[int] = None, is_enabled: Optional[bool] = None) -> Tuple:
+    """
+    列表页的版本信号: (行数, 最大id, 最大更新时间, 最近使用时间), 只聚合同一页窗口内的 id 与时间列
+    行内容变更改变更新时间(使用情况改变最近使用时间), 删除或新增使窗口的行数或最大id变化
+    """
+    page = _page(select(MachineUser.id, MachineUser.update_time, MachineUser.last_used_at),
+                 cursor, limit, owner, role_id, is_enabled).subquery()
+    statement = select(func.count(), func.max(page.c.id), func.max(page.c.update_time), func.max(page.c.last_used_at))
+    return tuple(db.session.execute(statement).one())
+
+
+def get_machine_user(machine_user_id: int) -> Optional[Dict]:
+    """ 查询单个机器用户(不含私钥) """
+    row = db.session.execute(select(*COLUMNS).where(MachineUser.id == machine_user_id)).first()
+    return None if row is None else _to_json(row)
+
+
+def machine_user_version(machine_user_id: int) -> Optional[Tuple]:
+    """ 单个机器用户的版本信号: (id, 更新时间, 最近使用时间); 不存在时为空 """
+    row = db.session.execute(select(MachineUser.id, MachineUser.update_time, MachineUser.last_used_at)
+                             .where(MachineUser.id == machine_user_id)).first()
+    return None if row is None else tuple(row)
+
+
+def list_roles() -> List[Dict]:
+    """ 角色列表 """
+    rows = db.session.execute(select(Role.id, Role.name, Role.permissions, Role.is_default).order_by(Role.id)).all()
+    return [{"id": row.id, "name": row.name, "permissions": row.permissions or 0, "isDefault": bool(row.is_default)}
+            for row in rows]
+
+
+def roles_version() -> Tuple:
+    """ 角色列表的版本信号: (行数, 最大id, 最大更新时间) """
+    return tuple(db.session.execute(select(func.count(), func.max(Role.id), func.max(Role.update_time))).one())
+
+
+def create_machine_user(obj: Dict[Text, Any]) -> Dict:
+    """ 新增机器用户, 返回结果包含私钥(仅此一次) """
+    user = MachineUser(name=_text(obj.get("name")), desc=_text(obj.get("desc")), owner=_text(obj.get("owner")),
+                       role_id=role_id_of(obj.get("role")), rate_limit=_text(obj.get("rateLimit")))
+    db.session.add(user)
+    _commit(user.name)
+    return dict(_to_json(user), secretKey=user.secret_key)
+
+
+def update_machine_user(machine_user_id: int, obj: Dict[Text, Any]) -> Optional[Dict]:
+    """ 修改机器用户(只修改提交的字段: name/desc/owner/role/rateLimit/isEnabled) """
+    user = db.session.get(MachineUser, machine_user_id)
+    if user is None:
+        return None
+    for key, attr in (("name", "name"), ("desc", "desc"), ("owner", "owner"), ("rateLimit", "rate_limit")):
+        if key in obj:
+            setattr(user, attr, _text(obj[key]))
+    if "role" in obj:
+        user.role_id = role_id_of(obj["role"]) or role_table.default_id()
+    if "isEnabled" in obj:
+        if not isinstance(obj["isEnabled"], bool):
+            raise InvalidParamException(error="提交信息中 isEnabled 参数不合法!", value=obj["isEnabled"],
+                                        suggestions=["字段要求: 布尔值"])
+        user.is_enabled = obj["isEnabled"]
+    user.validate()
+    _commit(user.name)
+    return _to_json(user)
+
+
+def delete_machine_user(machine_user_id: int) -> bool:
+    """ 删除机器用户, 不存在时返回 False """
+    user = db.session.get(MachineUser, machine_user_id)
+    if user is None:
+        return False
+    db.session.delete(user)
+    db.session.commit()
+    return True
+
+
+def _page(statement, cursor, limit, owner, role_id, is_enabled):
+    """ 筛选条件 + 游标分页(多取一行判断是否还有下一页) """
+    if cursor is not None:
+        statement = statement.where(MachineUser.id > cursor)
+    if owner is not None:
+        statement = statement.where(MachineUser.owner == owner)
+    if role_id is not None:
+        statement = statement.where(MachineUser.role_id == role_id)
+    if is_enabled is not None:
+        statement = statement.where(MachineUser.is_enabled == is_enabled)
+    return statement.order_by(MachineUser.id).limit(limit + 1)
+
+
+def _commit(name: Text):
+    """ 提交; 名称重复时回滚并返回参数错误 """
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise InvalidParamException(error="提交信息中 name 参数不合法!", value=name,
+                                    suggestions=["名称已存在, 请更换名称"])
+
+
+def role_id_of(name) -> Optional[int]:
+    """ 角色名 -> 角色编号(查角色权限表); 未提交时为空, 角色不存在时返回参数错误 """
+    if name is None or name == "":
+        return None
+    role_id = role_table.id(name)
+    if role_id is None:
+        raise InvalidParamException(error="提交信息中 role 参数不合法!", value=name,
+                                    suggestions=[f"可选角色: {', '.join(role_table.snapshot().ids)}"])
+    return role_id
+
+
+def _text(value) -> Optional[Text]:
+    """ 字符串去除首尾空白, 空字符串视为未填写 """
+    if value is None:
+        return None
+    value = value.strip() if isinstance(value, str) else str(value)
+    return value or None
+
+
+def _to_json(row) -> Dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "desc": row.desc,
+        "owner": row.owner,
+        "accessKey": row.access_key,
+        "isEnabled": bool(row.is_enabled),
+        "role": role_table.name(row.role_id),
+        "rateLimit": row.rate_limit,
+        "lastUsedAt": row.last_used_at,
+        "requestCount": row.request_count or 0,
+        "createTime": row.create_time,
+        "updateTime": row.update_time,
+    }
@@ -0,0 +1,265 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 19:40:00
+# description: 请求耗时与运行指标 (Prometheus 文本格式)
+
+__all__ = ["Sample", "Metrics", "metrics", "BUCKETS", "CONTENT_TYPE"]
+
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, Text, Tuple
+from flask import g, request
+from server.utils.background import PeriodicTask
+
+# Prometheus 文本格式
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# 请求耗时直方图的固定分桶(单位: 秒)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 请求耗时直方图名称
+REQUEST_DURATION = "http_request_duration_seconds"
+
+# 计数器说明
+COUNTER_HELP = {
+    "ratelimit_rejections_total": "Requests rejected by the rate limiter",
+}
+
+# 未匹配路由的请求(404/405)统一归入同一端点, 避免标签基数膨胀
+UNMATCHED = "<unmatched>"
+
+
+class Sample(NamedTuple):
+    """ 采集样本 (kind: counter / gauge) """
+
+    name: Text
+    kind: Text
+    help: Text
+    labels: Tuple[Tuple[Text, Text], ...]
+    value: float
+
+
+class Metrics:
+    """
+    运行指标
+    1.请求耗时按 端点/方法/状态码 记入固定分桶直方图, 热路径只有一次二分查找和一次加锁计数
+    2.各组件通过 register 注册采集函数, 在输出(或落盘)时调用, 不增加请求开销
+    3.配置 METRICS_DIR 后进入多进程模式: 各 worker 定期将本进程快照写入该目录,
+      抓取时合并全部快照; 计数器与直方图累加(含已退出进程), 仪表按进程号区分且只保留存活进程
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.directory = None
+        self._histograms = dict()
+        self._counters = dict()
+        self._collectors = list()
+        self._lock = threading.Lock()
+        self._task = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """ 需先于其他扩展初始化, 以便计时覆盖限流等前置钩子 """
+        self.app = app
+        self.directory = app.config["METRICS_DIR"]
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self.flush)
+        self._task = PeriodicTask("metrics", app.config["METRICS_FLUSH_INTERVAL"], self.flush)
+        app.extensions["metrics"] = self
+        app.before_request_funcs.setdefault(None, []).insert(0, self._before_request)
+        app.after_request(self._after_request)
+        app.config.setdefault("RATELIMIT_ON_BREACH_CALLBACK", self._on_breach)
+        # 内置采集项
+        self._collectors.clear()
+        self.register(collect_credential_cache)
+        self.register(collect_nonce_store)
+        self.register(self._collect_counters)
+
+    def register(self, collector: Callable[[], Iterable[Sample]]):
+        """ 注册采集函数 """
+        self._collectors.append(collector)
+
+    def observe(self, endpoint: Text, method: Text, status: int, seconds: float):
+        """ 记录一次请求耗时 """
+        key = (endpoint, method, str(status))
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # 各分桶计数(非累积) + 总耗时
+                histogram = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def inc(self, name: Text, labels: Tuple[Tuple[Text, Text], ...] = (), value: float = 1):
+        """ 累加计数器 """
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """ 本进程快照 """
+        with self._lock:
+            histograms = [[*key, list(value)] for key, value in self._histograms.items()]
+        samples = list()
+        with self.app.app_context():
+            for collector in self._collectors:
+                samples.extend(collector())
+        return {"pid": os.getpid(), "histograms": histograms, "samples": [list(sample) for sample in samples]}
+
+    def flush(self):
+        """ 多进程模式下写入本进程快照(先写临时文件再替换, 读取方不会看到半个文件) """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        with open(path + ".tmp", "w") as fp:
+            json.dump(self.snapshot(), fp)
+        os.replace(path + ".tmp", path)
+
+    def render(self) -> bytes:
+        """ 输出 Prometheus 文本格式 """
+        if self.directory:
+            self.flush()
+            return _render(*_merge(self._load_snapshots(), per_process=True))
+        return _render(*_merge([self.snapshot()]))
+
+    def _load_snapshots(self):
+        """ 读取全部进程快照; 已退出进程的累计值并入归档文件后删除其快照 """
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, "archive.json")
+            archive = _read_json(archive_path)
+            snapshots, dead = list(), list()
+            for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+                snapshot = _read_json(path)
+                if snapshot is None:
+                    continue
+                if snapshot["pid"] == os.getpid() or _alive(snapshot["pid"]):
+                    snapshots.append(snapshot)
+                else:
+                    dead.append((path, snapshot))
+            if dead:
+                parts = [archive] if archive else []
+                # 已退出进程只保留累计值
+                parts += [dict(snapshot, samples=[s for s in snapshot["samples"] if s[1] != "gauge"])
+                          for _, snapshot in dead]
+                histograms, samples = _merge(parts)
+                archive = {"pid": 0, "histograms": [[*key, values] for key, values in histograms.items()],
+                           "samples": [list(sample) for sample in samples]}
+                with open(archive_path + ".tmp", "w") as fp:
+                    json.dump(archive, fp)
+                os.replace(archive_path + ".tmp", archive_path)
+                for path, _ in dead:
+                    os.remove(path)
+        return snapshots + [archive] if archive else snapshots
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        self._task.ensure_started()
+
+    def _after_request(self, response):
+        """ 流式响应只统计到响应头返回为止 """
+        started = g.get("request_started")
+        if started is not None:
+            self.observe(request.endpoint or UNMATCHED, request.method, response.status_code,
+                         time.perf_counter() - started)
+        return response
+
+    def _on_breach(self, limit):
+        self.inc("ratelimit_rejections_total", (("endpoint", request.endpoint or UNMATCHED),))
+
+    def _collect_counters(self):
+        with self._lock:
+            counters = list(self._counters.items())
+        for (name, labels), value in counters:
+            yield Sample(name, "counter", COUNTER_HELP.get(name, name), labels, value)
+
+
+def collect_credential_cache():
+    from server.service.credential import credential_cache
+    stats = credential_cache.stats()
+    yield Sample("credential_cache_size", "gauge", "Cached credentials", (), stats["size"])
+    for name in ("hits", "misses", "evictions", "invalidations"):
+        yield Sample(f"credential_cache_{name}_total", "counter", f"Credential cache {name}", (), stats[name])
+
+
+def collect_nonce_store():
+    from server.service.nonce import nonce_store
+    yield Sample("nonce_replays_total", "counter", "Replayed requests rejected", (), nonce_store.replays)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots, per_process=False):
+    """ 合并多个进程的快照(per_process: 仪表按进程号区分) """
+    histograms = dict()
+    samples = OrderedDict()
+    for snapshot in snapshots:
+        for endpoint, method, status, values in snapshot["histograms"]:
+            key = (endpoint, method, status)
+            merged = histograms.get(key)
+            histograms[key] = values if merged is None else [a + b for a, b in zip(merged, values)]
+        for name, kind, help_text, labels, value in snapshot["samples"]:
+            labels = tuple(tuple(label) for label in labels)
+            if kind == "gauge" and per_process:
+                labels += (("pid", str(snapshot["pid"])),)
+            key = (name, labels)
+            previous = samples.get(key)
+            samples[key] = Sample(name, kind, help_text, labels, value + (previous.value if previous else 0))
+    return histograms, samples.values()
+
+
+def _render(histograms, samples) -> bytes:
+    lines = [f"# HELP {REQUEST_DURATION} Request latency by endpoint, method and status",
+             f"# TYPE {REQUEST_DURATION} histogram"]
+    for (endpoint, method, status), values in sorted(histograms.items()):
+        labels = f'endpoint="{_escape(endpoint)}",method="{method}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values):
+            cumulative += count
+            lines.append(f'{REQUEST_DURATION}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{REQUEST_DURATION}_sum{{{labels}}} {values[-1]}")
+        lines.append(f"{REQUEST_DURATION}_count{{{labels}}} {cumulative}")
+    described = set()
+    for sample in sorted(samples, key=lambda s: s.name):
+        if sample.name not in described:
+            described.add(sample.name)
+            lines.append(f"# HELP {sample.name} {sample.help}")
+            lines.append(f"# TYPE {sample.name} {sample.kind}")
+        labels = ",".join(f'{k}="{_escape(v)}"' for k, v in sample.labels)
+        lines.append(f"{sample.name}{{{labels}}} {sample.value}" if labels else f"{sample.name} {sample.value}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _escape(value: Text) -> Text:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+metrics = Metrics()
@@ -0,0 +1,227 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 13:40:00
+# description: 随机数存储 (防重放)
+
+__all__ = ["NonceStore", "MemoryBackend", "SQLiteBackend", "nonce_store"]
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from array import array
+from typing import Text
+
+# 每个分桶覆盖的时长(单位: 毫秒)
+BUCKET_MS = 60 * 1000
+
+
+def nonce_key(access_key: Text, nonce: Text) -> int:
+    """ 随机数摘要(64位有符号整数, 同时适用于内存集合与 SQLite 主键) """
+    digest = hashlib.blake2b(f"{access_key}:{nonce}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class _Bucket:
+    """
+    分桶 (开放寻址哈希表)
+    以 array('q') 保存64位摘要, 每个条目约 8~16 字节, 远小于 set 中的 int 对象
+    """
+
+    __slots__ = ("minute", "table", "mask", "count")
+
+    # 最大装载因子
+    LOAD_FACTOR = 0.75
+
+    def __init__(self, minute, expected=0):
+        capacity = 1024
+        while capacity * self.LOAD_FACTOR < expected:
+            capacity <<= 1
+        self.minute = minute
+        self.table = array("q", bytes(8 * capacity))
+        self.mask = capacity - 1
+        self.count = 0
+
+    def add(self, key: int) -> bool:
+        """ 插入摘要, 已存在时返回 False """
+        # 0 作为空槽位标记
+        key = key or 1
+        table, mask = self.table, self.mask
+        i = key & mask
+        while True:
+            v = table[i]
+            if v == 0:
+                table[i] = key
+                self.count += 1
+                if self.count > (mask + 1) * self.LOAD_FACTOR:
+                    self._grow()
+                return True
+            if v == key:
+                return False
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old = self.table
+        self.table = array("q", bytes(16 * len(old)))
+        self.mask = len(self.table) - 1
+        table, mask = self.table, self.mask
+        for key in old:
+            if key:
+                i = key & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = key
+
+
+class MemoryBackend:
+    """
+    进程内存储
+    按请求时间戳(已参与签名)所在分钟分桶, 桶组成定长环;
+    分钟推进时整桶丢弃过期的桶, 过期不需要扫描条目
+    """
+
+    def __init__(self, window_min=15, clock=time.time):
+        self.window = window_min
+        self._clock = clock
+        # 有效分钟范围为 [now - window - 1, now + window + 1]
+        self._size = 2 * window_min + 3
+        self._ring = [None] * self._size
+        self._now = None
+        # 最近一个分桶的条目数, 用于预估新分桶的容量(避免扩容)
+        self._expected = 0
+        self._lock = threading.Lock()
+
+    def add(self, key: int, timestamp_ms: float) -> bool:
+        minute = int(timestamp_ms // BUCKET_MS)
+        now = int(self._clock() * 1000 // BUCKET_MS)
+        if abs(minute - now) > self.window + 1:
+            return False
+        index = minute % self._size
+        with self._lock:
+            if now != self._now:
+                self._expire(now)
+            bucket = self._ring[index]
+            if bucket is None or bucket.minute != minute:
+                bucket = _Bucket(minute, self._expected)
+                self._ring[index] = bucket
+            return bucket.add(key)
+
+    def _expire(self, now):
+        """ 丢弃早于有效范围的分桶 """
+        if self._now is not None:
+            previous = self._ring[self._now % self._size]
+            if previous is not None and previous.minute == self._now:
+                self._expected = previous.count
+        oldest = now - self.window - 1
+        for index, bucket in enumerate(self._ring):
+            if bucket is not None and bucket.minute < oldest:
+                self._ring[index] = None
+        self._now = now
+
+    def __len__(self):
+        return sum(bucket.count for bucket in self._ring if bucket is not None)
+
+
+class SQLiteBackend:
+    """
+    文件存储 (同一主机多个工作进程共享)
+    每个分钟一张表, 过期时整表删除, 过期不需要扫描条目
+    """
+
+    def __init__(self, path: Text, window_min=15, clock=time.time):
+        self.path = path
+        self.window = window_min
+        self._clock = clock
+        self._local = threading.local()
+        self._purged = None
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        # 进程 fork 后不能复用父进程的连接
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.tables = set()
+        return connection
+
+    def add(self, key: int, timestamp_ms: float) -> bool:
+        minute = int(timestamp_ms // BUCKET_MS)
+        now = int(self._clock() * 1000 // BUCKET_MS)
+        if abs(minute - now) > self.window + 1:
+            return False
+        connection = self._connection()
+        if self._purged != now:
+            self._purge(connection, now)
+        table = f"nonce_{minute}"
+        if minute not in self._local.tables:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (k INTEGER PRIMARY KEY)")
+            self._local.tables.add(minute)
+        statement = f"INSERT OR IGNORE INTO {table} (k) VALUES (?)"
+        try:
+            cursor = connection.execute(statement, (key,))
+        except sqlite3.OperationalError:
+            # 其他进程刚刚删除了该表(仅在各进程时钟存在偏差时发生), 重建后重试一次
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (k INTEGER PRIMARY KEY)")
+            cursor = connection.execute(statement, (key,))
+        return cursor.rowcount == 1
+
+    def _purge(self, connection, now):
+        """ 删除过期分桶(整表) """
+        self._purged = now
+        oldest = now - self.window - 1
+        rows = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'nonce_%'")
+        for (name,) in rows.fetchall():
+            minute = int(name[len("nonce_"):])
+            if minute < oldest:
+                connection.execute(f"DROP TABLE IF EXISTS {name}")
+                self._local.tables.discard(minute)
+
+    def __len__(self):
+        connection = self._connection()
+        rows = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'nonce_%'")
+        return sum(connection.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for (name,) in rows.fetchall())
+
+
+class NonceStore:
+    """
+    随机数存储
+    NONCE_STORE_URI 选择后端:
+    memory://              进程内存储(默认)
+    sqlite:///path/to/file 文件存储(同一主机多个工作进程共享)
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.replays = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = self.create_backend(app.config["NONCE_STORE_URI"], app.config["SIGNATURE_VALID_PERIOD_MIN"])
+        app.extensions["nonce_store"] = self
+
+    @staticmethod
+    def create_backend(uri: Text, window_min=15, clock=time.time):
+        scheme, _, path = uri.partition("://")
+        if scheme == "memory":
+            return MemoryBackend(window_min, clock=clock)
+        if scheme == "sqlite":
+            # 与 SQLAlchemy 一致: sqlite:///相对路径, sqlite:////绝对路径
+            return SQLiteBackend(path[1:], window_min, clock=clock)
+        raise ValueError(f"不支持的随机数存储: {uri}")
+
+    def add(self, access_key: Text, nonce: Text, timestamp_ms: float) -> bool:
+        """ 记录随机数, 首次出现时返回 True """
+        if self.backend.add(nonce_key(access_key, nonce), timestamp_ms):
+            return True
+        self.replays += 1
+        return False
+
+
+nonce_store = NonceStore()
@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 23:40:00
+# description: 阻塞调用线程池 (协程中访问数据库等阻塞操作)
+
+__all__ = ["BlockingPool", "blocking_pool"]
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from server.service.metrics import metrics, Sample
+
+
+class BlockingPool:
+    """
+    阻塞调用线程池
+    1.协程通过 await run(fn, ...) 把数据库访问等阻塞调用交给有界线程池, 事件循环不被阻塞
+    2.线程数默认等于数据库连接池容量(pool_size + max_overflow), 线程不会因等待连接而空转;
+      超出线程数的调用排队等待, 可由 OFFLOAD_THREADS 调整
+    3.调用在当前上下文(contextvars)的副本中执行, 应用/请求上下文随之传递
+    4.已在线程池中的调用(如线程池中运行的 WSGI 应用内的协程视图)直接执行, 避免线程互相等待而耗尽线程池
+    5.线程池按进程创建(fork 后在子进程中重建)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.threads = 16
+        self.inflight = 0
+        self.queued = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.threads = app.config["OFFLOAD_THREADS"] or self._default_threads(app.config)
+        self.shutdown()
+        app.extensions["blocking_pool"] = self
+        metrics.register(self.collect)
+
+    @staticmethod
+    def _default_threads(config) -> int:
+        options = config["SQLALCHEMY_ENGINE_OPTIONS"]
+        if "pool_size" in options:
+            return max(options["pool_size"] + max(options.get("max_overflow", 0), 0), 1)
+        return 16
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix="offload")
+                    self._pid = os.getpid()
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """ 在线程池中执行阻塞调用并等待结果 """
+        if getattr(self._local, "active", False):
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, self._call, fn, *args, **kwargs)
+        with self._lock:
+            self.queued += 1
+        return await loop.run_in_executor(self.executor, call)
+
+    def _call(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.inflight += 1
+        self._local.active = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.active = False
+            with self._lock:
+                self.inflight -= 1
+
+    def shutdown(self, wait: bool = False):
+        """ 关闭当前进程的线程池(下次调用时重建) """
+        executor, pid = self._executor, self._pid
+        self._executor, self._pid = None, None
+        # 父进程的线程不会复制到子进程, 只关闭本进程创建的线程池
+        if executor is not None and pid == os.getpid():
+            executor.shutdown(wait=wait)
+
+    def collect(self):
+        yield Sample("offload_threads", "gauge", "Blocking call thread pool size", (), self.threads)
+        yield Sample("offload_inflight", "gauge", "Blocking calls running", (), self.inflight)
+        yield Sample("offload_queued", "gauge", "Blocking calls waiting for a thread", (), self.queued)
+
+
+blocking_pool = BlockingPool()
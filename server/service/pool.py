@@ -0,0 +1,159 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 20:40:00
+# description: 数据库连接池
+
+__all__ = ["InstrumentedQueuePool", "PoolStats", "pool_stats", "DatabasePool", "db_pool"]
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+from server import db
+from server.service.metrics import metrics, Sample
+
+
+class PoolStats:
+    """ 连接获取统计(进程内累计, 连接池重建后保留) """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timeout: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            if seconds > self.max_wait_seconds:
+                self.max_wait_seconds = seconds
+            self.timeouts += timeout
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """ 记录获取连接等待时间的 QueuePool (不含 pre-ping 耗时) """
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # 父类在池满时会递归调用, 只统计最外层
+        if getattr(self._local, "nested", False):
+            return super()._do_get()
+        self._local.nested = True
+        started = time.perf_counter()
+        timeout = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timeout = True
+            raise
+        finally:
+            self._local.nested = False
+            pool_stats.record(time.perf_counter() - started, timeout)
+
+
+# 已初始化的应用(fork 后在子进程中丢弃其引擎继承的连接)
+_apps = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    """ 子进程不能复用父进程打开的连接; close=False 只丢弃引用, 不关闭父进程仍在使用的套接字 """
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class DatabasePool:
+    """
+    数据库连接池
+    1.连接池参数由各环境配置的 SQLALCHEMY_ENGINE_OPTIONS 决定(环境变量 DB_POOL_*)
+    2.fork 后子进程自动丢弃继承的连接并按需重建
+    3.warm_up 预先建立 DB_POOL_WARMUP 个连接, 供 worker 启动后、接收请求前调用;
+      未显式调用时在本进程首个请求前执行
+    4.连接池大小/占用/溢出/利用率与获取连接等待时间计入指标
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.warmup = 0
+        self._warmed_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """ 需先于 db 初始化(设置连接池类型) """
+        self.app = app
+        self.warmup = app.config["DB_POOL_WARMUP"]
+        self._warmed_pid = None
+        app.extensions["db_pool"] = self
+        # 配置了连接池参数时使用带统计的 QueuePool (SQLite 内存库等保持驱动默认的连接池)
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        if "pool_size" in options and "poolclass" not in options:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(options, poolclass=InstrumentedQueuePool)
+        _apps.add(app)
+        if self.warmup:
+            app.before_request(self._ensure_warm)
+        metrics.register(self.collect)
+
+    def warm_up(self, count: int = None) -> int:
+        """ 同时占用 count 个连接后归还, 使连接池中保留空闲连接; 返回建立的连接数 """
+        count = self.warmup if count is None else count
+        connections = list()
+        with self._lock, self.app.app_context():
+            try:
+                for _ in range(count):
+                    connection = db.engine.connect()
+                    connections.append(connection)
+                    connection.execute(text("SELECT 1"))
+            finally:
+                for connection in connections:
+                    connection.close()
+            self._warmed_pid = os.getpid()
+        return len(connections)
+
+    def _ensure_warm(self):
+        if self._warmed_pid == os.getpid():
+            return
+        try:
+            self.warm_up()
+        except exc.SQLAlchemyError as e:
+            # 预热失败不影响请求, 下一个请求重试
+            self.app.logger.warning("连接池预热失败: %s", e)
+
+    @staticmethod
+    def collect():
+        pool = db.engine.pool
+        if isinstance(pool, QueuePool):
+            size, checked_out, overflow = pool.size(), pool.checkedout(), pool.overflow()
+            yield Sample("db_pool_size", "gauge", "Connection pool size", (), size)
+            yield Sample("db_pool_checked_out", "gauge", "Connections checked out", (), checked_out)
+            yield Sample("db_pool_checked_in", "gauge", "Idle connections in the pool", (), pool.checkedin())
+            yield Sample("db_pool_overflow", "gauge", "Connections opened beyond pool size", (), max(overflow, 0))
+            capacity = size + max(pool._max_overflow, 0)
+            yield Sample("db_pool_utilization", "gauge", "Checked out connections / (size + max overflow)", (),
+                         round(checked_out / capacity, 4) if capacity else 0)
+        yield Sample("db_pool_checkouts_total", "counter", "Connection checkouts", (), pool_stats.checkouts)
+        yield Sample("db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a connection", (),
+                     pool_stats.wait_seconds)
+        yield Sample("db_pool_checkout_wait_seconds_max", "gauge", "Longest wait for a connection", (),
+                     pool_stats.max_wait_seconds)
+        yield Sample("db_pool_checkout_timeouts_total", "counter", "Connection checkouts that timed out", (),
+                     pool_stats.timeouts)
+
+
+db_pool = DatabasePool()
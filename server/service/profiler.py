@@ -0,0 +1,134 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 20:10:00
+# description: SQL 性能分析
+
+__all__ = ["SqlProfiler", "sql_profiler", "MODES"]
+
+import random
+import re
+import time
+
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from server import db
+from server.service.metrics import metrics, COUNTER_HELP, UNMATCHED
+
+# 分析模式: 关闭 / 全部请求 / 按比例抽样
+MODES = ("off", "all", "sample")
+
+# IN (?, ?, ...) 展开后的参数列表归一化, 使同一语句形态计入同一项
+_PARAMS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+
+COUNTER_HELP.update({
+    "sql_profiled_requests_total": "Requests profiled by the SQL profiler",
+    "sql_queries_total": "SQL statements executed by profiled requests",
+    "sql_duration_seconds_total": "Time spent in SQL statements by profiled requests",
+    "sql_slow_queries_total": "SQL statements slower than SQL_SLOW_QUERY_MS",
+    "sql_n_plus_one_total": "Profiled requests repeating the same statement shape",
+})
+
+
+class RequestProfile:
+    """ 单次请求的SQL统计 """
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+
+class SqlProfiler:
+    """
+    SQL 性能分析
+    1.基于游标事件计时, 每条语句只有两次计时调用; SQL_PROFILE=off 时不注册任何监听
+    2.慢查询(超过 SQL_SLOW_QUERY_MS)总是记录日志(只记录语句, 不记录参数)
+    3.被分析的请求(all: 全部, sample: 按 SQL_PROFILE_SAMPLE_RATE 抽样)统计语句数与耗时并计入指标,
+      同一语句形态重复达到 SQL_N_PLUS_ONE_THRESHOLD 次时记录 N+1 告警,
+      可选在 Server-Timing 响应头中返回
+    """
+
+    def __init__(self, app=None):
+        self.mode = "off"
+        self.sample_rate = 1.0
+        self.slow_seconds = 0.1
+        self.n_plus_one = 5
+        self.server_timing = False
+        self.logger = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.mode = app.config["SQL_PROFILE"]
+        if self.mode not in MODES:
+            raise ValueError(f"SQL_PROFILE 应为 {', '.join(MODES)} 之一, 实际为 {self.mode}")
+        self.sample_rate = app.config["SQL_PROFILE_SAMPLE_RATE"]
+        self.slow_seconds = app.config["SQL_SLOW_QUERY_MS"] / 1000
+        self.n_plus_one = app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+        self.server_timing = app.config["SQL_SERVER_TIMING"]
+        self.logger = app.logger
+        app.extensions["sql_profiler"] = self
+        if self.mode == "off":
+            return
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        if self.mode == "all" or random.random() < self.sample_rate:
+            g.sql_profile = RequestProfile()
+
+    def _after_request(self, response):
+        profile = g.pop("sql_profile", None)
+        if profile is None:
+            return response
+        labels = (("endpoint", request.endpoint or UNMATCHED),)
+        metrics.inc("sql_profiled_requests_total", labels)
+        metrics.inc("sql_queries_total", labels, profile.count)
+        metrics.inc("sql_duration_seconds_total", labels, profile.duration)
+        # 语句形态归一化后再判断重复
+        shapes = Counter()
+        for statement, count in profile.statements.items():
+            shapes[_PARAMS.sub("(?)", statement)] += count
+        repeated = [(shape, count) for shape, count in shapes.items() if count >= self.n_plus_one]
+        if repeated:
+            metrics.inc("sql_n_plus_one_total", labels)
+            for shape, count in repeated:
+                self.logger.warning("疑似 N+1 查询: %s %s 重复执行 %d 次: %s",
+                                    request.method, request.path, count, shape)
+        if self.server_timing:
+            response.headers.add("Server-Timing",
+                                 f'db;dur={profile.duration * 1000:.3f};desc="{profile.count} queries"')
+        return response
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # 开始时间记在本次执行的上下文上: 执行失败时不会进入 after 钩子, 随上下文一起释放
+        # (没有执行上下文的语句不计时)
+        if context is not None:
+            context._profile_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profile_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.slow_seconds:
+            metrics.inc("sql_slow_queries_total")
+            self.logger.warning("慢查询 %.1fms: %s", elapsed * 1000, statement)
+        if has_request_context():
+            profile = g.get("sql_profile")
+            if profile is not None:
+                profile.count += 1
+                profile.duration += elapsed
+                profile.statements[statement] += 1
+
+
+sql_profiler = SqlProfiler()
@@ -0,0 +1,152 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 16:00:00
+# description: 机器用户批量导入
+
+__all__ = ["FORMATS", "read_rows", "import_machine_users"]
+
+import csv
+import json
+
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from server import db
+from server.model.cache import CacheVersion
+from server.model.rbca import MachineUser
+from server.service.credential import credential_cache, CREDENTIAL_VERSION
+from server.service.role import role_table
+from server.utils.keygen import generate_keys
+
+# 支持的文件格式
+FORMATS = ("ndjson", "csv")
+
+# 字段长度限制(与表结构保持一致)
+NAME_MAX = MachineUser.name.type.length
+DESC_MAX = MachineUser.desc.type.length
+OWNER_MAX = MachineUser.owner.type.length
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """ 逐行读取, 返回 (行号, 对象); 无法解析的行返回 (行号, ValueError) """
+    if fmt == "csv":
+        # 首行为表头
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            yield line, row
+        return
+    for line, text in enumerate(stream, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            obj = json.loads(text)
+        except ValueError as e:
+            yield line, ValueError(f"无法解析的JSON: {e}")
+            continue
+        yield line, obj if isinstance(obj, dict) else ValueError("每行应为一个JSON对象")
+
+
+def import_machine_users(rows: Iterable[Tuple[int, Any]], chunk_size: int = 1000) -> Iterator[Dict]:
+    """
+    批量导入机器用户, 按输入顺序逐行返回导入结果
+    1.默认角色与角色名只解析一次(角色权限表)
+    2.每批整体校验, 批内重名与库内重名各一次集合运算/查询
+    3.每批一次性生成密钥(CSPRNG), 一次 executemany 插入并提交
+    """
+    snapshot = role_table.snapshot()
+    seen = set()
+    rows = iter(rows)
+    created = 0
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            for result in _import_chunk(chunk, snapshot.ids, snapshot.default_id, seen):
+                created += result["status"] == "created"
+                yield result
+    finally:
+        # 批量插入不经过ORM刷新事件, 导入结束后统一递增凭据版本
+        if created:
+            CacheVersion.bump(db.session.connection(), CREDENTIAL_VERSION)
+            db.session.commit()
+            credential_cache.clear()
+
+
+def _import_chunk(chunk: List[Tuple[int, Any]], role_ids, default_id, seen) -> List[Dict]:
+    lines = [line for line, _ in chunk]
+    objs = [obj if isinstance(obj, dict) else {} for _, obj in chunk]
+    names = [_text(obj.get("name")) for obj in objs]
+    descs = [_text(obj.get("desc")) or None for obj in objs]
+    owners = [_text(obj.get("owner")) for obj in objs]
+    roles = [_text(obj.get("role")) for obj in objs]
+    # 逐列校验
+    errors = [str(obj) if isinstance(obj, Exception) else None for _, obj in chunk]
+    errors = [e or _check(n, 1, NAME_MAX, "name") for e, n in zip(errors, names)]
+    errors = [e or (_check(d, 1, DESC_MAX, "desc") if d else None) for e, d in zip(errors, descs)]
+    errors = [e or _check(o, 1, OWNER_MAX, "owner") for e, o in zip(errors, owners)]
+    errors = [e or (f"角色 {r} 不存在" if r and r not in role_ids else None) for e, r in zip(errors, roles)]
+    # 重名检查(文件内 & 数据库内)
+    candidates = [n for e, n in zip(errors, names) if e is None]
+    existing = set(db.session.execute(select(MachineUser.name).where(MachineUser.name.in_(candidates))).scalars()) \
+        if candidates else set()
+    for i, name in enumerate(names):
+        if errors[i] is None:
+            if name in existing or name in seen:
+                errors[i] = f"名称 {name} 已存在"
+            else:
+                seen.add(name)
+    # 生成密钥并组装待插入行
+    valid = [i for i, e in enumerate(errors) if e is None]
+    keys = generate_keys(2 * len(valid))
+    values = [{
+        "name": names[i],
+        "desc": descs[i],
+        "owner": owners[i],
+        "access_key": keys[2 * k],
+        "secret_key": keys[2 * k + 1],
+        "role_id": role_ids[roles[i]] if roles[i] else default_id,
+    } for k, i in enumerate(valid)]
+    if values:
+        errors = _insert(values, valid, errors)
+    # 按输入顺序组装结果
+    value_of = dict(zip(valid, values))
+    return [
+        {"line": line, "name": names[i], "status": "created",
+         "accessKey": value_of[i]["access_key"], "secretKey": value_of[i]["secret_key"]}
+        if errors[i] is None else
+        {"line": line, "name": names[i], "status": "failed", "error": errors[i]}
+        for i, line in enumerate(lines)
+    ]
+
+
+def _insert(values, valid, errors):
+    """ 整批插入; 并发冲突时回退为逐行插入以定位失败行 """
+    table = MachineUser.__table__
+    try:
+        db.session.execute(insert(table), values)
+        db.session.commit()
+        return errors
+    except IntegrityError:
+        db.session.rollback()
+    errors = list(errors)
+    for i, value in zip(valid, values):
+        try:
+            db.session.execute(insert(table), [value])
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            errors[i] = f"写入失败: {e.orig}"
+    return errors
+
+
+def _text(value) -> str:
+    return value.strip() if isinstance(value, str) else ("" if value is None else str(value))
+
+
+def _check(value: str, min_len: int, max_len: int, field: str):
+    if not min_len <= len(value) <= max_len:
+        return f"字段 {field} 不合法, 要求长度 {min_len}~{max_len} 字符"
+    return None
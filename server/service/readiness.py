@@ -0,0 +1,170 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 18:30:00
+# description: 就绪检查
+
+__all__ = ["CheckResult", "Readiness", "readiness"]
+
+import datetime
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Text
+from flask import Response
+from sqlalchemy import text
+from server import db, limiter
+from server.bean.response import ApiResponse, MIMETYPE
+from server.service.offload import blocking_pool
+from server.utils.background import PeriodicTask
+from server.utils.migration import head_revisions, current_revisions
+
+
+class CheckResult(NamedTuple):
+    """ 单项检查结果 """
+
+    name: Text
+    ok: bool
+    latency_ms: float
+    error: Optional[Text]
+
+
+class Snapshot(NamedTuple):
+    """ 检查结果快照(预编码响应体) """
+
+    ready: bool
+    checked_at: float
+    body: bytes
+
+
+class Readiness:
+    """
+    就绪检查
+    各组件通过 register 注册检查项, 后台线程按 READINESS_INTERVAL 周期执行,
+    探针只返回最近一次的结果(预编码), 不在请求中访问依赖(进程内首次探测除外)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 5.0
+        self._checks = OrderedDict()
+        self._snapshot = None
+        self._task = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config["READINESS_INTERVAL"]
+        self._snapshot = None
+        self._task = PeriodicTask("readiness", self.interval, self.refresh)
+        app.extensions["readiness"] = self
+        # 内置检查项
+        self.register("database", check_database)
+        self.register("migration", check_migration)
+        self.register("cache", check_cache)
+        self.register("limiter", check_limiter)
+
+    def register(self, name: Text, check: Callable[[], None]):
+        """ 注册检查项(抛出异常即视为未就绪) """
+        self._checks[name] = check
+
+    def refresh(self) -> Snapshot:
+        """ 执行全部检查项并更新快照 """
+        results = list()
+        with self.app.app_context():
+            for name, check in self._checks.items():
+                started = time.perf_counter()
+                try:
+                    check()
+                    error = None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                latency_ms = round((time.perf_counter() - started) * 1000, 3)
+                results.append(CheckResult(name, error is None, latency_ms, error))
+            # 检查期间产生的会话不能留给其他请求
+            db.session.remove()
+        self._snapshot = self._encode(results)
+        return self._snapshot
+
+    def status(self) -> Response:
+        """ 探针响应(返回缓存结果) """
+        self._task.ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None:
+            # 新启动的进程(如 worker 按 max_requests 重启)首次探测时同步检查一次, 避免误报未就绪
+            snapshot = self._first_refresh()
+        return self._respond(snapshot)
+
+    async def status_async(self) -> Response:
+        """ 探针响应(协程版本, 首次检查交给阻塞调用线程池, 不阻塞事件循环) """
+        self._task.ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await blocking_pool.run(self._first_refresh)
+        return self._respond(snapshot)
+
+    def _first_refresh(self) -> Snapshot:
+        with self._lock:
+            return self._snapshot or self.refresh()
+
+    def _respond(self, snapshot: Snapshot) -> Response:
+        # 后台线程长时间未更新(例如检查项卡住)时视为未就绪
+        if time.time() - snapshot.checked_at > 3 * self.interval:
+            return self._not_ready("就绪检查结果已过期")
+        return Response(snapshot.body, status=200 if snapshot.ready else 503, mimetype=MIMETYPE)
+
+    @staticmethod
+    def _encode(results) -> Snapshot:
+        now = time.time()
+        ready = all(result.ok for result in results)
+        checks = {result.name: {"ok": result.ok, "latencyMs": result.latency_ms, "error": result.error}
+                  for result in results}
+        payload = {
+            "ready": ready,
+            "checkedAt": datetime.datetime.fromtimestamp(now, datetime.timezone.utc).isoformat(),
+            "checks": checks,
+        }
+        resp = ApiResponse(200 if ready else -1, "ready" if ready else "not ready", payload=payload)
+        return Snapshot(ready, now, resp.encode())
+
+    @staticmethod
+    def _not_ready(reason: Text) -> Response:
+        resp = ApiResponse(-1, "not ready", payload={"ready": False, "error": reason})
+        return resp.to_response(status=503)
+
+
+def check_database():
+    """ 连接池可用 """
+    with db.engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def check_migration():
+    """ 数据库已迁移到最新版本 """
+    from flask import current_app
+    heads = head_revisions(current_app.config["MIGRATIONS_DIRECTORY"])
+    with db.engine.connect() as connection:
+        current = current_revisions(connection)
+    if current != heads:
+        raise RuntimeError(f"当前版本 {sorted(current)} 与最新版本 {sorted(heads)} 不一致")
+
+
+def check_cache():
+    """ 角色权限表已载入(同时完成预热) """
+    from server.service.role import role_table
+    if role_table.snapshot().default_id is None:
+        raise RuntimeError("未找到默认角色, 请执行 flask deploy")
+
+
+def check_limiter():
+    """ 限流存储可达 """
+    if not limiter.enabled:
+        return
+    if not limiter.storage.check():
+        raise RuntimeError("限流存储不可达")
+
+
+readiness = Readiness()
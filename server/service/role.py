@@ -0,0 +1,80 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 15:05:00
+# description: 角色权限表 (进程内只读快照)
+
+__all__ = ["RoleSnapshot", "RoleTable", "role_table"]
+
+import threading
+
+from typing import Mapping, NamedTuple, Optional, Text
+from sqlalchemy import select
+from server import db
+from server.model.rbca import Role
+
+
+class RoleSnapshot(NamedTuple):
+    """ 角色快照(载入后不再修改), 按角色编号与角色名索引 """
+
+    permissions: Mapping[int, int]
+    names: Mapping[int, Text]
+    # 角色名 -> 角色编号
+    ids: Mapping[Text, int]
+    default_id: Optional[int]
+
+
+class RoleTable:
+    """
+    角色权限表
+    角色只有少量几行, 每个进程首次使用时整表载入为按角色编号/角色名索引的字典(载入后不再修改),
+    角色变更时(凭据缓存版本变化)整体失效并在下次使用时重新载入
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> RoleSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+                snapshot = self._snapshot
+        return snapshot
+
+    def permissions(self, role_id: Optional[int]) -> int:
+        """ 角色权限值(未知角色视为无权限) """
+        return self.snapshot().permissions.get(role_id, 0)
+
+    def name(self, role_id: Optional[int]) -> Optional[Text]:
+        return self.snapshot().names.get(role_id)
+
+    def id(self, name: Optional[Text]) -> Optional[int]:
+        """ 角色名 -> 角色编号(未知角色为空) """
+        return self.snapshot().ids.get(name)
+
+    def default_id(self) -> Optional[int]:
+        return self.snapshot().default_id
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def invalidate(self):
+        self._snapshot = None
+
+    @staticmethod
+    def _load() -> RoleSnapshot:
+        statement = select(Role.id, Role.name, Role.permissions, Role.is_default)
+        with db.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        permissions = {row.id: row.permissions or 0 for row in rows}
+        names = {row.id: row.name for row in rows if row.name}
+        ids = {name: role_id for role_id, name in names.items()}
+        default_id = next((row.id for row in rows if row.is_default), None)
+        return RoleSnapshot(permissions, names, ids, default_id)
+
+
+role_table = RoleTable()
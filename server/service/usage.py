@@ -0,0 +1,142 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 02:40:00
+# description: 访问密钥使用情况 (合并写入)
+
+__all__ = ["KeyUsage", "key_usage"]
+
+import atexit
+import logging
+import threading
+
+from datetime import datetime
+from sqlalchemy import and_, case, or_, update
+from server import db
+from server.model.rbca import MachineUser
+from server.service.metrics import metrics, Sample, COUNTER_HELP
+from server.utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# 每条 UPDATE 语句包含的机器用户数(每个用户约 7 个绑定参数, 不超过 SQLite 的 999 个参数上限)
+BATCH_SIZE = 100
+
+COUNTER_HELP.update({
+    "key_usage_updates_total": "Batched UPDATE statements writing access key usage",
+    "key_usage_update_errors_total": "Failed access key usage updates (retried at the next interval)",
+})
+
+
+class KeyUsage:
+    """
+    访问密钥使用情况 (machine_user.last_used_at / request_count)
+    1.签名通过后在进程内累加(机器用户 -> 请求数 & 最近使用时间), 请求线程不写数据库
+    2.后台线程每隔 KEY_USAGE_FLUSH_INTERVAL 秒以 UPDATE ... CASE 批量写入, 每条语句覆盖 BATCH_SIZE 个用户
+    3.请求数按增量累加, 最近使用时间只前移, 多个进程各自写入时结果正确; 写入失败的增量并回, 下一次重试
+    4.直接在连接上执行: 不更新 update_time, 也不触发凭据缓存失效
+    5.进程退出前(gunicorn worker_exit / ASGI lifespan shutdown / atexit)写入剩余增量
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._pending = dict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config["KEY_USAGE_ENABLED"]
+        app.extensions["key_usage"] = self
+        if self._task is not None:
+            self._task.stop()
+        self._pending = dict()
+        if not self.enabled:
+            return
+        # 启动后先等待一个间隔, 首次写入前有增量可合并
+        self._task = PeriodicTask("key-usage", app.config["KEY_USAGE_FLUSH_INTERVAL"], self.flush, initial_delay=True)
+        metrics.register(self.collect)
+        atexit.register(self.flush)
+
+    def record(self, machine_user_id: int):
+        """ 记录一次签名通过的请求 """
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._pending.get(machine_user_id)
+            if entry is None:
+                self._pending[machine_user_id] = [1, now]
+            else:
+                entry[0] += 1
+                entry[1] = now
+        self._task.ensure_started()
+
+    def flush(self) -> int:
+        """ 写入本进程累加的增量, 返回写入的机器用户数 """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, dict()
+            if not pending:
+                return 0
+            items = list(pending.items())
+            written = 0
+            for start in range(0, len(items), BATCH_SIZE):
+                chunk = items[start:start + BATCH_SIZE]
+                try:
+                    with self.app.app_context(), db.engine.begin() as connection:
+                        connection.execute(self._statement(chunk))
+                except Exception:
+                    logger.exception("访问密钥使用情况写入失败, %d 个用户的增量留待下次写入", len(chunk))
+                    metrics.inc("key_usage_update_errors_total")
+                    self._restore(chunk)
+                    continue
+                metrics.inc("key_usage_updates_total")
+                written += len(chunk)
+            return written
+
+    def clear(self):
+        """ 丢弃尚未写入的增量 """
+        with self._lock:
+            self._pending = dict()
+
+    def collect(self):
+        yield Sample("key_usage_pending", "gauge", "Access keys with usage not yet written", (), len(self._pending))
+
+    @staticmethod
+    def _statement(chunk):
+        """
+        UPDATE machine_user SET
+            request_count = request_count + CASE id WHEN :id THEN :count ... END,
+            last_used_at = CASE WHEN id = :id AND (last_used_at IS NULL OR last_used_at < :time) THEN :time ... END
+        WHERE id IN (...)
+        """
+        table = MachineUser.__table__
+        return update(table).where(table.c.id.in_([machine_user_id for machine_user_id, _ in chunk])).values(
+            request_count=table.c.request_count + case(
+                {machine_user_id: count for machine_user_id, (count, _) in chunk}, value=table.c.id, else_=0),
+            last_used_at=case(
+                *[(and_(table.c.id == machine_user_id,
+                        or_(table.c.last_used_at.is_(None), table.c.last_used_at < last_used_at)), last_used_at)
+                  for machine_user_id, (_, last_used_at) in chunk],
+                else_=table.c.last_used_at),
+            # 使用情况不是业务字段的变更
+            update_time=table.c.update_time,
+        )
+
+    def _restore(self, chunk):
+        with self._lock:
+            for machine_user_id, (count, last_used_at) in chunk:
+                entry = self._pending.get(machine_user_id)
+                if entry is None:
+                    self._pending[machine_user_id] = [count, last_used_at]
+                else:
+                    entry[0] += count
+                    entry[1] = max(entry[1], last_used_at)
+
+
+key_usage = KeyUsage()
@@ -0,0 +1,160 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 23:50:00
+# description: ASGI 适配 (uvicorn asgi:app)
+
+__all__ = ["AsgiApp"]
+
+import asyncio
+import sys
+import time
+
+from tempfile import SpooledTemporaryFile
+from typing import Awaitable, Callable, Dict, Text
+from flask import Flask, Response
+from server.service.audit import audit_trail
+from server.service.metrics import metrics
+from server.service.offload import blocking_pool
+from server.service.pool import db_pool
+from server.service.usage import key_usage
+
+
+class AsgiApp:
+    """
+    以 ASGI 方式运行 Flask 应用
+    1.连接与请求体的收发由事件循环处理, 空闲长连接与慢客户端不占用线程
+    2.请求体接收完毕后, WSGI 应用在阻塞调用线程池(OFFLOAD_THREADS)中执行, 同时处理的请求数不超过线程数
+    3.route 注册的协程处理函数(如探针)直接在事件循环中应答, 不经过 Flask 的前后置钩子(限流/HTTPS跳转/CORS),
+      线程池被阻塞的数据库调用占满时探针仍能及时响应
+    4.lifespan: 启动时预热数据库连接池, 退出时关闭线程池
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.spool_max_memory = app.config["SIGNATURE_SPOOL_MAX_MEMORY"]
+        self._routes: Dict[Text, tuple] = dict()
+
+    def route(self, path: Text, handler: Callable[[], Awaitable[Response]], endpoint: Text):
+        """ 注册在事件循环中直接处理的 GET/HEAD 路由(endpoint 用于指标标签) """
+        self._routes[path] = (handler, endpoint)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError(f"不支持的 ASGI 协议: {scope['type']}")
+        route = self._routes.get(scope["path"])
+        if route is not None and scope["method"] in ("GET", "HEAD"):
+            return await self._native(scope, send, *route)
+        body = SpooledTemporaryFile(max_size=self.spool_max_memory)
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            await blocking_pool.run(self._run_wsgi, self._environ(scope, body), asyncio.get_running_loop(), send)
+        finally:
+            body.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if db_pool.app is self.app and db_pool.warmup:
+                    try:
+                        await blocking_pool.run(db_pool.warm_up)
+                    except Exception as e:
+                        self.app.logger.warning("连接池预热失败: %s", e)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                blocking_pool.shutdown(wait=True)
+                # 写入本进程尚未写入的使用情况与审计记录
+                key_usage.flush()
+                audit_trail.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _native(self, scope, send, handler, endpoint):
+        started = time.perf_counter()
+        response = await handler()
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in response.headers.to_wsgi_list()],
+        })
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else response.get_data()})
+        metrics.observe(endpoint, scope["method"], response.status_code, time.perf_counter() - started)
+
+    @staticmethod
+    def _environ(scope, body) -> Dict:
+        script_name = scope.get("root_path", "").encode("utf-8").decode("latin1")
+        path_info = scope["path"].encode("utf-8").decode("latin1")
+        if script_name and path_info.startswith(script_name):
+            path_info = path_info[len(script_name):]
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": script_name,
+            "PATH_INFO": path_info,
+            "QUERY_STRING": scope["query_string"].decode("latin1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            # 请求体已完整接收, 未声明 Content-Length(分块传输)时也可读到结尾
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        if scope.get("client"):
+            environ["REMOTE_ADDR"] = scope["client"][0]
+        for name, value in scope["headers"]:
+            name = name.decode("latin1").upper().replace("-", "_")
+            if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                name = f"HTTP_{name}"
+            value = value.decode("latin1")
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def _run_wsgi(self, environ, loop, send):
+        """ 在线程池中执行 WSGI 应用, 响应经由事件循环发送 """
+        state = dict()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["start"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers],
+            }
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        iterable = self.app(environ, start_response)
+        try:
+            for chunk in iterable:
+                if not chunk:
+                    continue
+                if not state.get("sent"):
+                    state["sent"] = True
+                    emit(state["start"])
+                emit({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not state.get("sent"):
+                emit(state["start"])
+            emit({"type": "http.response.body"})
+        finally:
+            # 触发 call_on_close / stream_with_context 的清理
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
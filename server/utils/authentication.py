@@ -7,37 +7,35 @@
 __all__ = ["signature_required", "permission_required", "admin_required"]
 
 import datetime
-import hashlib
-import hmac
+import inspect
 
-from flask import request
-from typing import Text, Dict
-from functools import wraps
-from cachetools import cached, TTLCache, LRUCache
+from flask import g, request, current_app, after_this_request
+from typing import Dict, Optional, Text
+from functools import partial, wraps
+from server import limiter
 from server.bean import Bytes
-from server.bean.error import InvalidParamException, NoPermissionException, DiffSignatureException
-from server.model.rbca import Permission, MachineUser
+from server.bean.error import InvalidParamException, NoPermissionException, DiffSignatureException, \
+    ReplayRequestException
+from server.model.rbca import Permission
+from server.service.audit import audit_trail
+from server.service.credential import Credential, credential_cache
+from server.service.nonce import nonce_store
+from server.service.offload import blocking_pool
+from server.service.usage import key_usage
+from server.utils.keygen import valid_key
+from server.utils.quota import key_quota, key_quota_key
+from server.utils.signature import new_signer, sign, sign_stream, verify, SpooledBody
 
 
 def signature_required(f):
     """ 要求接口签名 """
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        auth = Authentication(request.args, request.headers, request.data)
-        auth.verify_signature()
-        return f(*args, **kwargs)
-    return decorated
+    return _guard(f, _verify_signature)
 
 
 def permission_required(permission: Permission):
     """ 要求接口具备指定权限 """
     def decorator(f):
-        @wraps(f)
-        def decorated(*args, **kwargs):
-            auth = Authentication(request.args, request.headers, request.data)
-            auth.verify_permission(permission)
-            return f(*args, **kwargs)
-        return decorated
+        return _guard(f, partial(_verify_permission, permission))
     return decorator
 
 
@@ -46,88 +44,173 @@ def admin_required(f):
     return permission_required(Permission.ADMIN)(f)
 
 
+def _guard(f, check):
+    """ 先校验再调用视图; 协程视图的校验交给阻塞调用线程池(查询凭据可能访问数据库) """
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            await blocking_pool.run(check)
+            return await f(*args, **kwargs)
+        return decorated_async
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        check()
+        return f(*args, **kwargs)
+    return decorated
+
+
+def _verify_signature():
+    # 经过鉴权的请求均记入调用审计(含校验失败的请求)
+    audit_trail.mark()
+    auth = Authentication.current()
+    if auth.signed:
+        return
+    body = _spool_request_body()
+    try:
+        credential = auth.verify_signature(body)
+        # 签名校验通过后才扣减访问密钥的额度(超出额度时返回429)
+        _charge_key_quota()
+    except Exception:
+        # 校验失败时不会交给视图, 立即释放缓冲(可能已落盘为临时文件)
+        if isinstance(body, SpooledBody):
+            body.close()
+        raise
+    key_usage.record(credential.id)
+    if isinstance(body, SpooledBody):
+        _install_request_body(body)
+
+
+@limiter.shared_limit(key_quota, scope="key", key_func=key_quota_key, override_defaults=False)
+def _charge_key_quota():
+    """ 按访问密钥计数, 全部接口共享同一份额度(额度检查由限流装饰器完成) """
+
+
+def _verify_permission(permission: Permission):
+    audit_trail.mark()
+    Authentication.current().verify_permission(permission)
+
+
+def _spool_request_body():
+    """ 请求体流式读取(已被读取并缓存时直接复用) """
+    cached = getattr(request, "_cached_data", None)
+    if cached is not None:
+        return cached
+    return SpooledBody(request.stream, max_memory=current_app.config["SIGNATURE_SPOOL_MAX_MEMORY"],
+                       chunk_size=current_app.config["SIGNATURE_STREAM_CHUNK_SIZE"])
+
+
+def _install_request_body(body: SpooledBody):
+    """ 将回绕后的缓冲作为请求输入流交给视图 """
+    request.environ["wsgi.input"] = body.rewind()
+    request.environ["wsgi.input_terminated"] = True
+    request.__dict__.pop("stream", None)
+
+    @after_this_request
+    def close_body(response):
+        response.call_on_close(body.close)
+        return response
+
+
 class Authentication:
-    """ 鉴权模块 """
-
-    # HTTP/HTTPS 请求内容
-    __params = None
-    __headers = None
-    __body = None
-
-    def __init__(self, params, headers, body):
-        self.__case_ignore(params, headers)
-        self.__body = body
-
-    def __case_ignore(self, params, headers):
-        """ 忽略请求中的大小写差异 """
-        # Params
-        if isinstance(params, dict):
-            self.__params = dict()
-            for k, v in params.items():
-                self.__params.setdefault(str(k).lower(), v)
-        # Headers
-        if isinstance(headers, dict):
-            self.__headers = dict()
-            for k, v in headers.items():
-                self.__headers.setdefault(str(k).lower(), v)
+    """
+    鉴权模块
+    1.每个请求只创建一个实例(保存在 g.auth), 叠加的装饰器共用: 凭据只查询一次, 签名只校验一次
+    2.直接读取 request.args / request.headers(werkzeug Headers 不区分大小写), 不复制请求参数与请求头
+    """
+
+    __slots__ = ("params", "headers", "signed", "_credential")
+
+    def __init__(self, params, headers):
+        self.params = params
+        self.headers = headers
+        # 签名是否已校验通过
+        self.signed = False
+        self._credential = None
+
+    @classmethod
+    def current(cls) -> "Authentication":
+        """ 当前请求的鉴权上下文 """
+        auth = g.get("auth")
+        # 应用上下文可能跨越多个请求(如测试客户端), 按请求头对象区分请求
+        if auth is None or auth.headers is not request.headers:
+            auth = g.auth = cls(request.args, request.headers)
+        return auth
+
+    @property
+    def credential(self) -> Credential:
+        """ 调用方凭据(首次访问时检查公钥参数并查询凭据缓存) """
+        if self._credential is None:
+            access_key = self.headers.get("X-Access-Key")
+            if not valid_key(access_key):
+                raise InvalidParamException(error="字段 X-Access-Key 未配置或存在配置问题", value=access_key,
+                                            suggestions=["1.定长32字符", "2.来自已配置的数据库 machine_user.access_key 字段"])
+            self._credential = self.__get_credential(access_key)
+        return self._credential
+
+    @property
+    def machine_user_id(self) -> Optional[int]:
+        """ 已查询到的机器用户编号(不触发查询) """
+        return self._credential.id if self._credential is not None else None
 
     def verify_permission(self, permission: Permission):
         """ 验证权限 """
-        # 检查公钥参数是否合法
-        key = "X-Access-Key".lower()
-        if key not in self.__headers or not isinstance(self.__headers[key], str) or len(self.__headers[key]) != 32:
-            raise InvalidParamException(error="字段 X-Access-Key 未配置或存在配置问题", value=self.__headers.get(key),
-                                        suggestions=["1.定长32字符", "2.来自已配置的数据库 machine_user.access_key 字段"])
-        # 根据公钥查询App
-        machine_user = self.__get_machine_user(self.__headers.get(key))
-        # 检查 公钥 是否存在
-        if not machine_user:
-            raise InvalidParamException(error="访问密钥不存在", value=self.__headers.get(key),
-                                        suggestions=["1.请检查字段 X-Access-Key 填写是否正确", "2.请联系管理员添加访问密钥"])
-        # 检查 权限 是否允许
-        if not machine_user.can(permission):
+        if not self.credential.can(permission):
             raise NoPermissionException(error="无权访问此接口", value=permission,
                                         suggestions=["请联系管理员提升权限"])
 
-    def verify_signature(self, valid_period_min=15):
-        """ 验证签名 """
+    def verify_signature(self, body, valid_period_min=None) -> Credential:
+        """ 验证签名, 返回调用方凭据(同一请求只校验一次) """
+        if self.signed:
+            return self.credential
+        if valid_period_min is None:
+            valid_period_min = current_app.config["SIGNATURE_VALID_PERIOD_MIN"]
+        headers = self.headers
         # 检查 时间戳 参数是否合法
-        key1 = "X-Timestamp".lower()
-        if key1 not in self.__headers or not isinstance(self.__headers[key1], (int, float)):
-            raise InvalidParamException(error="字段 X-Timestamp 未配置或存在配置问题", value=self.__headers.get(key1),
+        timestamp = headers.get("X-Timestamp")
+        if not timestamp:
+            raise InvalidParamException(error="字段 X-Timestamp 未配置或存在配置问题", value=timestamp,
                                         suggestions=["1.整型或浮点型的毫秒时间戳", "2.与服务器保持时区一致"])
         # 验证时间戳是否有效
-        if not self.__verify_timestamp(self.__headers.get(key1), valid_period_min=valid_period_min):
-            raise InvalidParamException(error="请求已过期", value=self.__headers.get(key1),
+        if not self.__verify_timestamp(timestamp, valid_period_min=valid_period_min):
+            raise InvalidParamException(error="请求已过期", value=timestamp,
                                         suggestions=[f"1.请求有效期{valid_period_min}分钟", "2.与服务器保持时区一致"])
 
-        # 检查公钥参数是否合法
-        key2 = "X-Access-Key".lower()
-        if key2 not in self.__headers or not isinstance(self.__headers[key2], str) or len(self.__headers[key2]) != 32:
-            raise InvalidParamException(error="字段 X-Access-Key 未配置或存在配置问题", value=self.__headers.get(key2),
-                                        suggestions=["1.定长32字符", "2.来自已配置的数据库 machine_user.access_key 字段"])
-        # 根据公钥查询App
-        machine_user = self.__get_machine_user(self.__headers.get(key2))
-        # 检查 公钥 是否存在
-        if not machine_user:
-            raise InvalidParamException(error="访问密钥不存在", value=self.__headers.get(key2),
-                                        suggestions=["1.请检查字段 X-Access-Key 填写是否正确", "2.请联系管理员添加访问密钥"])
+        # 根据公钥查询凭据
+        credential = self.credential
+
+        # 检查 随机数 参数是否合法(随机数与时间戳必须参与签名, 否则可被篡改后重放)
+        nonce = headers.get("X-Nonce")
+        if not isinstance(nonce, str) or not 0 < len(nonce) <= 128:
+            raise InvalidParamException(error="字段 X-Nonce 未配置或存在配置问题", value=nonce,
+                                        suggestions=["1.每个请求唯一的随机字符串(建议使用UUID)", "2.最长128字符"])
+        signed_keys = {k.strip().lower() for k in str(headers.get("X-Keys", "")).split(",")}
+        if "x-timestamp" not in signed_keys or "x-nonce" not in signed_keys:
+            raise InvalidParamException(error="字段 X-Nonce 和 X-Timestamp 必须参与签名", value=headers.get("X-Keys"),
+                                        suggestions=["请在 X-Keys 中包含 X-Nonce 和 X-Timestamp"])
 
         # 检查 签名 参数是否合法
-        key3 = "X-Signature".lower()
-        if key3 not in self.__headers or not isinstance(self.__headers[key3], str) or len(self.__headers[key3]) == 0:
-            raise InvalidParamException(error="字段 X-Signature 未配置或存在配置问题", value=self.__headers.get(key3),
+        signature = headers.get("X-Signature")
+        if not isinstance(signature, str) or len(signature) == 0:
+            raise InvalidParamException(error="字段 X-Signature 未配置或存在配置问题", value=signature,
                                         suggestions=["请参考 README.md 文档"])
-        # 服务端计算签名值
-        local_signature = self.calculate_signature(machine_user.access_key, machine_user.secret_key,
-                                                   self.__params, self.__headers, self.__body)
-        # 校验签名是否一致
-        if self.__headers.get(key3) != local_signature:
-            raise DiffSignatureException(error="客户端提交的签名与服务端本地计算不一致", value=local_signature,
+        # 服务端计算签名值(复用凭据中预计算的HMAC状态, 请求体为流时分块计算)
+        if isinstance(body, SpooledBody):
+            local_signature = sign_stream(credential.signer, credential.access_key, self.params, headers, body.chunks())
+        else:
+            local_signature = sign(credential.signer, credential.access_key, self.params, headers, body)
+        # 校验签名是否一致(常量时间比较, 不回显服务端签名)
+        if not verify(local_signature, signature):
+            raise DiffSignatureException(error="客户端提交的签名与服务端本地计算不一致", value=signature,
                                          suggestions=["请参考 README.md 文档"])
+        # 签名有效后再记录随机数, 避免伪造请求占用随机数
+        if not nonce_store.add(credential.access_key, nonce, float(timestamp)):
+            raise ReplayRequestException(error="请求已被处理过, 不允许重放", value=nonce,
+                                         suggestions=["每个请求使用新的 X-Nonce"])
+        self.signed = True
+        return credential
 
     @staticmethod
-    @cached(cache=LRUCache(maxsize=128))
     def calculate_signature(access_key: Text, secret_key: Text, params: Dict, headers: Dict, body: Bytes, debug=False):
         """
         签名计算
@@ -140,37 +223,13 @@ class Authentication:
         :param debug:      调试开关(默认关闭)
         :return: 签名值
         """
-        # 待用来计算签名值的字段值列表
-        content_list = list()
-        # 路径参数
-        if params:
-            content_list.extend([str(e[1]) for e in sorted(params.items(), key=lambda kv: kv[0])])
-        # 请求头
-        key = "X-Keys".lower()
-        if key not in headers or not isinstance(headers[key], str) or len(headers[key]) == 0:
-            raise InvalidParamException(error="字段 X-Keys 未配置", value=headers.get(key),
-                                        suggestions=["请参考 README.md 文档"])
-        for k in headers["X-Keys"].split(","):
-            content_list.append(str(headers.get(k)))
-        # 请求体
-        if body:
-            content_list.append(body.decode(encoding="utf-8"))
-        # 公钥
-        content_list.append(access_key)
-        # 连接成字符串
-        content = ";".join(content_list)
-        # 调试打印日志
-        if debug:
-            print(content)
-        # 处理加密: 私钥 + 内容
-        return hmac.new(bytes(secret_key, encoding="utf-8"), bytes(content, encoding="utf-8"),
-                        digestmod=hashlib.sha256).hexdigest().lower()
+        return sign(new_signer(secret_key), access_key, params, headers, body, debug=debug)
 
     @staticmethod
     def __verify_timestamp(timestamp, valid_period_min=15):
         """ 验证时间戳 """
         try:
-            target = datetime.datetime.fromtimestamp(int(timestamp) / 1000)
+            target = datetime.datetime.fromtimestamp(float(timestamp) / 1000)
             now = datetime.datetime.now()
             delta = valid_period_min
             return now - datetime.timedelta(minutes=delta) <= target <= now + datetime.timedelta(minutes=delta)
@@ -179,7 +238,15 @@ class Authentication:
                                         suggestions=["1.整型或浮点型的毫秒时间戳", "2.与服务器保持时区一致"])
 
     @staticmethod
-    @cached(cache=TTLCache(maxsize=128, ttl=180))
-    def __get_machine_user(access_key: Text):
-        """ 根据AccessKey查询机器用户 """
-        return MachineUser.query.filter_by(access_key=access_key).first()
+    def __get_credential(access_key: Text) -> Credential:
+        """ 根据AccessKey查询凭据(经由凭据缓存) """
+        credential = credential_cache.get(access_key)
+        # 检查 公钥 是否存在
+        if not credential:
+            raise InvalidParamException(error="访问密钥不存在", value=access_key,
+                                        suggestions=["1.请检查字段 X-Access-Key 填写是否正确", "2.请联系管理员添加访问密钥"])
+        # 检查 公钥 是否启用
+        if not credential.is_enabled:
+            raise NoPermissionException(error="访问密钥已停用", value=access_key,
+                                        suggestions=["请联系管理员启用访问密钥"])
+        return credential
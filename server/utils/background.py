@@ -0,0 +1,64 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 18:10:00
+# description: 后台周期任务
+
+__all__ = ["PeriodicTask"]
+
+import logging
+import os
+import threading
+
+from typing import Callable, Text
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    后台周期任务
+    以守护线程按固定间隔执行; 线程不会随 fork 复制到子进程,
+    因此在首次使用时(ensure_started)按进程号判断并在当前进程内启动
+    initial_delay 为真时启动后先等待一个间隔再首次执行
+    """
+
+    def __init__(self, name: Text, interval: float, target: Callable[[], None], initial_delay: bool = False):
+        self.name = name
+        self.interval = interval
+        self.target = target
+        self.initial_delay = initial_delay
+        self._pid = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self, timeout: float = None):
+        """ 停止任务, 等待当前一次执行结束 """
+        self._stopped.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._pid = None
+
+    def _run(self):
+        stopped = self._stopped
+        if self.initial_delay and stopped.wait(self.interval):
+            return
+        while True:
+            try:
+                self.target()
+            except Exception:
+                logger.exception("后台任务 %s 执行失败", self.name)
+            if stopped.wait(self.interval):
+                break
@@ -0,0 +1,246 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 04:10:00
+# description: 响应压缩 (WSGI 中间件)
+
+__all__ = ["Compression", "ENCODINGS"]
+
+import time
+import zlib
+
+from typing import Iterable, Optional, Text
+from werkzeug.http import parse_accept_header
+from server.service.metrics import metrics, COUNTER_HELP
+
+# 完整缓冲后一次压缩的响应体上限(超过时按块流式压缩), 单位: 字节
+BUFFER_MAX = 1 << 20
+
+COUNTER_HELP.update({
+    "compression_responses_total": "Responses compressed by the compression middleware",
+    "compression_input_bytes_total": "Response bytes before compression",
+    "compression_saved_bytes_total": "Response bytes saved by compression (input - output)",
+    "compression_cpu_seconds_total": "CPU time spent compressing responses",
+})
+
+
+class _Zlib:
+    """ gzip / deflate (zlib 格式, 与 HTTP 的 deflate 编码一致) """
+
+    def __init__(self, level: int, wbits: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+# 可用的编码: 名称 -> 构造函数(压缩级别); 排在前面的优先
+ENCODINGS = dict()
+
+try:
+    # 可选: 安装 brotli 后支持 br
+    import brotli
+
+    class _Brotli:
+        def __init__(self, level: int):
+            self._compressor = brotli.Compressor(quality=level)
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.process(data)
+
+        def flush(self) -> bytes:
+            return self._compressor.flush()
+
+        def finish(self) -> bytes:
+            return self._compressor.finish()
+
+    ENCODINGS["br"] = _Brotli
+except ImportError:
+    pass
+
+try:
+    # 可选: 安装 zstandard 后支持 zstd
+    import zstandard
+
+    class _Zstd:
+        def __init__(self, level: int):
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.compress(data)
+
+        def flush(self) -> bytes:
+            return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        def finish(self) -> bytes:
+            return self._compressor.flush()
+
+    ENCODINGS["zstd"] = _Zstd
+except ImportError:
+    pass
+
+ENCODINGS["gzip"] = lambda level: _Zlib(level, 16 + zlib.MAX_WBITS)
+ENCODINGS["deflate"] = lambda level: _Zlib(level, zlib.MAX_WBITS)
+
+
+class Compression:
+    """
+    响应压缩
+    1.按 Accept-Encoding(含 q 值)协商编码, 客户端权重相同时按 COMPRESS_ENCODINGS 的顺序选择;
+      br / zstd 需安装可选依赖 brotli / zstandard
+    2.只压缩 COMPRESS_MIMETYPES 中的类型(图片、压缩包等已压缩的类型不再压缩);
+      已声明长度且小于 COMPRESS_MIN_SIZE 的响应、HEAD 请求、无响应体及分段(206)响应不压缩
+    3.已声明长度的响应(不超过 1MiB)整体压缩并重新声明长度; 流式响应逐块压缩并立即输出(不缓冲整个响应)
+    4.压缩级别按编码配置(COMPRESS_LEVELS); 压缩耗用的CPU时间与节省的字节数计入指标
+    """
+
+    def __init__(self, wsgi_app, config):
+        """
+        :param wsgi_app: 被包装的 WSGI 应用(每个 Flask 应用各自创建一个中间件)
+        :param config:   应用配置
+        """
+        self.wsgi_app = wsgi_app
+        self.encodings = [e for e in config["COMPRESS_ENCODINGS"] if e in ENCODINGS]
+        self.levels = config["COMPRESS_LEVELS"]
+        self.min_size = config["COMPRESS_MIN_SIZE"]
+        self.mimetypes = frozenset(config["COMPRESS_MIMETYPES"])
+
+    def negotiate(self, accept_encoding: Optional[Text]) -> Optional[Text]:
+        """ 选择响应编码, 不压缩时返回空 """
+        if not accept_encoding:
+            return None
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None or environ["REQUEST_METHOD"] == "HEAD":
+            return self.wsgi_app(environ, start_response)
+        state = dict()
+
+        def capture(status, headers, exc_info=None):
+            if state.get("returned"):
+                # 应用在迭代时才调用 start_response(或出错后重新调用), 不压缩
+                return start_response(status, headers, exc_info)
+            state["status"], state["headers"], state["exc_info"] = status, headers, exc_info
+            return _unsupported_write
+
+        iterable = self.wsgi_app(environ, capture)
+        state["returned"] = True
+        if "status" not in state:
+            return iterable
+        return self._respond(encoding, state["status"], state["headers"], state["exc_info"], iterable,
+                             start_response)
+
+    def _respond(self, encoding, status, headers, exc_info, iterable, start_response):
+        length = self._length(status, headers)
+        if length is False or (length is not None and length < self.min_size):
+            start_response(status, headers, exc_info)
+            return iterable
+        headers = [(k, v) for k, v in headers if k.lower() != "content-length"]
+        headers.append(("Content-Encoding", encoding))
+        headers = _vary(_weak_etag(headers))
+        encoder = ENCODINGS[encoding](self.levels.get(encoding, 6))
+        if length is not None and length <= BUFFER_MAX:
+            # 整体压缩(一次 finish, 压缩率最高)并重新声明长度
+            try:
+                data = b"".join(iterable)
+            finally:
+                _close(iterable)
+            started = time.thread_time()
+            body = encoder.compress(data) + encoder.finish()
+            _record(len(data), len(body), time.thread_time() - started)
+            headers.append(("Content-Length", str(len(body))))
+            start_response(status, headers, exc_info)
+            return [body]
+        start_response(status, headers, exc_info)
+        return _CompressedStream(iterable, encoder)
+
+    def _length(self, status, headers):
+        """ 响应体长度(未声明时为空); 不应压缩时返回 False """
+        if status[:3] in ("204", "206", "304") or status[0] == "1":
+            return False
+        length = None
+        for key, value in headers:
+            key = key.lower()
+            if key == "content-encoding":
+                return False
+            if key == "content-type":
+                if value.split(";", 1)[0].strip().lower() not in self.mimetypes:
+                    return False
+            elif key == "content-length":
+                length = int(value)
+        if not any(key.lower() == "content-type" for key, _ in headers):
+            return False
+        return length
+
+
+class _CompressedStream:
+    """ 流式响应逐块压缩; 每块都同步刷新, 客户端可立即解压已收到的部分 """
+
+    def __init__(self, iterable: Iterable[bytes], encoder):
+        self._iterable = iterable
+        self._encoder = encoder
+        self._input = 0
+        self._output = 0
+        self._cpu = 0.0
+
+    def __iter__(self):
+        encoder = self._encoder
+        for chunk in self._iterable:
+            if not chunk:
+                continue
+            started = time.thread_time()
+            data = encoder.compress(chunk) + encoder.flush()
+            self._cpu += time.thread_time() - started
+            self._input += len(chunk)
+            self._output += len(data)
+            yield data
+        started = time.thread_time()
+        data = encoder.finish()
+        self._cpu += time.thread_time() - started
+        self._output += len(data)
+        yield data
+
+    def close(self):
+        _close(self._iterable)
+        _record(self._input, self._output, self._cpu)
+
+
+def _record(size: int, compressed: int, cpu: float):
+    metrics.inc("compression_responses_total")
+    metrics.inc("compression_input_bytes_total", (), size)
+    metrics.inc("compression_saved_bytes_total", (), size - compressed)
+    metrics.inc("compression_cpu_seconds_total", (), cpu)
+
+
+def _unsupported_write(data):
+    raise RuntimeError("响应压缩不支持 WSGI write(), 请返回可迭代的响应体")
+
+
+def _close(iterable):
+    close = getattr(iterable, "close", None)
+    if close is not None:
+        close()
+
+
+def _vary(headers):
+    """ 缓存按 Accept-Encoding 区分压缩与未压缩的响应 """
+    for i, (key, value) in enumerate(headers):
+        if key.lower() == "vary":
+            if "accept-encoding" not in value.lower() and value.strip() != "*":
+                headers[i] = (key, f"{value}, Accept-Encoding")
+            return headers
+    headers.append(("Vary", "Accept-Encoding"))
+    return headers
+
+
+def _weak_etag(headers):
+    """ 压缩后的响应体与原响应体字节不同, 强 ETag 转为弱 ETag """
+    return [(key, f"W/{value}") if key.lower() == "etag" and not value.startswith("W/") else (key, value)
+            for key, value in headers]
@@ -0,0 +1,44 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-19 03:40:00
+# description: 条件请求 (ETag / Last-Modified / 304)
+
+__all__ = ["conditional"]
+
+import hashlib
+
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+from flask import Response, request
+
+
+def conditional(version: Tuple[Any, ...], last_modified: Optional[datetime],
+                build: Callable[[], Response]) -> Response:
+    """
+    条件请求
+    1.ETag 由资源的版本信号(轻量查询得到的 更新时间/行数 等)计算, 不依赖响应体;
+      响应体含每次不同的耗时字段, 因此使用弱 ETag
+    2.If-None-Match 优先; 未携带时按 If-Modified-Since 比较(精确到秒)
+    3.未变化时直接返回 304, 不调用 build(不查询、不构造 ApiResponse)
+    4.集合资源不传最后修改时间: 删除行不改变剩余行的修改时间, 只能由 ETag(含行数与最大id)验证
+    :param version:       版本信号
+    :param last_modified: 最后修改时间(UTC, 为空时不返回 Last-Modified, 也不处理 If-Modified-Since)
+    :param build:         构造完整响应
+    """
+    etag = hashlib.blake2b(repr(version).encode("utf-8"), digest_size=12).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0)
+    if request.if_none_match:
+        modified = not request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        modified = last_modified > request.if_modified_since.replace(tzinfo=None)
+    else:
+        modified = True
+    response = build() if modified else Response(status=304)
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # 客户端每次使用前重新验证
+    response.cache_control.no_cache = True
+    return response
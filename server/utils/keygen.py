@@ -0,0 +1,35 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 15:40:00
+# description: 密钥生成
+
+__all__ = ["generate_keys", "valid_key"]
+
+import secrets
+import string
+
+from typing import List, Text
+
+# 密钥字符集(62个字符)
+ALPHABET = (string.digits + string.ascii_letters).encode("ascii")
+# 字节值 → 字符 的映射表; 大于等于 248 (62的整数倍) 的字节直接丢弃, 避免取模偏差
+_TABLE = bytes(ALPHABET[b % len(ALPHABET)] for b in range(256))
+_REJECT = bytes(range(len(ALPHABET) * (256 // len(ALPHABET)), 256))
+
+
+def generate_keys(count: int, length: int = 32) -> List[Text]:
+    """ 批量生成密钥(CSPRNG, 一次读取随机字节后整体映射) """
+    need = count * length
+    pool = b""
+    while len(pool) < need:
+        # 约 3% 的字节会被丢弃, 多取一些减少循环次数
+        raw = secrets.token_bytes((need - len(pool)) * 33 // 32 + 64)
+        pool += raw.translate(_TABLE, _REJECT)
+    text = pool[:need].decode("ascii")
+    return [text[i:i + length] for i in range(0, need, length)]
+
+
+def valid_key(value, length: int = 32) -> bool:
+    """ 是否符合密钥格式(定长, 字符均在密钥字符集内) """
+    return isinstance(value, str) and len(value) == length and value.isascii() and value.isalnum()
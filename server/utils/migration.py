@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 18:20:00
+# description: 数据库迁移版本
+
+__all__ = ["head_revisions", "current_revisions", "pending", "migration_lock"]
+
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import FrozenSet, Text
+from sqlalchemy import inspect, text
+
+# alembic 版本表
+VERSION_TABLE = "alembic_version"
+
+
+@lru_cache(maxsize=8)
+def head_revisions(directory: Text) -> FrozenSet[Text]:
+    """ 迁移脚本的最新版本(脚本在进程生命周期内不变, 只解析一次) """
+    # alembic 导入较慢, 首次检查时再导入
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    config = Config()
+    config.set_main_option("script_location", directory)
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+def current_revisions(connection) -> FrozenSet[Text]:
+    """ 数据库当前版本(直接查询版本表, 避免每次构造 MigrationContext) """
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return frozenset()
+    return frozenset(connection.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalars())
+
+
+def pending(connection, heads: FrozenSet[Text]) -> bool:
+    """ 数据库版本是否落后于迁移脚本(查询后立即结束事务, 再次检查时读到最新数据) """
+    try:
+        return current_revisions(connection) != heads
+    finally:
+        connection.rollback()
+
+
+@contextmanager
+def migration_lock(connection, timeout: float):
+    """
+    迁移锁: 多个副本同时部署时只有一个执行迁移, 其余等待锁释放后再次检查版本
+    MySQL 使用咨询锁 GET_LOCK(会话级, 连接断开时自动释放); SQLite 为本地文件, 不加锁
+    """
+    if connection.dialect.name != "mysql":
+        yield
+        return
+    # 锁名在 MySQL 实例内全局有效, 按数据库区分
+    name = f"{connection.engine.url.database}.migrate"[:64]
+    acquired = connection.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}).scalar()
+    if acquired != 1:
+        raise TimeoutError(f"等待迁移锁超时: {name} ({timeout}秒)")
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+        connection.rollback()
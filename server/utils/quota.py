@@ -0,0 +1,69 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 22:00:00
+# description: 限流键与额度
+
+__all__ = ["valid_quota", "rate_limit_key", "rate_limit_quota", "unverified", "key_quota_key", "key_quota"]
+
+from functools import lru_cache
+from typing import Text
+from flask import current_app, g, request
+from flask_limiter.util import get_remote_address
+from limits import parse_many
+
+
+@lru_cache(maxsize=256)
+def valid_quota(value: Text) -> bool:
+    """ 限流规则是否合法(如 100 per minute;1000 per hour) """
+    if not value or len(value) > 64:
+        return False
+    try:
+        return bool(parse_many(value))
+    except ValueError:
+        return False
+
+
+def _verified_credential():
+    """ 签名已校验通过的调用方凭据(未校验或校验失败时为空) """
+    auth = g.get("auth")
+    # 应用上下文可能跨越多个请求(如测试客户端), 按请求头对象区分请求
+    if auth is None or not auth.signed or auth.headers is not request.headers:
+        return None
+    return auth.credential
+
+
+def rate_limit_key() -> Text:
+    """
+    全局限流键: 按来源IP计数
+    (签名校验前不信任请求头中的访问密钥, 冒用他人密钥的请求不计入该密钥的额度)
+    """
+    return f"ip:{get_remote_address()}"
+
+
+def rate_limit_quota() -> Text:
+    """ 全局限流额度: 匿名额度 """
+    return current_app.config["RATELIMIT_ANONYMOUS_QUOTA"]
+
+
+def unverified(response) -> bool:
+    """ 全局额度只扣减签名未校验通过的请求(校验通过的请求扣减密钥额度) """
+    return _verified_credential() is None
+
+
+def key_quota_key() -> Text:
+    """ 密钥限流键: 按签名校验通过的访问密钥计数 """
+    return f"ak:{_verified_credential().access_key}"
+
+
+def key_quota() -> Text:
+    """ 密钥限流额度: 机器用户单独配置 > 角色额度 > 默认额度 """
+    config = current_app.config
+    credential = _verified_credential()
+    if credential is None:
+        # 限流组件在请求开始时也会解析该额度(仅用于合并规则), 此时尚未校验签名
+        return config["RATELIMIT_KEY_QUOTA"]
+    if credential.rate_limit:
+        return credential.rate_limit
+    from server.service.role import role_table
+    return config["RATELIMIT_ROLE_QUOTAS"].get(role_table.name(credential.role_id), config["RATELIMIT_KEY_QUOTA"])
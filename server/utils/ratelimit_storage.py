@@ -0,0 +1,213 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 21:10:00
+# description: 多进程共享的限流存储 (mmap://)
+
+__all__ = ["MmapStorage"]
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+from contextlib import contextmanager
+from math import floor
+from urllib.parse import parse_qs, urlparse
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport
+
+# 文件头: 魔数 / 版本 / 槽位数
+HEADER = struct.Struct("<8sII48x")
+MAGIC = b"RLMMAP\x00\x00"
+VERSION = 1
+# 槽位(64字节, 与缓存行对齐): 键哈希(2×u64) / 过期时间 / 窗口编号 / 当前窗口计数 / 上一窗口计数
+SLOT = struct.Struct("<QQdqqq16x")
+# 每组槽位数; 键只在所属组内查找, 加锁粒度为组
+GROUP_SLOTS = 8
+GROUP_BYTES = GROUP_SLOTS * SLOT.size
+# 进程内线程锁分段数(文件锁只在进程间互斥)
+THREAD_STRIPES = 64
+
+# 已打开的存储(fork 后在子进程中重建线程锁)
+_instances = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for storage in list(_instances):
+        storage._locks = [threading.Lock() for _ in range(THREAD_STRIPES)]
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class MmapStorage(Storage, SlidingWindowCounterSupport):
+    """
+    mmap 共享限流存储(单机多 worker)
+    1.计数保存在 mmap 映射的文件中, 同一主机上的全部 worker 共享同一份计数, 重启 worker 不清零
+    2.文件划分为固定大小的槽位, 每 8 个槽位一组(组相联), 键哈希决定所属组;
+      组内没有空位时淘汰最早过期的槽位(有损, 槽位数应远大于活跃键数)
+    3.每次更新只锁所属组的字节范围(fcntl 记录锁 + 进程内分段线程锁)
+    4.滑动窗口计数在同一槽位内保存当前与上一窗口的计数, 判断与计数在一次加锁内完成, 无需回退
+    URI: mmap:///path/to/ratelimit.mmap?slots=65536
+    """
+
+    STORAGE_SCHEME = ["mmap"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri)
+        query = parse_qs(parsed.query)
+        slots = int(options.get("slots") or query.get("slots", [65536])[0])
+        self.path = parsed.path
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.slots = self._initialize(slots)
+        self.groups = self.slots // GROUP_SLOTS
+        self._map = mmap.mmap(self._fd, HEADER.size + self.slots * SLOT.size)
+        self._locks = [threading.Lock() for _ in range(THREAD_STRIPES)]
+        _instances.add(self)
+
+    def _initialize(self, slots: int) -> int:
+        """ 首个进程写入文件头; 之后的进程以文件头中的槽位数为准 """
+        slots = max(GROUP_SLOTS, slots // GROUP_SLOTS * GROUP_SLOTS)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, HEADER.size, 0, os.SEEK_SET)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            if len(header) == HEADER.size:
+                magic, version, existing = HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{self.path} 不是限流存储文件")
+                return existing
+            os.ftruncate(self._fd, HEADER.size + slots * SLOT.size)
+            os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, slots), 0)
+            return slots
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, HEADER.size, 0, os.SEEK_SET)
+
+    @property
+    def base_exceptions(self):
+        return OSError, ValueError
+
+    @contextmanager
+    def _group(self, key: str):
+        """ 锁定键所属的组, 返回 (组内首个槽位偏移, 键哈希) """
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        # 哈希 0 表示空槽位
+        h1 = h1 or 1
+        group = h2 % self.groups
+        offset = HEADER.size + group * GROUP_BYTES
+        with self._locks[group % THREAD_STRIPES]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, GROUP_BYTES, offset, os.SEEK_SET)
+            try:
+                yield offset, h1, h2
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, GROUP_BYTES, offset, os.SEEK_SET)
+
+    def _find(self, offset: int, h1: int, h2: int, now: float, create: bool):
+        """ 组内查找槽位, 返回 (槽位偏移, 槽位内容); 未找到且不创建时返回 (None, None) """
+        free, victim, victim_expiry = None, None, None
+        for position in range(offset, offset + GROUP_BYTES, SLOT.size):
+            slot = SLOT.unpack_from(self._map, position)
+            if slot[0] == h1 and slot[1] == h2:
+                if slot[2] > now:
+                    return position, slot
+                return position, (h1, h2, 0.0, 0, 0, 0)
+            if free is None and (slot[0] == 0 or slot[2] <= now):
+                free = position
+            elif victim_expiry is None or slot[2] < victim_expiry:
+                victim, victim_expiry = position, slot[2]
+        if not create:
+            return None, None
+        return (free if free is not None else victim), (h1, h2, 0.0, 0, 0, 0)
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._group(key) as (offset, h1, h2):
+            position, slot = self._find(offset, h1, h2, now, create=True)
+            expires = slot[2] if slot[2] > now else now + expiry
+            count = slot[4] + amount
+            SLOT.pack_into(self._map, position, h1, h2, expires, 0, count, 0)
+        return count
+
+    def get(self, key: str) -> int:
+        now = time.time()
+        with self._group(key) as (offset, h1, h2):
+            _, slot = self._find(offset, h1, h2, now, create=False)
+        return slot[4] if slot else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self._group(key) as (offset, h1, h2):
+            _, slot = self._find(offset, h1, h2, now, create=False)
+        return slot[2] if slot and slot[2] else now
+
+    def clear(self, key: str) -> None:
+        with self._group(key) as (offset, h1, h2):
+            position, _ = self._find(offset, h1, h2, time.time(), create=False)
+            if position is not None:
+                SLOT.pack_into(self._map, position, 0, 0, 0.0, 0, 0, 0)
+
+    def check(self) -> bool:
+        return not self._map.closed
+
+    def reset(self) -> int:
+        """ 清空全部槽位, 返回清空前的有效槽位数 """
+        now = time.time()
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slots * SLOT.size, HEADER.size, os.SEEK_SET)
+            try:
+                count = sum(SLOT.unpack_from(self._map, position)[2] > now
+                            for position in range(HEADER.size, len(self._map), SLOT.size))
+                self._map[HEADER.size:] = bytes(self.slots * SLOT.size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slots * SLOT.size, HEADER.size, os.SEEK_SET)
+        finally:
+            for lock in self._locks:
+                lock.release()
+        return count
+
+    def _window(self, slot, now: float, expiry: int):
+        """ 滚动到当前窗口, 返回 (窗口编号, 上一窗口计数, 当前窗口计数) """
+        window = int(now // expiry)
+        if slot[3] == window:
+            return window, slot[5], slot[4]
+        if slot[3] == window - 1:
+            return window, slot[4], 0
+        return window, 0, 0
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._group(key) as (offset, h1, h2):
+            position, slot = self._find(offset, h1, h2, now, create=True)
+            window, previous, current = self._window(slot, now, expiry)
+            weight = 1 - (now % expiry) / expiry
+            if floor(previous * weight + current) + amount > limit:
+                return False
+            # 保留到下一个窗口结束(届时本窗口成为上一窗口)
+            SLOT.pack_into(self._map, position, h1, h2, float((window + 2) * expiry), window,
+                           current + amount, previous)
+        return True
+
+    def get_sliding_window(self, key: str, expiry: int):
+        now = time.time()
+        with self._group(key) as (offset, h1, h2):
+            _, slot = self._find(offset, h1, h2, now, create=False)
+        if slot is None:
+            previous, current = 0, 0
+        else:
+            _, previous, current = self._window(slot, now, expiry)
+        remaining = (1 - (now % expiry) / expiry) * expiry
+        return previous, (remaining if previous else 0.0), current, remaining + expiry
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        self.clear(key)
@@ -0,0 +1,150 @@
+# -*- coding: UTF-8 -*-
+# author:      Liu Kun
+# email:       liukunup@outlook.com
+# timestamp:   2026-10-18 11:05:00
+# description: 签名计算 (规范化请求 + 增量HMAC)
+
+__all__ = ["new_signer", "CanonicalRequest", "SpooledBody", "sign", "sign_stream", "verify"]
+
+import hashlib
+import hmac
+
+from tempfile import SpooledTemporaryFile
+from typing import Text, Any, Iterable
+from server.bean.error import InvalidParamException
+
+# 字段分隔符
+SEPARATOR = b";"
+
+
+def new_signer(secret_key: Text) -> "hmac.HMAC":
+    """ 预计算私钥对应的HMAC状态, 每次签名时 copy() 复用 """
+    return hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def _to_bytes(value: Any) -> bytes:
+    if type(value) is str:
+        return value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    return str(value).encode("utf-8")
+
+
+def _get_header(headers, name: Text):
+    """ 兼容大小写敏感的字典与 werkzeug Headers """
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.lower())
+    return value
+
+
+def _lower_key(item) -> Text:
+    return str(item[0]).lower()
+
+
+def _canonical_prefix(params, headers) -> bytes:
+    """ 路径参数(按键排序) + X-Keys 指定的请求头, 以 ; 连接 """
+    keys = _get_header(headers, "X-Keys")
+    if not isinstance(keys, str) or len(keys) == 0:
+        raise InvalidParamException(error="字段 X-Keys 未配置", value=keys,
+                                    suggestions=["请参考 README.md 文档"])
+    # 参数名按小写排序(参数名不区分大小写)
+    fields = [_to_bytes(v) for _, v in sorted(params.items(), key=_lower_key)] if params else list()
+    fields.extend(_to_bytes(_get_header(headers, k.strip())) for k in keys.split(","))
+    return SEPARATOR.join(fields)
+
+
+class CanonicalRequest:
+    """
+    规范化请求
+    签名内容为 路径参数 -> X-Keys 指定的请求头 -> 请求体(非空时) -> 公钥, 以 ; 连接;
+    短字段合并后一次写入HMAC, 请求体按原始字节(可分块)直接写入, 不拼接整体字符串
+    """
+
+    __slots__ = ("_mac", "_has_body", "_parts")
+
+    def __init__(self, signer: "hmac.HMAC", params, headers, debug=False):
+        self._mac = signer.copy()
+        self._has_body = False
+        prefix = _canonical_prefix(params, headers)
+        self._mac.update(prefix)
+        # 调试模式下保留签名内容
+        self._parts = [prefix] if debug else None
+
+    def update_body(self, chunk):
+        """ 写入请求体(可多次调用, 空块忽略) """
+        if not chunk:
+            return
+        if not self._has_body:
+            self._mac.update(SEPARATOR)
+            self._has_body = True
+        self._mac.update(chunk)
+        if self._parts is not None:
+            self._parts.append(bytes(chunk))
+
+    def hexdigest(self, access_key: Text) -> Text:
+        """ 写入公钥并返回签名值 """
+        suffix = SEPARATOR + access_key.encode("utf-8")
+        self._mac.update(suffix)
+        if self._parts is not None:
+            head, body = self._parts[0], b"".join(self._parts[1:])
+            print((head + (SEPARATOR + body if body else b"") + suffix).decode("utf-8", errors="replace"))
+        return self._mac.hexdigest()
+
+
+def sign(signer: "hmac.HMAC", access_key: Text, params, headers, body, debug=False) -> Text:
+    """ 计算签名值 """
+    canonical = CanonicalRequest(signer, params, headers, debug=debug)
+    if body:
+        canonical.update_body(_to_bytes(body))
+    return canonical.hexdigest(access_key)
+
+
+def sign_stream(signer: "hmac.HMAC", access_key: Text, params, headers, chunks: Iterable[bytes]) -> Text:
+    """ 分块计算签名值(请求体不整体载入内存) """
+    canonical = CanonicalRequest(signer, params, headers)
+    for chunk in chunks:
+        canonical.update_body(chunk)
+    return canonical.hexdigest(access_key)
+
+
+class SpooledBody:
+    """
+    请求体缓冲
+    分块读取输入流, 每块在参与签名计算的同时写入 SpooledTemporaryFile,
+    超过内存阈值后自动落盘, 单请求内存占用与请求体大小无关
+    """
+
+    def __init__(self, stream, max_memory=1 << 20, chunk_size=1 << 16):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._spool = SpooledTemporaryFile(max_size=max_memory)
+        self.size = 0
+
+    def chunks(self):
+        """ 读取输入流并写入缓冲 """
+        read, write = self._stream.read, self._spool.write
+        while True:
+            chunk = read(self._chunk_size)
+            if not chunk:
+                break
+            write(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    def rewind(self):
+        """ 读完剩余输入并回到缓冲起始位置 """
+        for _ in self.chunks():
+            pass
+        self._spool.seek(0)
+        return self._spool
+
+    def close(self):
+        self._spool.close()
+
+
+def verify(expected: Text, actual: Text) -> bool:
+    """ 常量时间比较签名值 """
+    if not isinstance(actual, str):
+        return False
+    return hmac.compare_digest(expected.encode("ascii"), actual.encode("ascii", errors="replace"))
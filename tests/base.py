@@ -1,51 +1,135 @@
+import json
 import os
+import sqlite3
+import time
 import unittest
+import uuid
 
-from app import create_app, db
-from app.model.system import Role, App
+from server import create_app, db, limiter
+from server.model.rbca import Role, MachineUser
+from server.service.audit import audit_trail
+from server.service.credential import credential_cache
+from server.service.usage import key_usage
+from server.utils.authentication import Authentication
+
+
+class _Database:
+    """
+    进程内共享的测试应用与数据库快照
+    应用与数据表在每个进程中只创建一次; 写入默认数据后保存快照, 每个用例结束后从快照恢复
+    """
+
+    app = None
+    connection = None
+    snapshot = None
+    # 超级管理员密钥对
+    access_key = None
+    secret_key = None
+
+    @classmethod
+    def prepare(cls):
+        if cls.app is not None:
+            return
+        app = create_app(os.getenv("FLASK_CONFIG") or "testing")
+        if not limiter.enabled:
+            # 限流默认关闭, 但仍需注册请求钩子, 由用例按需开启(limiter.enabled)
+            app.config["RATELIMIT_ENABLED"] = True
+            limiter.init_app(app)
+            app.config["RATELIMIT_ENABLED"] = limiter.enabled = False
+        with app.app_context():
+            # StaticPool: 全部连接共享同一个内存数据库连接
+            proxy = db.engine.raw_connection()
+            connection = proxy.driver_connection
+            proxy.close()
+            if not isinstance(connection, sqlite3.Connection):
+                raise RuntimeError("测试基类需要 SQLite 数据库(TestingConfig 默认使用 sqlite://)")
+            db.create_all()
+            Role.insert_roles()
+            admin = MachineUser(name="super-admin", owner="tests", desc="This is a super administrator.",
+                                role=Role.query.filter_by(name="Administrator").first())
+            db.session.add(admin)
+            db.session.commit()
+            cls.access_key, cls.secret_key = admin.access_key, admin.secret_key
+            db.session.remove()
+        cls.snapshot = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.backup(cls.snapshot)
+        cls.app, cls.connection = app, connection
+
+    @classmethod
+    def restore(cls):
+        """ SQLite 备份接口整库恢复(微秒级), 用例内已提交的数据同样被撤销 """
+        if cls.connection.in_transaction:
+            cls.connection.rollback()
+        cls.snapshot.backup(cls.connection)
+        credential_cache.clear()
+        audit_trail.clear()
+        key_usage.clear()
 
 
 class BaseTest(unittest.TestCase):
     """
     测试基类
+    1.测试环境使用内存 SQLite(StaticPool), 不依赖外部服务
+    2.每个进程只创建一次应用与数据表; 每个用例结束后恢复到初始数据(角色 & 超级管理员), 用例之间互不影响
+    3.signed_headers / signed 按 README 中的签名方法构造请求
     """
 
     # 超级管理员密钥对
-    access_key = "暂未配置"
-    secret_key = "暂未配置"
+    access_key = None
+    secret_key = None
 
     def setUp(self):
-        # 创建应用（默认使用测试环境配置）
-        self.app = create_app(os.getenv("FLASK_CONFIG") or "testing")
+        _Database.prepare()
+        self.app = _Database.app
+        self.access_key, self.secret_key = _Database.access_key, _Database.secret_key
         # 获取上下文 并压入配置
         self.app_context = self.app.app_context()
         self.app_context.push()
         # 获取客户端实例
         self.client = self.app.test_client()
-        # 创建数据表
-        db.create_all()
-        # 创建默认角色
-        Role.insert_roles()
-        # 创建超级管理员
-        App.add_super_admin(os.getenv("SUPER_ADMIN"), "This is a super administrator.", "Admin")
-        # 获取超级管理员
-        self.getSuperAdmin()
 
     def tearDown(self):
         # 移除数据库会话
         db.session.remove()
-        # 删除数据表
-        db.drop_all()
+        # 恢复初始数据
+        _Database.restore()
         # 弹出上下文
         self.app_context.pop()
 
-    def getSuperAdmin(self):
-        """查询超级管理员"""
-        app = db.session.query(App).filter(App.id == 1).first()
-        self.assertIsNotNone(app)
-        self.assertEqual(app.role.name, "Administrator")
-        self.access_key = app.access_key
-        self.secret_key = app.secret_key
+    def create_user(self, role="Follower", **kwargs):
+        """ 创建机器用户, 返回 (access_key, secret_key) """
+        kwargs.setdefault("name", f"user-{uuid.uuid4().hex[:8]}")
+        kwargs.setdefault("owner", "tests")
+        user = MachineUser(role=Role.query.filter_by(name=role).first(), **kwargs)
+        db.session.add(user)
+        db.session.commit()
+        return user.access_key, user.secret_key
+
+    def signed_headers(self, body=b"", params=None, access_key=None, secret_key=None, headers=None):
+        """ 签名请求头(默认使用超级管理员密钥, 每次生成新的随机数与时间戳) """
+        access_key = access_key or self.access_key
+        secret_key = secret_key or self.secret_key
+        headers = dict({
+            "X-Access-Key": access_key,
+            "X-Timestamp": str(int(time.time() * 1000)),
+            "X-Nonce": uuid.uuid4().hex,
+            "X-Keys": "X-Access-Key,X-Timestamp,X-Nonce",
+        }, **(headers or {}))
+        headers["X-Signature"] = Authentication.calculate_signature(access_key, secret_key, params or {}, headers,
+                                                                    body)
+        return headers
+
+    def signed(self, method, path, body=None, params=None, access_key=None, secret_key=None, headers=None):
+        """ 发送签名请求; body 为 dict/list 时以 JSON 提交 """
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        body = body or b""
+        headers = self.signed_headers(body, params, access_key, secret_key, headers)
+        return self.client.open(path, method=method, query_string=params, data=body, headers=headers)
 
     def expectRet(self, obj):
         self.assertIsNotNone(obj, "预期响应体不为None.")
@@ -56,6 +140,6 @@ class BaseTest(unittest.TestCase):
         self.expectRet(obj)
         self.assertEqual(obj["code"], 200, f"预期字段code值为200. message={obj['message']}")
 
-    def expectFail(self, obj):
+    def expectFail(self, obj, code=-1):
         self.expectRet(obj)
-        self.assertEqual(obj["code"], -1, f"预期字段code值为-1. message={obj['message']}")
+        self.assertEqual(obj["code"], code, f"预期字段code值为{code}. message={obj['message']}")
@@ -0,0 +1,77 @@
+"""
+多进程测试执行 (python -m tests.runner -j 4 [模块名 ...])
+以测试模块为单位分配到各进程, 每个进程只创建一次测试应用与数据表
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+
+# 测试目录
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(pattern="test*.py"):
+    """ 测试模块名列表 """
+    return sorted(f"tests.{name[:-3]}" for name in os.listdir(TESTS_DIR)
+                  if name.endswith(".py") and fnmatch(name, pattern))
+
+
+def _run_module(name, verbosity):
+    stream = io.StringIO()
+    started = time.perf_counter()
+    suite = unittest.TestLoader().loadTestsFromName(name)
+    result = unittest.TextTestRunner(stream=stream, verbosity=verbosity).run(suite)
+    return {
+        "module": name,
+        "run": result.testsRun,
+        "failures": len(result.failures),
+        "errors": len(result.errors),
+        "skipped": len(result.skipped),
+        "ok": result.wasSuccessful(),
+        "seconds": time.perf_counter() - started,
+        "output": stream.getvalue(),
+    }
+
+
+def run(names=None, processes=None, verbosity=1) -> bool:
+    """ 执行测试模块(默认全部), 返回是否全部通过 """
+    names = list(names or discover())
+    processes = max(1, min(processes or os.cpu_count() or 1, len(names)))
+    started = time.perf_counter()
+    if processes == 1:
+        results = [_run_module(name, verbosity) for name in names]
+    else:
+        # fork: 子进程无需重新导入测试依赖
+        context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+        with ProcessPoolExecutor(processes, mp_context=context) as executor:
+            results = list(executor.map(_run_module, names, [verbosity] * len(names)))
+    for result in results:
+        if verbosity > 1 or not result["ok"]:
+            sys.stderr.write(result["output"])
+    total = {key: sum(result[key] for result in results) for key in ("run", "failures", "errors", "skipped")}
+    ok = all(result["ok"] for result in results)
+    sys.stderr.write(f"\n{len(names)} 个模块, {total['run']} 个用例, 失败 {total['failures']}, 错误 {total['errors']}, "
+                     f"跳过 {total['skipped']}, {processes} 个进程, 耗时 {time.perf_counter() - started:.2f}s "
+                     f"- {'OK' if ok else 'FAILED'}\n")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("names", nargs="*", help="测试模块名(默认全部)")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="进程数(默认为CPU数)")
+    parser.add_argument("-v", "--verbosity", type=int, default=1, help="输出详细程度")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.names, args.processes, args.verbosity) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import inspect
+import threading
+import unittest
+
+from flask import Flask, Response
+from server.service.offload import BlockingPool, blocking_pool
+from server.utils.asgi import AsgiApp
+from server.utils.authentication import _guard
+
+
+def call(app, method, path, body=b""):
+    """ 以 ASGI 协议调用应用, 返回 (状态码, 响应头, 响应体) """
+    scope = {"type": "http", "http_version": "1.1", "method": method, "path": path, "query_string": b"",
+             "headers": [(b"content-type", b"text/plain")], "server": ("testserver", 80), "client": ("127.0.0.1", 1)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = list()
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    headers = dict((k.decode(), v.decode()) for k, v in sent[0]["headers"])
+    return sent[0]["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+class AsgiTestCase(unittest.TestCase):
+    """
+    ASGI 适配测试用例
+    """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["SIGNATURE_SPOOL_MAX_MEMORY"] = 1024
+        self.closed = list()
+
+        @self.app.route("/echo", methods=["POST"])
+        def echo():
+            from flask import request
+            response = Response((chunk for chunk in (b"thread:", threading.current_thread().name.encode(), b":",
+                                                     request.get_data())), mimetype="text/plain")
+            response.call_on_close(lambda: self.closed.append(True))
+            return response
+
+        self.asgi = AsgiApp(self.app)
+
+    def test_wsgi_in_pool(self):
+        status, _, body = call(self.asgi, "POST", "/echo", b"hello")
+        self.assertEqual(200, status)
+        self.assertTrue(body.startswith(b"thread:offload"), "预期 WSGI 应用在阻塞调用线程池中执行.")
+        self.assertTrue(body.endswith(b":hello"), "预期请求体完整传递.")
+        self.assertEqual([True], self.closed, "预期响应结束后执行清理回调.")
+
+    def test_native_route(self):
+        async def probe():
+            return Response(b"ok", mimetype="text/plain")
+
+        self.asgi.route("/echo", probe, "probe")
+        status, headers, body = call(self.asgi, "GET", "/echo")
+        self.assertEqual((200, b"ok"), (status, body), "预期协程路由在事件循环中直接应答.")
+        self.assertEqual("text/plain; charset=utf-8", headers["content-type"])
+        # 其他方法仍交给 Flask
+        status, _, body = call(self.asgi, "POST", "/echo", b"x")
+        self.assertTrue(body.startswith(b"thread:offload"))
+
+    def test_async_guard(self):
+        threads = list()
+
+        async def view():
+            return "done"
+
+        guarded = _guard(view, lambda: threads.append(threading.current_thread().name))
+        self.assertTrue(inspect.iscoroutinefunction(guarded), "预期协程视图的装饰结果仍是协程函数.")
+        self.assertEqual("done", asyncio.run(guarded()))
+        self.assertTrue(threads[0].startswith("offload"), "预期校验在阻塞调用线程池中执行.")
+
+    def test_nested_run(self):
+        pool = BlockingPool()
+        pool.threads = 1
+
+        def outer():
+            # 线程池唯一的线程中再次提交, 预期直接执行而不是等待
+            return asyncio.run(pool.run(threading.current_thread().name.upper))
+
+        result = asyncio.run(pool.run(outer))
+        self.assertTrue(result.startswith("OFFLOAD"))
+        self.assertEqual((0, 0), (pool.inflight, pool.queued))
+        pool.shutdown(wait=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        blocking_pool.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
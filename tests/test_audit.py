@@ -0,0 +1,43 @@
+from server.model.audit import AuditLog
+from server.model.rbca import MachineUser
+from server.service.audit import audit_trail
+from tests.base import BaseTest
+
+# 管理员接口(空请求体时不导入任何数据)
+BULK = "/api/machine-users/bulk"
+
+
+class AuditTestCase(BaseTest):
+    """
+    调用审计 测试用例
+    """
+
+    def test_signed_calls_are_audited(self):
+        self.signed("POST", BULK)
+        headers = self.signed_headers()
+        headers["X-Signature"] = headers["X-Signature"][::-1]
+        self.client.post(BULK, headers=headers)
+        self.assertEqual(0, AuditLog.query.count(), "预期请求线程不写入审计记录.")
+
+        self.assertEqual(2, audit_trail.flush())
+        admin = MachineUser.query.filter_by(access_key=self.access_key).first()
+        rows = AuditLog.query.order_by(AuditLog.id).all()
+        self.assertEqual([None, -2002], [row.code for row in rows])
+        self.assertEqual({admin.id}, {row.machine_user_id for row in rows})
+        self.assertEqual({"api.bulk_import_machine_users"}, {row.endpoint for row in rows})
+        self.assertEqual({"POST"}, {row.method for row in rows})
+
+    def test_unauthenticated_endpoints_are_not_audited(self):
+        self.client.get("/api/healthz/liveness")
+        self.assertEqual(0, audit_trail.flush())
+
+    def test_backpressure(self):
+        queue_size, watermark, sample_rate = audit_trail.queue_size, audit_trail.watermark, audit_trail.sample_rate
+        audit_trail.queue_size, audit_trail.watermark, audit_trail.sample_rate = 4, 2, 0.0
+        try:
+            accepted = [audit_trail.record({"code": None}) for _ in range(3)]
+            self.assertEqual([True, True, False], accepted, "预期积压超过水位后成功的调用被抽样丢弃.")
+            accepted = [audit_trail.record({"code": -2002}) for _ in range(3)]
+            self.assertEqual([True, True, False], accepted, "预期失败的调用始终入队, 直到队列已满.")
+        finally:
+            audit_trail.queue_size, audit_trail.watermark, audit_trail.sample_rate = queue_size, watermark, sample_rate
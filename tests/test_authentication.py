@@ -0,0 +1,150 @@
+import json
+import time
+
+from unittest import mock
+from server import limiter
+from server.model.rbca import MachineUser
+from server.service.credential import credential_cache
+from server.utils.signature import SpooledBody
+from tests.base import BaseTest
+
+# 管理员接口(空请求体时不导入任何数据)
+BULK = "/api/machine-users/bulk"
+
+
+class AuthenticationTestCase(BaseTest):
+    """
+    接口签名与权限 测试用例
+    """
+
+    def test_signed(self):
+        resp = self.signed("POST", BULK)
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(b"", resp.data, "预期签名通过, 空请求体不返回导入结果.")
+
+    def test_bad_signature(self):
+        headers = self.signed_headers()
+        headers["X-Signature"] = headers["X-Signature"][::-1]
+        resp = self.client.post(BULK, headers=headers)
+        self.expectFail(resp.json, -2002)
+
+    def test_tampered_body(self):
+        headers = self.signed_headers(b'{"name":"a","owner":"b"}\n')
+        resp = self.client.post(BULK, headers=headers, data=b'{"name":"c","owner":"d"}\n')
+        self.expectFail(resp.json, -2002)
+
+    def test_body_closed_on_failure(self):
+        # 签名校验失败时同样释放请求体缓冲
+        closed = list()
+        close = SpooledBody.close
+        with mock.patch.object(SpooledBody, "close", autospec=True,
+                               side_effect=lambda body: closed.append(body) or close(body)):
+            headers = self.signed_headers(b"a" * 100)
+            self.expectFail(self.client.post(BULK, headers=headers, data=b"b" * 100).json, -2002)
+        self.assertEqual(1, len(closed), "预期关闭请求体缓冲.")
+
+    def test_replay(self):
+        headers = self.signed_headers()
+        self.assertEqual(b"", self.client.post(BULK, headers=headers).data)
+        resp = self.client.post(BULK, headers=headers)
+        self.expectFail(resp.json, -2003)
+
+    def test_expired(self):
+        headers = self.signed_headers(headers={"X-Timestamp": str(int((time.time() - 3600) * 1000))})
+        resp = self.client.post(BULK, headers=headers)
+        self.expectFail(resp.json, -1001)
+
+    def test_nonce_must_be_signed(self):
+        headers = self.signed_headers(headers={"X-Keys": "X-Access-Key"})
+        resp = self.client.post(BULK, headers=headers)
+        self.expectFail(resp.json, -1001)
+
+    def test_unknown_key(self):
+        resp = self.signed("POST", BULK, access_key="0" * 32, secret_key="0" * 32)
+        self.expectFail(resp.json, -1001)
+
+    def test_permission_denied(self):
+        access_key, secret_key = self.create_user("Follower")
+        resp = self.signed("POST", BULK, access_key=access_key, secret_key=secret_key)
+        self.expectFail(resp.json, -2001)
+
+    def test_disabled_key(self):
+        access_key, secret_key = self.create_user("Administrator", is_enabled=False)
+        resp = self.signed("POST", BULK, access_key=access_key, secret_key=secret_key)
+        self.expectFail(resp.json, -2001)
+
+    def test_bulk_import(self):
+        rows = b"".join(json.dumps({"name": f"robot-{i}", "owner": "tests"}).encode() + b"\n" for i in range(3))
+        resp = self.signed("POST", BULK, rows, headers={"Content-Type": "application/x-ndjson"})
+        results = [json.loads(line) for line in resp.data.splitlines()]
+        self.assertEqual(["created"] * 3, [result["status"] for result in results])
+        self.assertEqual(4, MachineUser.query.count())
+
+    def test_isolation(self):
+        # 其他用例创建的用户已被撤销, 只剩超级管理员
+        self.assertEqual(1, MachineUser.query.count(), "预期每个用例从初始数据开始.")
+        self.create_user()
+        self.assertEqual(2, MachineUser.query.count())
+
+    def test_single_lookup(self):
+        # 签名与管理员权限两个装饰器共用同一个鉴权上下文, 审计同样复用已查询到的凭据
+        before = credential_cache.hits + credential_cache.misses
+        self.expectSuccess(self.signed("GET", "/api/machine-users").json)
+        self.assertEqual(1, credential_cache.hits + credential_cache.misses - before, "预期每个请求只查询一次凭据.")
+
+    def test_cache_cleared_during_load(self):
+        # 查询凭据期间缓存被失效(如轮询到版本变化), 查询结果不写入缓存
+        load = credential_cache._load
+
+        def load_then_clear(access_key):
+            record = load(access_key)
+            credential_cache.clear()
+            return record
+
+        credential_cache.clear()
+        credential_cache._load = load_then_clear
+        try:
+            self.assertIsNotNone(credential_cache.get(self.access_key))
+        finally:
+            del credential_cache._load
+        self.assertNotIn(self.access_key, credential_cache._records, "预期失效前查询到的凭据不写入缓存.")
+
+    def _rate_limited(self, **config):
+        """ 临时开启限流并覆盖额度配置(测试配置默认关闭限流) """
+        for patch in (mock.patch.object(limiter, "enabled", True), mock.patch.dict(self.app.config, config)):
+            patch.start()
+            self.addCleanup(patch.stop)
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+
+    def test_key_quota_after_signature(self):
+        # 冒用他人密钥的未签名请求按来源IP计数, 不占用该密钥的额度
+        self._rate_limited(RATELIMIT_ANONYMOUS_QUOTA="100 per minute",
+                           RATELIMIT_ROLE_QUOTAS={"Administrator": "3 per minute"})
+        headers = self.signed_headers()
+        headers["X-Signature"] = headers["X-Signature"][::-1]
+        for _ in range(5):
+            self.expectFail(self.client.post(BULK, headers=headers).json, -2002)
+        for _ in range(3):
+            resp = self.signed("POST", BULK)
+            self.assertEqual(200, resp.status_code, "预期密钥额度未被冒用的请求占用.")
+            self.assertEqual("3", resp.headers["X-RateLimit-Limit"], "预期按角色额度限流.")
+        self.assertEqual(429, self.signed("POST", BULK).status_code, "预期超出密钥额度.")
+
+    def test_anonymous_quota(self):
+        # 未通过签名校验的请求按来源IP使用匿名额度, 与携带的密钥无关
+        self._rate_limited(RATELIMIT_ANONYMOUS_QUOTA="2 per minute")
+        before = credential_cache.hits + credential_cache.misses
+        for access_key in ("x" * 500, self.access_key):
+            self.client.post(BULK, headers={"X-Access-Key": access_key})
+        self.assertEqual(429, self.client.post(BULK, headers={"X-Access-Key": "0" * 32}).status_code,
+                         "预期超出匿名额度.")
+        self.assertEqual(before + 1, credential_cache.hits + credential_cache.misses, "预期格式不合法的密钥不查询凭据缓存.")
+
+    def test_param_case(self):
+        # 参数名按小写排序参与签名
+        resp = self.signed("GET", "/api/machine-users", params={"Zone": "a", "limit": "1"})
+        self.expectSuccess(resp.json)
+
+    def test_liveness(self):
+        self.expectSuccess(self.client.get("/api/healthz/liveness").json)
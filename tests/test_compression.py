@@ -0,0 +1,114 @@
+import gzip
+import json
+import unittest
+import zlib
+
+from flask import Flask, Response
+from server.configs import TestingConfig
+from server.service.metrics import metrics
+from server.utils.compression import Compression
+from tests.base import BaseTest
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object(TestingConfig)
+    app.wsgi_app = app.extensions["compression"] = Compression(app.wsgi_app, app.config)
+
+    @app.route("/text")
+    def text():
+        return Response("x" * 2000, mimetype="text/plain", headers={"ETag": '"abc"'})
+
+    @app.route("/small")
+    def small():
+        return Response("x" * 100, mimetype="text/plain")
+
+    @app.route("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\x00" * 2000, mimetype="image/png")
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"line {i}\n" for i in range(1000)), mimetype="text/plain")
+
+    return app
+
+
+class CompressionTestCase(unittest.TestCase):
+    """
+    Compression 测试用例
+    """
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def test_negotiate(self):
+        compression = self.app.extensions["compression"]
+        self.assertIsNone(compression.negotiate(None), "预期未携带 Accept-Encoding 时不压缩.")
+        self.assertIsNone(compression.negotiate("identity"), "预期不支持的编码不压缩.")
+        self.assertEqual("gzip", compression.negotiate("deflate;q=0.5, gzip"), "预期按 q 值选择编码.")
+        self.assertEqual("deflate", compression.negotiate("deflate, gzip;q=0"), "预期 q=0 的编码不使用.")
+
+    def test_compress(self):
+        saved = metrics._counters.get(("compression_saved_bytes_total", ()), 0)
+        response = self.client.get("/text", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual("gzip", response.headers["Content-Encoding"], "预期使用 gzip 编码.")
+        self.assertEqual(len(response.data), int(response.headers["Content-Length"]), "预期重新声明长度.")
+        self.assertEqual(b"x" * 2000, gzip.decompress(response.data), "预期解压后与原响应体一致.")
+        self.assertIn("Accept-Encoding", response.headers["Vary"], "预期缓存按 Accept-Encoding 区分.")
+        self.assertEqual('W/"abc"', response.headers["ETag"], "预期强 ETag 转为弱 ETag.")
+        self.assertGreater(metrics._counters[("compression_saved_bytes_total", ())], saved, "预期记录节省的字节数.")
+
+    def test_skip(self):
+        response = self.client.get("/text")
+        self.assertNotIn("Content-Encoding", response.headers, "预期未协商编码时不压缩.")
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers, "预期小于阈值的响应不压缩.")
+        self.assertEqual(b"x" * 100, response.data, "预期原样返回.")
+        response = self.client.get("/png", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers, "预期已压缩的类型不再压缩.")
+
+    def test_stream(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "deflate"}, buffered=False)
+        self.assertEqual("deflate", response.headers["Content-Encoding"], "预期流式响应同样压缩.")
+        self.assertNotIn("Content-Length", response.headers, "预期流式响应不声明长度.")
+        decompressor = zlib.decompressobj()
+        chunks = [decompressor.decompress(chunk) for chunk in response.response]
+        self.assertEqual(b"line 0\n", chunks[0], "预期每块压缩后立即可解压.")
+        self.assertEqual("".join(f"line {i}\n" for i in range(1000)).encode(), b"".join(chunks), "预期完整解压.")
+        response.close()
+
+
+class MultipleAppsTestCase(unittest.TestCase):
+    """
+    同一进程内创建多个应用
+    """
+
+    def test_isolated(self):
+        first, second = create_app(), Flask(__name__)
+        second.config.from_object(TestingConfig)
+        second.wsgi_app = Compression(second.wsgi_app, second.config)
+        for headers in ({}, {"Accept-Encoding": "gzip"}):
+            self.assertEqual(200, first.test_client().get("/text", headers=headers).status_code,
+                             "预期各应用的中间件互不影响.")
+            self.assertEqual(404, second.test_client().get("/text", headers=headers).status_code)
+
+
+class ApiCompressionTestCase(BaseTest):
+    """
+    接口响应压缩测试用例
+    """
+
+    def test_machine_users(self):
+        for i in range(20):
+            self.create_user(name=f"user-{i:02d}")
+        response = self.signed("GET", "/api/machine-users", headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual("gzip", response.headers["Content-Encoding"], "预期列表接口压缩.")
+        obj = json.loads(gzip.decompress(response.data))
+        self.expectSuccess(obj)
+        self.assertEqual(21, len(obj["payload"]["items"]), "预期解压后内容完整.")
+
+
+if __name__ == '__main__':
+    unittest.main()
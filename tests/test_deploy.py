@@ -0,0 +1,77 @@
+from sqlalchemy import text
+from server import db
+from server.model.cache import CacheVersion
+from server.model.rbca import Permission, Role, _upsert
+from server.service.credential import CREDENTIAL_VERSION
+from server.utils.migration import head_revisions, pending, migration_lock
+from tests.base import BaseTest
+
+
+class DeployTestCase(BaseTest):
+    """
+    发布命令 测试用例
+    """
+
+    def test_insert_roles_unchanged(self):
+        with db.engine.connect() as connection:
+            version = CacheVersion.current(connection, CREDENTIAL_VERSION)
+        self.assertFalse(Role.insert_roles(), "预期角色与默认角色一致时不写入.")
+        with db.engine.connect() as connection:
+            self.assertEqual(version, CacheVersion.current(connection, CREDENTIAL_VERSION), "预期不递增缓存版本.")
+
+    def test_insert_roles_upsert(self):
+        role = Role.query.filter_by(name="Owner").first()
+        role_id = role.id
+        role.permissions = Permission.READ
+        db.session.commit()
+        db.session.remove()
+        with db.engine.connect() as connection:
+            version = CacheVersion.current(connection, CREDENTIAL_VERSION)
+        self.assertTrue(Role.insert_roles(), "预期恢复被修改的角色.")
+        role = Role.query.filter_by(name="Owner").first()
+        self.assertEqual((role_id, Permission.READ | Permission.WRITE | Permission.UPDATE | Permission.DELETE),
+                         (role.id, role.permissions), "预期按角色名更新, 不新增记录.")
+        self.assertEqual(4, Role.query.count())
+        with db.engine.connect() as connection:
+            self.assertEqual(version + 1, CacheVersion.current(connection, CREDENTIAL_VERSION), "预期递增缓存版本.")
+
+    def test_insert_roles_touches_changed_rows_only(self):
+        times = {role.name: role.update_time for role in Role.query.all()}
+        Role.query.filter_by(name="Owner").first().permissions = Permission.READ
+        db.session.commit()
+        owner_time = Role.query.filter_by(name="Owner").first().update_time
+        db.session.remove()
+        self.assertTrue(Role.insert_roles())
+        for role in Role.query.all():
+            if role.name == "Owner":
+                self.assertGreaterEqual(role.update_time, owner_time, "预期修改的角色更新时间变化.")
+            else:
+                self.assertEqual(times[role.name], role.update_time, "预期未变化的角色不更新时间.")
+
+    def test_upsert_fallback(self):
+        # 不支持 upsert 语法的数据库逐行查询后插入或更新
+        table = Role.__table__
+
+        class Connection:
+            def __init__(self, connection):
+                self.execute = connection.execute
+                self.dialect = type("Dialect", (), {"name": "other"})()
+
+        with db.engine.begin() as connection:
+            _upsert(Connection(connection), table, [
+                {"name": "Owner", "permissions": 1, "is_default": False},
+                {"name": "Auditor", "permissions": 1, "is_default": False},
+            ], "name", ("permissions", "is_default"))
+        self.assertEqual(1, Role.query.filter_by(name="Owner").first().permissions)
+        self.assertEqual(1, Role.query.filter_by(name="Auditor").first().permissions)
+        self.assertEqual(5, Role.query.count())
+
+    def test_pending(self):
+        heads = head_revisions(self.app.config["MIGRATIONS_DIRECTORY"])
+        with db.engine.connect() as connection:
+            self.assertTrue(pending(connection, heads), "预期没有版本表时需要迁移.")
+            connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            connection.execute(text("INSERT INTO alembic_version VALUES (:v)"), [{"v": v} for v in heads])
+            connection.commit()
+            with migration_lock(connection, 1):
+                self.assertFalse(pending(connection, heads), "预期已是最新版本时跳过迁移.")
@@ -0,0 +1,125 @@
+from server import db
+from server.model.rbca import MachineUser, Role
+from tests.base import BaseTest
+
+# 机器用户管理接口
+USERS = "/api/machine-users"
+
+
+class MachineUserTestCase(BaseTest):
+    """
+    机器用户管理接口 测试用例
+    """
+
+    def setUp(self):
+        super().setUp()
+        roles = {role.name: role for role in Role.query.all()}
+        db.session.add_all(MachineUser(name=f"robot-{i:02d}", owner="team-a" if i % 2 else "team-b",
+                                       role=roles["Executor" if i % 3 else "Follower"], is_enabled=i != 7)
+                           for i in range(1, 11))
+        db.session.commit()
+
+    def pages(self, limit, **params):
+        """ 按游标翻页, 返回每页的名称列表 """
+        pages, cursor = list(), None
+        while True:
+            query = dict(params, limit=limit, **({"cursor": cursor} if cursor is not None else {}))
+            obj = self.signed("GET", USERS, params=query).json
+            self.expectSuccess(obj)
+            pages.append([item["name"] for item in obj["payload"]["items"]])
+            cursor = obj["payload"]["nextCursor"]
+            if cursor is None:
+                return pages
+
+    def test_keyset_pagination(self):
+        pages = self.pages(4)
+        self.assertEqual([4, 4, 3], [len(page) for page in pages], "预期 11 条记录(含超级管理员)按每页 4 条翻页.")
+        names = [name for page in pages for name in page]
+        self.assertEqual(["super-admin"] + [f"robot-{i:02d}" for i in range(1, 11)], names)
+
+    def test_filters(self):
+        names = [name for page in self.pages(2, owner="team-a", role="Executor") for name in page]
+        self.assertEqual(["robot-01", "robot-05", "robot-07"], names)
+        names = [name for page in self.pages(100, isEnabled="false") for name in page]
+        self.assertEqual(["robot-07"], names)
+
+    def test_projection(self):
+        item = self.signed("GET", USERS, params={"limit": 1}).json["payload"]["items"][0]
+        self.assertNotIn("secretKey", item, "预期列表不返回私钥.")
+        self.assertEqual("Administrator", item["role"])
+
+    def test_update(self):
+        user = MachineUser.query.filter_by(name="robot-01").first()
+        obj = self.signed("PATCH", f"{USERS}/{user.id}", {"isEnabled": False, "role": "Owner"}).json
+        self.expectSuccess(obj)
+        self.assertEqual((False, "Owner", "team-a"), (obj["payload"]["isEnabled"], obj["payload"]["role"],
+                                                      obj["payload"]["owner"]))
+        obj = self.signed("PATCH", f"{USERS}/{user.id}", {"name": "robot-02"}).json
+        self.expectFail(obj, -1001)
+
+    def test_sparse_role_id(self):
+        # 角色编号不连续(或很大)时按编号查找, 不按位置
+        db.session.add(Role(id=10 ** 12, name="Auditor", permissions=1))
+        db.session.commit()
+        resp = self.signed("POST", USERS, {"name": "robot-auditor", "owner": "team-a", "role": "Auditor"})
+        self.expectSuccess(resp.json)
+        self.assertEqual("Auditor", resp.json["payload"]["role"])
+        self.assertEqual(10 ** 12, MachineUser.query.filter_by(name="robot-auditor").first().role_id)
+
+    def test_invalid_params(self):
+        self.expectFail(self.signed("GET", USERS, params={"limit": 0}).json, -1001)
+        self.expectFail(self.signed("GET", USERS, params={"role": "Nobody"}).json, -1001)
+        self.expectFail(self.signed("POST", USERS, {"name": "x"}).json, -1001)
+
+    def test_admin_required(self):
+        access_key, secret_key = self.create_user("Owner")
+        self.expectFail(self.signed("GET", USERS, access_key=access_key, secret_key=secret_key).json, -2001)
+
+    def test_conditional_get(self):
+        resp = self.signed("GET", USERS, params={"limit": 5})
+        etag = resp.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'), "预期返回弱 ETag.")
+        resp = self.signed("GET", USERS, params={"limit": 5}, headers={"If-None-Match": etag})
+        self.assertEqual((304, b""), (resp.status_code, resp.data), "预期未变化时返回 304 且不返回响应体.")
+        self.assertEqual(etag, resp.headers["ETag"])
+        # 其他查询参数对应不同的 ETag
+        resp = self.signed("GET", USERS, params={"limit": 6}, headers={"If-None-Match": etag})
+        self.assertEqual(200, resp.status_code)
+        # 窗口内的行被修改或删除
+        user = MachineUser.query.filter_by(name="robot-02").first()
+        self.signed("PATCH", f"{USERS}/{user.id}", {"desc": "changed"})
+        resp = self.signed("GET", USERS, params={"limit": 5}, headers={"If-None-Match": etag})
+        self.assertEqual(200, resp.status_code, "预期修改后返回完整响应.")
+        etag = resp.headers["ETag"]
+        self.signed("DELETE", f"{USERS}/{user.id}")
+        resp = self.signed("GET", USERS, params={"limit": 5}, headers={"If-None-Match": etag})
+        self.assertEqual(200, resp.status_code, "预期删除后返回完整响应.")
+
+    def test_conditional_get_item(self):
+        user = MachineUser.query.filter_by(name="robot-01").first()
+        resp = self.signed("GET", f"{USERS}/{user.id}")
+        self.expectSuccess(resp.json)
+        headers = {"If-None-Match": resp.headers["ETag"]}
+        self.assertEqual(304, self.signed("GET", f"{USERS}/{user.id}", headers=headers).status_code)
+        resp = self.signed("GET", f"{USERS}/{user.id}", headers={"If-Modified-Since": resp.headers["Last-Modified"]})
+        self.assertEqual(304, resp.status_code, "预期按 If-Modified-Since 比较.")
+        self.signed("PATCH", f"{USERS}/{user.id}", {"owner": "team-c"})
+        self.assertEqual(200, self.signed("GET", f"{USERS}/{user.id}", headers=headers).status_code)
+
+    def test_conditional_get_roles(self):
+        resp = self.signed("GET", "/api/roles")
+        self.assertEqual(["Follower", "Executor", "Owner", "Administrator"],
+                         [role["name"] for role in resp.json["payload"]])
+        self.assertNotIn("Last-Modified", resp.headers, "预期集合资源不返回最后修改时间.")
+        resp = self.signed("GET", "/api/roles", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(304, resp.status_code)
+
+    def test_conditional_get_after_delete(self):
+        # 删除行不改变剩余行的修改时间, If-Modified-Since 不能用于集合资源
+        resp = self.signed("GET", USERS, params={"limit": 3})
+        self.assertNotIn("Last-Modified", resp.headers, "预期集合资源不返回最后修改时间.")
+        since = "Sat, 01 Jan 2100 00:00:00 GMT"
+        self.signed("DELETE", f"{USERS}/{resp.json['payload']['items'][1]['id']}")
+        resp = self.signed("GET", USERS, params={"limit": 3}, headers={"If-Modified-Since": since})
+        self.assertEqual(200, resp.status_code, "预期删除后返回完整响应.")
+        self.assertEqual(3, len(resp.json["payload"]["items"]))
@@ -0,0 +1,35 @@
+import unittest
+
+from server.service.metrics import BUCKETS, _merge, _render
+
+
+def snapshot(pid, count, hits, size):
+    counts = [count] + [0] * len(BUCKETS) + [0.0005 * count]
+    return {"pid": pid, "histograms": [["api.liveness", "GET", "200", counts]],
+            "samples": [["credential_cache_hits_total", "counter", "hits", [], hits],
+                        ["credential_cache_size", "gauge", "size", [], size]]}
+
+
+class MetricsTestCase(unittest.TestCase):
+    """
+    Metrics 测试用例
+    """
+
+    def test_merge(self):
+        histograms, samples = _merge([snapshot(1, 2, 3, 4), snapshot(2, 5, 6, 7)], per_process=True)
+        self.assertEqual(7, histograms[("api.liveness", "GET", "200")][0], "预期直方图跨进程累加.")
+        samples = {(s.name, s.labels): s.value for s in samples}
+        self.assertEqual(9, samples[("credential_cache_hits_total", ())], "预期计数器跨进程累加.")
+        self.assertEqual(7, samples[("credential_cache_size", (("pid", "2"),))], "预期仪表按进程区分.")
+
+    def test_render(self):
+        text = _render(*_merge([snapshot(1, 2, 3, 4)])).decode()
+        labels = 'endpoint="api.liveness",method="GET",status="200"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.001"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 2", text)
+        self.assertIn("# TYPE credential_cache_hits_total counter\ncredential_cache_hits_total 3", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
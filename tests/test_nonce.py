@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from server.service.nonce import NonceStore
+
+
+class Clock:
+    """ 可控时钟 """
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class NonceStoreTestCase(unittest.TestCase):
+    """
+    NonceStore 测试用例
+    """
+
+    def check_backend(self, uri):
+        clock = Clock(1_700_000_000)
+        store = NonceStore()
+        store.backend = NonceStore.create_backend(uri, window_min=15, clock=clock)
+        ts = clock.now * 1000
+        # 1.首次出现通过, 重放拒绝
+        self.assertTrue(store.add("ak", "n1", ts), "预期首次出现的随机数通过.")
+        self.assertFalse(store.add("ak", "n1", ts), "预期重复的随机数被拒绝.")
+        self.assertTrue(store.add("other", "n1", ts), "预期不同公钥的随机数互不影响.")
+        self.assertEqual(store.replays, 1)
+        # 2.超出有效期的时间戳拒绝
+        self.assertFalse(store.add("ak", "n2", ts - 20 * 60 * 1000), "预期过期时间戳被拒绝.")
+        # 3.有效期内仍然记住, 过期后整桶丢弃
+        clock.now += 10 * 60
+        self.assertFalse(store.add("ak", "n1", ts), "预期有效期内仍能识别重放.")
+        clock.now += 10 * 60
+        store.add("ak", "n3", clock.now * 1000)
+        self.assertEqual(len(store.backend), 1, "预期过期分桶已被丢弃.")
+
+    def test_memory_backend(self):
+        self.check_backend("memory://")
+
+    def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            self.check_backend(f"sqlite:///{os.path.join(workdir, 'nonce.db')}")
+
+    def test_memory_bucket_grow(self):
+        store = NonceStore()
+        store.backend = NonceStore.create_backend("memory://", window_min=15, clock=Clock(1_700_000_000))
+        ts = 1_700_000_000 * 1000
+        for i in range(5000):
+            self.assertTrue(store.add("ak", str(i), ts))
+        for i in range(5000):
+            self.assertFalse(store.add("ak", str(i), ts))
@@ -0,0 +1,19 @@
+import unittest
+
+from server.service.profiler import SqlProfiler
+
+
+class ProfilerTestCase(unittest.TestCase):
+    """
+    SqlProfiler 测试用例
+    """
+
+    def test_without_context(self):
+        profiler = SqlProfiler()
+        # 没有执行上下文的语句不计时, 也不报错
+        profiler._before_cursor_execute(None, None, "SELECT 1", (), None, False)
+        profiler._after_cursor_execute(None, None, "SELECT 1", (), None, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+from server.utils.ratelimit_storage import MmapStorage
+
+
+class MmapStorageTestCase(unittest.TestCase):
+    """
+    MmapStorage 测试用例
+    """
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.uri = f"mmap://{os.path.join(self.workdir.name, 'ratelimit.mmap')}?slots=64"
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_scheme(self):
+        storage = storage_from_string(self.uri)
+        self.assertIsInstance(storage, MmapStorage)
+        self.assertEqual(64, storage.slots)
+        self.assertTrue(storage.check())
+
+    def test_sliding_window_shared(self):
+        # 两个实例映射同一文件, 模拟两个 worker
+        first = SlidingWindowCounterRateLimiter(storage_from_string(self.uri))
+        second = SlidingWindowCounterRateLimiter(storage_from_string(self.uri))
+        item = parse("4/hour")
+        hits = [first.hit(item, "ak"), second.hit(item, "ak"), first.hit(item, "ak"), second.hit(item, "ak")]
+        self.assertEqual([True] * 4, hits, "预期限额内的请求通过.")
+        self.assertFalse(second.hit(item, "ak"), "预期共享计数超过限额后拒绝.")
+        self.assertTrue(first.hit(item, "other"), "预期不同的键互不影响.")
+        self.assertEqual(0, first.get_window_stats(item, "ak").remaining)
+
+    def test_fixed_window(self):
+        storage = storage_from_string(self.uri)
+        limiter = FixedWindowRateLimiter(storage)
+        item = parse("2/minute")
+        self.assertEqual([True, True, False], [limiter.hit(item, "ak") for _ in range(3)])
+        limiter.clear(item, "ak")
+        self.assertTrue(limiter.hit(item, "ak"), "预期清除后重新计数.")
+
+    def test_eviction(self):
+        # 槽位数远小于键数时淘汰最早过期的槽位, 不报错
+        storage = storage_from_string(self.uri)
+        for i in range(1000):
+            storage.incr(f"key-{i}", 60)
+        self.assertLessEqual(storage.reset(), 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
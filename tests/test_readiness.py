@@ -0,0 +1,61 @@
+import json
+import time
+import unittest
+
+from flask import Flask
+from server.service.readiness import Readiness
+
+
+class ReadinessTestCase(unittest.TestCase):
+    """
+    Readiness 测试用例
+    """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["READINESS_INTERVAL"] = 60
+        self.readiness = Readiness()
+        self.readiness.init_app(self.app)
+        # 替换内置检查项, 不依赖数据库
+        self.readiness._checks.clear()
+        self.readiness._task.ensure_started = lambda: None
+
+    def status(self):
+        with self.app.app_context():
+            resp = self.readiness.status()
+        return resp.status_code, json.loads(resp.get_data())
+
+    def test_first_probe(self):
+        calls = list()
+        self.readiness.register("ok", lambda: calls.append(1))
+        code, _ = self.status()
+        self.assertEqual(200, code, "预期首次探测时同步完成检查.")
+        self.status()
+        self.assertEqual(1, len(calls), "预期之后的探测返回缓存结果.")
+
+    def test_checks(self):
+        self.readiness.register("ok", lambda: None)
+        self.readiness.refresh()
+        code, body = self.status()
+        self.assertEqual(200, code, "预期全部检查通过时就绪.")
+        self.assertIn("latencyMs", body["payload"]["checks"]["ok"], "预期包含单项检查耗时.")
+
+        def broken():
+            raise RuntimeError("down")
+
+        self.readiness.register("broken", broken)
+        self.readiness.refresh()
+        code, body = self.status()
+        self.assertEqual(503, code, "预期任一检查失败时未就绪.")
+        self.assertEqual("RuntimeError: down", body["payload"]["checks"]["broken"]["error"])
+
+    def test_stale(self):
+        self.readiness.register("ok", lambda: None)
+        snapshot = self.readiness.refresh()
+        self.readiness._snapshot = snapshot._replace(checked_at=time.time() - 3 * 60 - 1)
+        code, _ = self.status()
+        self.assertEqual(503, code, "预期检查结果过期时未就绪.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import datetime
+import decimal
+import json
+import unittest
+
+from server.bean.error import InvalidParamException
+from server.bean.response import _dumps_json, _dumps_orjson
+
+PAYLOAD = {
+    1: "int key",
+    2.5: "float key",
+    None: "null key",
+    "name": "中文",
+    "time": datetime.datetime(2026, 10, 19, 1, 2, 3),
+    "amount": decimal.Decimal("1.50"),
+    "tags": ("a", "b"),
+    "nested": [{"id": 7}],
+}
+
+
+class ResponseTestCase(unittest.TestCase):
+    """
+    ApiResponse 序列化测试用例
+    """
+
+    def test_backends(self):
+        expected = {"1": "int key", "2.5": "float key", "null": "null key", "name": "中文",
+                    "time": "2026-10-19T01:02:03", "amount": "1.50", "tags": ["a", "b"], "nested": [{"id": 7}]}
+        self.assertEqual(expected, json.loads(_dumps_json(PAYLOAD)), "预期标准库支持非字符串的键.")
+        if _dumps_orjson is None:
+            self.skipTest("未安装 orjson")
+        self.assertEqual(expected, json.loads(_dumps_orjson(PAYLOAD)), "预期 orjson 与标准库结果一致.")
+
+    def test_exception_fields(self):
+        e = InvalidParamException(error="bad", value=1)
+        e.time_elapsed_ms = 1.5
+        self.assertEqual((-1001, 1.5), (e.code, e.response.time_elapsed_ms), "预期响应字段转发给响应内容.")
+        self.assertEqual(1.5, json.loads(e.encode())["timeElapsedMs"])
+        self.assertEqual({"error": "bad", "value": 1}, e.payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
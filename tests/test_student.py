@@ -1,6 +1,9 @@
+import unittest
+
 from tests.base import BaseTest
 
 
+@unittest.skip("学生管理接口(/openapi/students)已不在本服务中")
 class StudentTestCase(BaseTest):
     """
     Student 测试用例
@@ -0,0 +1,54 @@
+import datetime
+
+from server import db
+from server.model.rbca import MachineUser
+from server.service.usage import key_usage
+from tests.base import BaseTest
+
+# 管理员接口(空请求体时不导入任何数据)
+BULK = "/api/machine-users/bulk"
+
+
+class KeyUsageTestCase(BaseTest):
+    """
+    访问密钥使用情况 测试用例
+    """
+
+    def admin(self):
+        db.session.expire_all()
+        return MachineUser.query.filter_by(access_key=self.access_key).first()
+
+    def test_signed_requests_are_counted(self):
+        update_time = self.admin().update_time
+        self.signed("POST", BULK)
+        self.signed("POST", BULK)
+        headers = self.signed_headers()
+        headers["X-Signature"] = headers["X-Signature"][::-1]
+        self.client.post(BULK, headers=headers)
+        self.assertEqual(0, self.admin().request_count, "预期请求线程不写入使用情况.")
+
+        self.assertEqual(1, key_usage.flush())
+        admin = self.admin()
+        self.assertEqual(2, admin.request_count, "预期只统计签名通过的请求.")
+        self.assertIsNotNone(admin.last_used_at)
+        self.assertEqual(update_time, admin.update_time, "预期不更新 update_time.")
+        self.assertEqual(0, key_usage.flush())
+
+    def test_merge_across_processes(self):
+        # 其他进程已写入更晚的使用时间与请求数
+        later = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        admin = self.admin()
+        admin.request_count, admin.last_used_at = 5, later
+        db.session.commit()
+        access_key, _ = self.create_user()
+        user = MachineUser.query.filter_by(access_key=access_key).first()
+
+        key_usage.record(admin.id)
+        key_usage.record(user.id)
+        key_usage.record(user.id)
+        self.assertEqual(2, key_usage.flush())
+        admin = self.admin()
+        self.assertEqual((6, later), (admin.request_count, admin.last_used_at), "预期请求数累加, 使用时间不回退.")
+        user = MachineUser.query.filter_by(access_key=access_key).first()
+        self.assertEqual(2, user.request_count)
+        self.assertIsNotNone(user.last_used_at)
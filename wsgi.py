@@ -0,0 +1,15 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+# WSGI 入口: gunicorn -c gunicorn.conf.py wsgi:app (只创建应用; 命令行工具与数据库迁移见 main.py)
+
+import os
+from dotenv import load_dotenv
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
+if os.path.exists(dotenv_path):
+    load_dotenv(dotenv_path)
+
+
+from server import create_app
+
+app = create_app(os.getenv("FLASK_CONFIG") or "default")